@@ -0,0 +1,70 @@
+"""
+Request body cap enforced while the body is being received.
+
+Starlette reads (and spools to disk) a whole multipart upload before the
+endpoint runs, so a size check in the handler comes too late, and a
+chunked upload has no Content-Length to reject up front. This middleware
+counts body bytes as they arrive on the configured paths and answers 413
+as soon as the limit is passed, before the rest of the body is read.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException
+
+
+class BodyTooLarge(HTTPException):
+    def __init__(self, detail: str) -> None:
+        super().__init__(status_code=413, detail=detail)
+
+
+class BodySizeLimit:
+    """ASGI middleware rejecting bodies over ``max_bytes`` on ``paths`` with 413."""
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str], detail: str = "Request body is too large") -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+        self.detail = detail
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this is a 413, not a 400
+                    raise BodyTooLarge(self.detail)
+            return message
+
+        async def tracking_send(message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLarge:
+            # Read outside request parsing (e.g. by another middleware): answer here
+            if started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send) -> None:
+        await JSONResponse(status_code=413, content={"detail": self.detail})(scope, receive, send)
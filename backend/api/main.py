@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import tempfile
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from contextlib import asynccontextmanager
 
 # Load .env file
@@ -11,15 +13,47 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import numpy as np
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Query, Request, Response, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from supabase import create_client, Client
 
-from backend.embedding.user_embedder import UserProfile, embed_user
-from backend.spatial.knn_clustering import find_knn
-from backend.spatial.room_generator import assign_room
-from backend.spatial.space_mapper import map_to_3d_space
+from backend.api.body_limit import BodySizeLimit
+from backend.api.presence import PresenceHub
+from backend.api.profile_store import ProfileStore
+from backend.api.room_chat import ChatHub
+from backend.api.serialization import (
+    PROFILE_LIST_FIELDS,
+    VECTOR_FIELDS,
+    FastJSONResponse,
+    RenderCache,
+    dumps,
+    etag,
+    not_modified,
+    parse_fields,
+    project,
+)
+from backend.api.shared_store import SharedProfileStore, SharedStoreFull, server_run_id
+from backend.api.snapshot import Snapshot, load_snapshot, write_snapshot
+from backend.api.supabase_sync import SupabaseSyncEngine
+from backend.api.write_behind import WriteBehindQueue
+from backend.embedding import text_encoder
+from backend.embedding.embedding_cache import EmbeddingCache
+from backend.embedding.executor import EmbeddingBusy, EmbeddingExecutor
+from backend.embedding.knowledge_store import KnowledgeStore, chunk_id
+from backend.embedding.user_embedder import UserProfile
+from backend.observability.metrics import REGISTRY, MetricsMiddleware, stage, supabase_call
+from backend.profile_extraction.cv_parser import chunk_cv, chunk_cv_text
+from backend.profile_extraction.pdf_extractor import PdfExtractionBusy, PdfExtractionTimeout, default_pool
+from backend.spatial.rebalancer import RebalanceReport, RoomRebalancer
+from backend.spatial.room_generator import RoomIndex
+from backend.spatial.layout import LayoutEngine
+from backend.spatial.space_mapper import to_world
+from backend.spatial.spatial_grid import SpatialGrid
+from backend.voice_cloning.avatar_manager import Avatar, AvatarManager
 
 # Supabase client
 supabase_url = os.getenv("SUPABASE_URL", "")
@@ -35,16 +69,80 @@ else:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: load demo profiles
+    # Startup: restore the last snapshot (or demo profiles), then catch up
+    # with Supabase rows changed since it was taken
     if not USER_EMBEDDINGS:
-        _load_demo_profiles()
-        await _sync_from_supabase()
+        snapshot = _restore_snapshot()
+        if snapshot is None:
+            _load_demo_profiles()
+        if supabase:
+            # Resume exactly where the snapshotted store was; without one
+            # (or from an older snapshot) pull everything
+            if snapshot is not None:
+                SYNC_ENGINE.watermark, SYNC_ENGINE.watermark_id = snapshot.watermark, snapshot.watermark_id
+            try:
+                await SYNC_ENGINE.sync_once()
+            except Exception as e:
+                print(f"Warning: Could not sync from Supabase: {e}")
+    tasks = []
+    if supabase and SYNC_INTERVAL > 0:
+        tasks.append(asyncio.create_task(SYNC_ENGINE.run_forever(SYNC_INTERVAL)))
+    if supabase:
+        tasks.append(asyncio.create_task(WRITE_QUEUE.run_forever()))
+    _keep_running(tasks, "Presence fan-out", PRESENCE.run_forever)
+    if REBALANCE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(_rebalance_periodically()))
+    if SNAPSHOT_DIR and SNAPSHOT_INTERVAL > 0:
+        tasks.append(asyncio.create_task(_snapshot_periodically()))
     yield
-    # Shutdown: nothing needed
+    # Shutdown: stop background jobs and persist a final snapshot
+    for task in tasks:
+        task.cancel()
+    if supabase and len(WRITE_QUEUE):
+        try:
+            await WRITE_QUEUE.flush()
+        except Exception as e:
+            print(f"Warning: Could not flush pending Supabase writes: {e}")
+    await _write_snapshot()
+    if SHARED is not None:
+        SHARED.close()
+    EMBED_EXECUTOR.shutdown()
+    EMBED_CACHE.close()
+    PDF_POOL.shutdown()
+
+
+def _keep_running(tasks: List[asyncio.Task], name: str, start: Callable[[], Awaitable[None]]) -> None:
+    """
+    Run ``start()`` as a background task in ``tasks``; if it fails, log why
+    and start it again, so the loop it runs never stops silently.
+    """
+
+    def _on_done(task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        print(f"Warning: {name} failed, restarting it: {type(error).__name__}: {error}")
+        tasks.remove(task)
+        _keep_running(tasks, name, start)
+
+    task = asyncio.create_task(start())
+    task.add_done_callback(_on_done)
+    tasks.append(task)
 
 
 app = FastAPI(title="GiDiSpace API", version="0.1.0", lifespan=lifespan)
 
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError) -> Response:
+    """FastAPI's 422, rendered so a rejected inf/nan input (echoed back in the error) cannot turn it into a 500."""
+    return FastJSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors())})
+
+
+# Cap CV uploads while they are received, before Starlette spools the multipart body
+MAX_PDF_BYTES = int(os.getenv("GIDI_MAX_PDF_MB", "20")) * 1024 * 1024
+app.add_middleware(BodySizeLimit, max_bytes=MAX_PDF_BYTES, paths=("/extract-pdf",), detail="PDF is too large")
+
 # CORS middleware for frontend access
 app.add_middleware(
     CORSMiddleware,
@@ -61,9 +159,104 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so route latency includes the middlewares above; see /metrics
+app.add_middleware(MetricsMiddleware)
 
-USER_EMBEDDINGS: List[Dict[str, object]] = []
-ROOMS: Dict[str, List[List[float]]] = {}
+# Profiles indexed by id and name; the k-NN index is exact by default,
+# set GIDI_KNN_INDEX=ivf for approximate search.
+USER_EMBEDDINGS = ProfileStore()
+ROOM_THRESHOLD = 0.6
+ROOM_CAPACITY = int(os.getenv("GIDI_ROOM_CAPACITY", "50"))
+REBALANCE_INTERVAL = float(os.getenv("GIDI_REBALANCE_INTERVAL", "0"))
+ROOMS = RoomIndex(threshold=ROOM_THRESHOLD, max_members=ROOM_CAPACITY)
+REBALANCER = RoomRebalancer(capacity=ROOM_CAPACITY, threshold=ROOM_THRESHOLD)
+# Rendered /profiles bodies for the current store version; see serialization.py
+RENDER_CACHE = RenderCache()
+# Presence deltas for /ws/presence, batched per room every tick
+PRESENCE = PresenceHub(
+    tick=float(os.getenv("GIDI_PRESENCE_TICK_MS", "50")) / 1e3,
+    max_queue=int(os.getenv("GIDI_PRESENCE_QUEUE", "256")),
+)
+NEIGHBOR_EVENTS_K = 5
+# Avatar positions in lounge (world) units for radius / k-closest queries
+SPACE = SpatialGrid(cell_size=float(os.getenv("GIDI_SPACE_CELL", "4")))
+# PCA layout behind every profile's coords; refitted once it drifts past GIDI_LAYOUT_DRIFT
+LAYOUT = LayoutEngine(drift_threshold=float(os.getenv("GIDI_LAYOUT_DRIFT", "0.05")))
+# CV chunks per profile for avatar answers; mirrored to knowledge_chunks
+KNOWLEDGE = KnowledgeStore(dtype=os.getenv("GIDI_CHUNK_DTYPE", "float32"))
+AVATARS = AvatarManager(knowledge=KNOWLEDGE)
+MAX_PAGE_SIZE = int(os.getenv("GIDI_MAX_PAGE_SIZE", "1000"))
+# Ids/names/rooms/coords/embeddings of every uvicorn worker's profiles in one
+# shared-memory segment (empty = single worker); see shared_store.py
+SHARED_STORE = os.getenv("GIDI_SHARED_STORE", "")
+SHARED = (
+    SharedProfileStore(SHARED_STORE, capacity=int(os.getenv("GIDI_SHARED_CAPACITY", "131072")), owner=server_run_id())
+    if SHARED_STORE
+    else None
+)
+# Embedding results keyed by their inputs; survives restarts via SQLite
+EMBED_CACHE = EmbeddingCache(path=os.getenv("GIDI_EMBED_CACHE_PATH", "data/cache/embeddings.sqlite3") or None)
+# Concurrent POST /profiles are micro-batched into one embed call off the event loop
+EMBED_EXECUTOR = EmbeddingExecutor(
+    lambda profiles: _embed_with_coords(profiles),
+    workers=int(os.getenv("GIDI_EMBED_WORKERS", "2")),
+    max_batch=int(os.getenv("GIDI_EMBED_BATCH", "64")),
+    max_delay=float(os.getenv("GIDI_EMBED_BATCH_DELAY_MS", "2")) / 1e3,
+    max_queue=int(os.getenv("GIDI_EMBED_QUEUE", "1024")),
+)
+# Pulls profiles changed in Supabase (by updated_at) every SYNC_INTERVAL seconds
+SYNC_INTERVAL = float(os.getenv("GIDI_SYNC_INTERVAL", "30"))
+SYNC_ENGINE = SupabaseSyncEngine(
+    supabase,
+    lambda rows: _apply_remote_profiles(rows),
+    page_size=int(os.getenv("GIDI_SYNC_PAGE_SIZE", "500")),
+)
+# Profile/presence writes coalesced per id and upserted in bulk off the event loop
+WRITE_QUEUE = WriteBehindQueue(
+    supabase,
+    max_batch=int(os.getenv("GIDI_WRITE_BATCH", "500")),
+    flush_interval=float(os.getenv("GIDI_WRITE_INTERVAL", "0.5")),
+    max_pending=int(os.getenv("GIDI_WRITE_QUEUE_MAX", "100000")) or None,
+    # Rows reference profiles(id), so profiles go first whatever was written first
+    table_order=("profiles", "avatar_states", "knowledge_chunks", "room_messages"),
+)
+# Last GIDI_CHAT_HISTORY messages of each room in memory; new ones are upserted
+# to room_messages in bulk through the write queue
+CHAT = ChatHub(
+    capacity=int(os.getenv("GIDI_CHAT_HISTORY", "200")),
+    persist=(lambda row: _persist_message(row)) if supabase else None,
+    load=(lambda room_id, limit: _load_room_messages(room_id, limit)) if supabase else None,
+)
+# CV uploads are parsed in a bounded process pool (GIDI_PDF_WORKERS/QUEUE/TIMEOUT)
+PDF_POOL = default_pool()
+PDF_CHUNK_BYTES = 1024 * 1024
+# Snapshot directory for fast restarts (empty = disabled)
+SNAPSHOT_DIR = os.getenv("GIDI_SNAPSHOT_DIR", "data/snapshot")
+if SNAPSHOT_DIR and SHARED is not None:
+    # Each worker holds full records only for its own profiles, so every
+    # snapshot would be partial and the last one written would win
+    print("Warning: GIDI_SNAPSHOT_DIR is ignored when GIDI_SHARED_STORE is set")
+    SNAPSHOT_DIR = ""
+SNAPSHOT_INTERVAL = float(os.getenv("GIDI_SNAPSHOT_INTERVAL", "300"))
+_snapshot_version = -1
+# Profiles (re)assigned while a rebalance is in flight, replayed on swap;
+# None when no rebalance is pending
+_ROOMS_DIRTY: Optional[Set[str]] = None
+# Existing stats() dicts exported as gauges on /metrics (read at scrape time)
+for _prefix, _source in (
+    ("embed_cache", lambda: EMBED_CACHE.stats()),
+    ("token_cache", lambda: text_encoder.TOKEN_CACHE.stats()),
+    ("embed_executor", lambda: EMBED_EXECUTOR.stats()),
+    ("response_cache", lambda: RENDER_CACHE.stats()),
+    ("write_queue", lambda: WRITE_QUEUE.stats()),
+    ("sync", lambda: SYNC_ENGINE.stats.to_dict()),
+    ("presence", lambda: PRESENCE.stats()),
+    ("knowledge", lambda: KNOWLEDGE.stats()),
+    ("chat", lambda: CHAT.stats()),
+):
+    REGISTRY.collect(_prefix, _source)
+if SHARED is not None:
+    REGISTRY.collect("shared_store", SHARED.stats)
 
 
 class ProfileRequest(BaseModel):
@@ -78,6 +271,13 @@ class ProfileRequest(BaseModel):
     ai_personality_prompt: Optional[str] = None
 
 
+class PositionRequest(BaseModel):
+    # inf/nan have no grid cell; reject them with 422 instead of failing in SpatialGrid
+    x: float = Field(allow_inf_nan=False)
+    y: float = Field(0.0, allow_inf_nan=False)
+    z: float = Field(allow_inf_nan=False)
+
+
 class NeighborResponse(BaseModel):
     name: str
     distance: float
@@ -97,6 +297,158 @@ class GiDiProfile(BaseModel):
     is_online: bool = False
 
 
+def _assign_room(profile: Dict[str, object]) -> str:
+    """Seat a profile in the current room index, tracking it for an in-flight rebalance."""
+    if _ROOMS_DIRTY is not None:
+        _ROOMS_DIRTY.add(profile["id"])
+    with stage("assign_room"):
+        return ROOMS.assign(profile["id"], profile["embedding"])
+
+
+def _start_rebalance() -> bool:
+    """Snapshot all embeddings and re-cluster rooms in a worker thread."""
+    global _ROOMS_DIRTY
+    if _ROOMS_DIRTY is not None:
+        return False
+    loop = asyncio.get_running_loop()
+    index = USER_EMBEDDINGS.index
+
+    def _on_done(rooms: RoomIndex, report: RebalanceReport) -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_swap_rooms, rooms)
+
+    def _on_error(error: Exception) -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_abandon_rebalance)
+
+    keys = index.keys
+    # Current rooms let the new partition keep their names (and chat) by member overlap
+    previous = [ROOMS.room_of(key) for key in keys]
+    _ROOMS_DIRTY = set()
+    if not REBALANCER.start(keys, index.matrix, _on_done, _on_error, previous, ROOMS.next_number):
+        _ROOMS_DIRTY = None
+        return False
+    return True
+
+
+def _swap_rooms(rooms: RoomIndex) -> None:
+    """Install a rebalanced room index, replaying changes made while it was built."""
+    global ROOMS, _ROOMS_DIRTY
+    for profile_id in _ROOMS_DIRTY or ():
+        profile = USER_EMBEDDINGS.get(profile_id)
+        if profile is None:
+            rooms.remove(profile_id)
+        else:
+            rooms.assign(profile_id, profile["embedding"])
+    _ROOMS_DIRTY = None
+    ROOMS = rooms
+    moved = []
+    for profile in USER_EMBEDDINGS:
+        old_room, new_room = profile.get("room"), rooms.room_of(profile["id"])
+        if new_room != old_room:
+            profile["room"] = new_room
+            moved.append(profile)
+            if profile.get("is_online"):
+                PRESENCE.place(profile["id"], old_room, new_room)
+    USER_EMBEDDINGS.touch()
+    _share(moved)
+    CHAT.retain(rooms)
+
+
+def _abandon_rebalance() -> None:
+    """Keep the current rooms after a failed rebalance; changes since went straight into them."""
+    global _ROOMS_DIRTY
+    _ROOMS_DIRTY = None
+
+
+async def _rebalance_periodically() -> None:
+    while True:
+        await asyncio.sleep(REBALANCE_INTERVAL)
+        _start_rebalance()
+
+
+def _restore_snapshot() -> Optional[Snapshot]:
+    """Load the store and rooms from the last snapshot, if there is one, and return it."""
+    global ROOMS, _snapshot_version
+    snapshot = load_snapshot(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+    if snapshot is None:
+        return None
+    # Fit on the whole population and lay everyone out in one call
+    coords = LAYOUT.fit(snapshot.embeddings)
+    for profile, xyz in zip(snapshot.profiles, coords.tolist()):
+        profile["coords"] = xyz
+    USER_EMBEDDINGS.load(snapshot.profiles, snapshot.embeddings)
+    for profile in snapshot.profiles:
+        SPACE.upsert(profile["id"], to_world(profile["coords"]))
+    _share(USER_EMBEDDINGS)
+    # Only the bio survives in the snapshot; CV chunks come back with the next sync
+    KNOWLEDGE.put_many((profile["id"], chunk_cv_text(profile.get("bio") or "")) for profile in snapshot.profiles)
+    room_labels: Dict[str, int] = {}
+    labels = [room_labels.setdefault(profile["room"], len(room_labels)) for profile in snapshot.profiles]
+    ROOMS = RoomIndex.from_assignment(
+        [profile["id"] for profile in snapshot.profiles],
+        snapshot.embeddings,
+        np.array(labels, dtype=np.int64),
+        threshold=ROOM_THRESHOLD,
+        max_members=ROOM_CAPACITY,
+        room_names=list(room_labels),
+    )
+    _snapshot_version = USER_EMBEDDINGS.version
+    print(f"✓ Restored {len(USER_EMBEDDINGS)} GiDis from snapshot taken {snapshot.created_at}")
+    return snapshot
+
+
+async def _write_snapshot() -> None:
+    """Snapshot the store if it changed; serialization runs in a worker thread."""
+    global _snapshot_version
+    version = USER_EMBEDDINGS.version
+    if not SNAPSHOT_DIR or version == _snapshot_version:
+        return
+    index = USER_EMBEDDINGS.index
+    keys = index.keys
+    profiles = [USER_EMBEDDINGS.get(key).to_dict() for key in keys]
+    matrix = np.array(index.matrix, copy=True)
+    # Read with the copy: sync applies rows before it advances the watermark
+    watermark, watermark_id = (SYNC_ENGINE.watermark, SYNC_ENGINE.watermark_id) if supabase else (None, None)
+    try:
+        await asyncio.to_thread(
+            write_snapshot, SNAPSHOT_DIR, profiles, matrix, watermark=watermark, watermark_id=watermark_id
+        )
+        _snapshot_version = version
+    except Exception as e:
+        print(f"Warning: Could not write snapshot: {e}")
+
+
+async def _snapshot_periodically() -> None:
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        await _write_snapshot()
+
+
+def _embed_with_coords(profiles: List[UserProfile]) -> List[Dict[str, object]]:
+    """Embed a batch (through the cache) and place each result in 3D; runs in the executor."""
+    with stage("embed"):
+        embedded = EMBED_CACHE.embed_many(profiles)
+    if embedded:
+        # Read before projecting: a refit landing in between only costs a re-projection
+        version = LAYOUT.version
+        with stage("layout_project"):
+            coords = LAYOUT.project(np.array([created["embedding"] for created in embedded], dtype=np.float32))
+        for created, xyz in zip(embedded, coords.tolist()):
+            created["coords"] = xyz
+            created["layout_version"] = version
+    return embedded
+
+
+def _reproject_if_stale(created: Dict[str, object]) -> None:
+    """Redo coords projected in the executor if the layout was refitted before they are stored."""
+    if created.pop("layout_version", LAYOUT.version) != LAYOUT.version:
+        created["coords"] = LAYOUT.project(np.array([created["embedding"]], dtype=np.float32))[0].tolist()
+
+
+DEMO_PREFIX = "demo-"
+
+
 def _load_demo_profiles() -> None:
     """Load demo profiles from JSON file."""
     demo_path = Path("data/sample_profiles/demo_profiles.json")
@@ -104,83 +456,234 @@ def _load_demo_profiles() -> None:
         return
     with demo_path.open("r", encoding="utf-8") as f:
         profiles = json.load(f)
-    for profile in profiles:
-        created = embed_user(
-            UserProfile(
-                name=profile["name"],
-                cv_text=profile.get("summary"),
-                transcript=profile.get("transcript"),
-                interests=profile.get("interests", []),
-            )
+    embedded = EMBED_CACHE.embed_many([
+        UserProfile(
+            name=profile["name"],
+            cv_text=profile.get("summary"),
+            transcript=profile.get("transcript"),
+            interests=profile.get("interests", []),
         )
-        coords = map_to_3d_space(np.array(created["embedding"], dtype=np.float32)).tolist()
-        created["coords"] = coords
-        created["id"] = f"demo-{profile['name'].lower().replace(' ', '-')}"
+        for profile in profiles
+    ])
+    coords = LAYOUT.project(np.array([created["embedding"] for created in embedded], dtype=np.float32))
+    for profile, created, xyz in zip(profiles, embedded, coords.tolist()):
+        created["coords"] = xyz
+        created["id"] = f"{DEMO_PREFIX}{profile['name'].lower().replace(' ', '-')}"
         created["avatar_model"] = "/avatars/raiden.vrm"
         created["bio"] = profile.get("summary", "")
+        created["interests"] = profile.get("interests", [])
         created["is_online"] = False
-        room = assign_room(created["embedding"], ROOMS, threshold=0.6)
-        created["room"] = room
-        USER_EMBEDDINGS.append(created)
+        created["room"] = _assign_room(created)
+        _on_profile_embedded(created, USER_EMBEDDINGS.upsert(created))
+    _relayout_if_drifted()
+    KNOWLEDGE.put_many(
+        (created["id"], chunk_cv_text("\n".join(filter(None, (profile.get("summary"), profile.get("transcript"))))))
+        for profile, created in zip(profiles, embedded)
+    )
 
 
-async def _sync_from_supabase() -> None:
-    """Load existing profiles from Supabase on startup."""
-    if not supabase:
+def _share(profiles) -> None:
+    """
+    Mirror rows into the cross-worker segment, if GIDI_SHARED_STORE is set.
+    Online flags of rows already there are left alone: the segment's flag is
+    the current one, since any worker may have flipped it since.
+    """
+    if SHARED is None:
         return
     try:
-        result = supabase.table("profiles").select("*").execute()
-        for profile in result.data:
-            # Check if already loaded
-            if any(u.get("id") == profile["id"] for u in USER_EMBEDDINGS):
-                continue
-            # Re-embed the profile
-            created = embed_user(
-                UserProfile(
-                    name=profile["username"],
-                    cv_text=profile.get("bio", ""),
-                    interests=profile.get("interests", []),
-                )
-            )
-            coords = map_to_3d_space(np.array(created["embedding"], dtype=np.float32)).tolist()
-            created["coords"] = coords
-            created["id"] = profile["id"]
-            created["avatar_model"] = profile.get("selected_avatar_model", "/avatars/raiden.vrm")
-            created["bio"] = profile.get("bio", "")
-            created["is_online"] = False
-            room = assign_room(created["embedding"], ROOMS, threshold=0.6)
-            created["room"] = room
-            USER_EMBEDDINGS.append(created)
-    except Exception as e:
-        print(f"Warning: Could not sync from Supabase: {e}")
+        SHARED.upsert_many(profiles, keep_online=True)
+    except (SharedStoreFull, ValueError) as e:
+        print(f"Warning: Could not share profiles with other workers: {e}")
+
+
+def _lookup(profile_id: str) -> Optional[Dict[str, object]]:
+    """This worker's record of a profile, else its shared row (created on another worker)."""
+    profile = USER_EMBEDDINGS.get(profile_id)
+    if profile is None and SHARED is not None:
+        profile = SHARED.get(profile_id)
+    return profile
+
+
+def _store_tag() -> Tuple[object, int, str]:
+    """
+    Source of the profile read endpoints, its version and ETag. With
+    GIDI_SHARED_STORE that is the segment, so every worker answers alike.
+    """
+    if SHARED is not None:
+        version = SHARED.version
+        return SHARED, version, etag(version, f"{SHARED.owner:x}" if SHARED.owner is not None else None)
+    version = USER_EMBEDDINGS.version
+    return USER_EMBEDDINGS, version, etag(version)
+
+
+def _on_profile_embedded(profile: Dict[str, object], previous: Optional[Dict[str, object]]) -> None:
+    """Spawn a freshly embedded profile's avatar and push joined/left/moved and new-neighbor deltas."""
+    LAYOUT.update(previous.get("embedding") if previous else None, profile["embedding"])
+    _share([profile])
+    SPACE.upsert(profile["id"], to_world(profile["coords"]))
+    old_room = previous.get("room") if previous and previous.get("is_online") else None
+    new_room = profile.get("room") if profile.get("is_online") else None
+    PRESENCE.place(profile["id"], old_room, new_room)
+    if PRESENCE.wants_neighbors():
+        # The GiDis this profile lands closest to get told about it
+        for match, distance in USER_EMBEDDINGS.nearest(profile, k=NEIGHBOR_EVENTS_K + 1):
+            if match["id"] != profile["id"]:
+                PRESENCE.neighbor(match["id"], profile["id"], distance)
+
+
+async def _apply_remote_profiles(rows: List[Dict[str, object]]) -> None:
+    """
+    Apply a page of ``profiles`` rows from Supabase. Rows whose bio and
+    interests match the local copy only patch name/avatar in place; the
+    rest are re-embedded in one batch in a worker thread, and only the
+    store, room and knowledge updates run on the event loop.
+    """
+    changed = []
+    for profile in rows:
+        existing = USER_EMBEDDINGS.get(profile["id"])
+        if (
+            existing is not None
+            and (existing.get("bio") or "") == (profile.get("bio") or "")
+            and existing.get("interests", []) == (profile.get("interests") or [])
+        ):
+            name = profile.get("username", existing["name"])
+            avatar_model = profile.get("selected_avatar_model") or existing.get("avatar_model")
+            if name != existing["name"] or avatar_model != existing.get("avatar_model"):
+                USER_EMBEDDINGS.upsert({**existing.to_dict(), "name": name, "avatar_model": avatar_model})
+                _share([USER_EMBEDDINGS.get(profile["id"])])
+            continue
+        changed.append(profile)
+    if not changed:
+        return
+
+    embedded, chunks = await asyncio.to_thread(_prepare_remote_profiles, changed)
+    for profile, created in zip(changed, embedded):
+        existing = USER_EMBEDDINGS.get(profile["id"])
+        created["id"] = profile["id"]
+        created["avatar_model"] = profile.get("selected_avatar_model", "/avatars/raiden.vrm")
+        created["bio"] = profile.get("bio", "")
+        created["interests"] = profile.get("interests") or []
+        created["is_online"] = bool(existing and existing.get("is_online"))
+        created["room"] = _assign_room(created)
+        _reproject_if_stale(created)
+        _on_profile_embedded(created, USER_EMBEDDINGS.upsert(created))
+    _relayout_if_drifted()
+    KNOWLEDGE.put_many(chunks)
+
+
+def _prepare_remote_profiles(
+    rows: List[Dict[str, object]],
+) -> Tuple[List[Dict[str, object]], List[Tuple[str, List[str]]]]:
+    """Embed, place and chunk changed Supabase rows; runs in a worker thread."""
+    embedded = _embed_with_coords([
+        UserProfile(
+            name=profile["username"],
+            cv_text=profile.get("bio", ""),
+            interests=profile.get("interests", []),
+        )
+        for profile in rows
+    ])
+    chunks = [(profile["id"], chunk_cv_text(profile.get("bio") or "")) for profile in rows]
+    return embedded, chunks
+
+
+def _relayout_if_drifted() -> None:
+    """
+    Refit the layout once it has drifted and re-project every profile in one
+    call. Offline avatars respawn at their new coords; online ones stay
+    where their clients put them.
+    """
+    if not LAYOUT.needs_refit() or not LAYOUT.refit():
+        return
+    with stage("relayout"):
+        keys = USER_EMBEDDINGS.index.keys
+        coords = LAYOUT.project(USER_EMBEDDINGS.index.matrix)
+        for key, xyz in zip(keys, coords.tolist()):
+            profile = USER_EMBEDDINGS.get(key)
+            profile["coords"] = xyz
+            if not profile.get("is_online"):
+                SPACE.upsert(key, to_world(xyz))
+    USER_EMBEDDINGS.touch()
+    _share(USER_EMBEDDINGS)
+
 
+def _knowledge_texts(profile: "ProfileRequest") -> List[str]:
+    """Chunk the CV file, else the pasted CV text, else the bio; runs in a worker thread."""
+    if profile.cv_path:
+        try:
+            return chunk_cv(profile.cv_path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Warning: Could not chunk CV {profile.cv_path}: {e}")
+    return chunk_cv_text(profile.cv_text or profile.bio or "")
+
+
+def _delete_chunks(ids: List[str]) -> None:
+    with supabase_call("delete", "knowledge_chunks"):
+        supabase.table("knowledge_chunks").delete().in_("id", ids).execute()
 
-async def _save_to_supabase(profile_data: Dict) -> None:
-    """Persist profile to Supabase."""
+
+async def _index_knowledge(profile_id: str, texts: List[str]) -> None:
+    """Replace a profile's knowledge chunks and queue them for knowledge_chunks."""
+    with stage("knowledge_index"):
+        previous = KNOWLEDGE.put(profile_id, texts)
     if not supabase:
         return
-    try:
-        supabase.table("profiles").upsert({
-            "id": profile_data["id"],
-            "username": profile_data["name"],
-            "selected_avatar_model": profile_data.get("avatar_model", "/avatars/raiden.vrm"),
-            "ai_personality_prompt": profile_data.get("ai_personality_prompt"),
-            "bio": profile_data.get("bio"),
-            "interests": profile_data.get("interests", []),
-        }).execute()
-
-        # Also save avatar state with 3D coords
-        supabase.table("avatar_states").upsert({
-            "profile_id": profile_data["id"],
-            "position": {
-                "x": profile_data["coords"][0] * 20,  # Scale for 3D space
-                "y": 0,
-                "z": profile_data["coords"][2] * 20 if len(profile_data["coords"]) > 2 else 0,
-            },
-            "is_online": profile_data.get("is_online", False),
-        }).execute()
-    except Exception as e:
-        print(f"Warning: Could not save to Supabase: {e}")
+    for row in KNOWLEDGE.sync_rows(profile_id):
+        WRITE_QUEUE.put("knowledge_chunks", row)
+    if previous > len(texts):
+        stale = [chunk_id(profile_id, i) for i in range(len(texts), previous)]
+        try:
+            await asyncio.to_thread(_delete_chunks, stale)
+        except Exception as e:
+            print(f"Warning: Could not delete stale knowledge chunks: {e}")
+
+
+def _load_room_messages(room_id: str, limit: int) -> List[Dict[str, object]]:
+    """The latest ``limit`` room_messages rows of a room, oldest first; runs in a worker thread."""
+    with supabase_call("select", "room_messages"):
+        response = (
+            supabase.table("room_messages")
+            .select("id,room_id,profile_id,username,content,created_at")
+            .eq("room_id", room_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+    return list(reversed(response.data or []))
+
+
+def _in_supabase(profile_id: str) -> bool:
+    """Whether ``profile_id`` can have a profiles row; demo profiles are never written there."""
+    return not profile_id.startswith(DEMO_PREFIX)
+
+
+def _persist_message(row: Dict[str, object]) -> None:
+    """Queue a chat row; a demo sender is kept by username only (profile_id must reference profiles)."""
+    if row.get("profile_id") and not _in_supabase(row["profile_id"]):
+        row = {**row, "profile_id": None}
+    WRITE_QUEUE.put("room_messages", row)
+
+
+def _save_to_supabase(profile_data: Dict) -> None:
+    """Queue the profile and its avatar state for the next bulk write to Supabase."""
+    if not supabase:
+        return
+    WRITE_QUEUE.put("profiles", {
+        "id": profile_data["id"],
+        "username": profile_data["name"],
+        "selected_avatar_model": profile_data.get("avatar_model", "/avatars/raiden.vrm"),
+        "ai_personality_prompt": profile_data.get("ai_personality_prompt"),
+        "bio": profile_data.get("bio"),
+        "interests": profile_data.get("interests", []),
+    })
+
+    # Also save avatar state with 3D coords
+    x, y, z = to_world(profile_data["coords"]).tolist()
+    WRITE_QUEUE.put("avatar_states", {
+        "profile_id": profile_data["id"],
+        "position": {"x": x, "y": y, "z": z},
+        "is_online": profile_data.get("is_online", False),
+    }, on_conflict="profile_id")
 
 
 @app.get("/health")
@@ -188,125 +691,417 @@ def health() -> Dict[str, str]:
     return {"status": "ok", "supabase": "connected" if supabase else "not configured"}
 
 
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Dict[str, object]]:
+    """Hit rates of the embedding and token hash caches, and embedding executor batching."""
+    return {
+        "embedding": EMBED_CACHE.stats(),
+        "token": text_encoder.TOKEN_CACHE.stats(),
+        "executor": EMBED_EXECUTOR.stats(),
+        "responses": RENDER_CACHE.stats(),
+    }
+
+
+@app.get("/sync/stats")
+def sync_stats() -> Dict[str, object]:
+    """Progress of the Supabase sync: pull rows/sec, lag and watermark, plus write queue depth."""
+    return {
+        "enabled": supabase is not None,
+        **SYNC_ENGINE.stats.to_dict(),
+        "write_queue": WRITE_QUEUE.stats(),
+    }
+
+
 @app.post("/profiles")
 async def create_profile(profile: ProfileRequest) -> Dict[str, object]:
     """Create a new GiDi profile with embedding and 3D coordinates."""
     import uuid
 
-    created = embed_user(
-        UserProfile(
-            name=profile.name,
-            cv_path=profile.cv_path,
-            cv_text=profile.cv_text or profile.bio,
-            transcript=profile.transcript,
-            interests=profile.interests,
+    # Embedding and coords run in the executor, batched with concurrent sign-ups
+    try:
+        created = await EMBED_EXECUTOR.embed(
+            UserProfile(
+                name=profile.name,
+                cv_path=profile.cv_path,
+                cv_text=profile.cv_text or profile.bio,
+                transcript=profile.transcript,
+                interests=profile.interests,
+            )
         )
-    )
-    coords = map_to_3d_space(np.array(created["embedding"], dtype=np.float32)).tolist()
-    created["coords"] = coords
+    except EmbeddingBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     created["id"] = profile.id or str(uuid.uuid4())
     created["avatar_model"] = profile.avatar_model or "/avatars/raiden.vrm"
     created["bio"] = profile.bio
+    created["interests"] = profile.interests
     created["ai_personality_prompt"] = profile.ai_personality_prompt
     created["is_online"] = True
 
-    room = assign_room(created["embedding"], ROOMS, threshold=0.6)
-    created["room"] = room
+    created["room"] = _assign_room(created)
+    _reproject_if_stale(created)
 
-    # Remove existing profile with same ID if exists
-    global USER_EMBEDDINGS
-    USER_EMBEDDINGS = [u for u in USER_EMBEDDINGS if u.get("id") != created["id"]]
-    USER_EMBEDDINGS.append(created)
+    # Replaces any existing profile with the same ID in place
+    _on_profile_embedded(created, USER_EMBEDDINGS.upsert(created))
+    if SHARED is not None:
+        SHARED.set_online(created["id"], True)  # a re-created profile is back online too
+    _relayout_if_drifted()
+    created["coords"] = USER_EMBEDDINGS.get(created["id"])["coords"]
 
-    # Persist to Supabase
-    await _save_to_supabase(created)
+    # Persist to Supabase in the background
+    _save_to_supabase(created)
+    await _index_knowledge(created["id"], await asyncio.to_thread(_knowledge_texts, profile))
 
     return created
 
 
-@app.get("/profiles")
-def list_profiles() -> Dict[str, List[Dict]]:
-    """List all GiDi profiles with their 3D coordinates."""
-    return {
-        "profiles": [
-            {
-                "id": user.get("id"),
-                "name": user["name"],
-                "coords": user.get("coords", [0, 0, 0]),
-                "room": user.get("room"),
-                "avatar_model": user.get("avatar_model", "/avatars/raiden.vrm"),
-                "bio": user.get("bio"),
-                "interests": user.get("interests", []),
-                "is_online": user.get("is_online", False),
-            }
-            for user in USER_EMBEDDINGS
-        ]
-    }
+def _fields_or_400(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/profiles", response_class=FastJSONResponse)
+def list_profiles(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    room: Optional[str] = None,
+    online: Optional[bool] = None,
+) -> Response:
+    """
+    List GiDi profiles with their 3D coordinates.
+
+    Without ``limit`` every matching profile is returned. With it, at most
+    ``limit`` (capped at GIDI_MAX_PAGE_SIZE) are, plus a ``next_cursor`` to
+    pass back as ``cursor`` for the next page. ``fields`` is a comma-separated
+    projection; ``room`` and ``online`` filter rows. With GIDI_SHARED_STORE
+    the rows are every worker's, as kept in the segment (bios cut to
+    BIO_BYTES).
+    """
+    source, version, tag = _store_tag()
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    body = RENDER_CACHE.get(version, request.url.query)
+    if body is None:
+        names = _fields_or_400(fields) or tuple(PROFILE_LIST_FIELDS)
+        try:
+            start = int(cursor) if cursor else 0
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if limit is not None:
+            limit = min(limit, MAX_PAGE_SIZE)
 
+        def where(user) -> bool:
+            if room is not None and user.get("room") != room:
+                return False
+            return online is None or bool(user.get("is_online", False)) == online
 
-@app.get("/profiles/{profile_id}")
-def get_profile(profile_id: str) -> Dict[str, object]:
-    """Get a specific GiDi profile by ID."""
-    target = next((item for item in USER_EMBEDDINGS if item.get("id") == profile_id), None)
+        if source is SHARED:
+            rows, next_slot = SHARED.page(start, limit, room=room, online=online)
+        else:
+            rows, next_slot = USER_EMBEDDINGS.page(
+                start, limit, where if room is not None or online is not None else None
+            )
+        payload: Dict[str, object] = {"profiles": [project(user, names) for user in rows]}
+        if limit is not None:
+            payload["next_cursor"] = None if next_slot is None else str(next_slot)
+        body = dumps(payload)
+        RENDER_CACHE.put(version, request.url.query, body)
+    return FastJSONResponse(body, headers={"ETag": tag})
+
+
+@app.get("/profiles/{profile_id}", response_class=FastJSONResponse)
+def get_profile(request: Request, profile_id: str, fields: Optional[str] = None) -> Response:
+    """
+    Get a specific GiDi profile by ID; embedding vectors only when named in
+    ``fields``. With GIDI_SHARED_STORE the default fields are the shared
+    row's; others come from this worker's copy, if it has one.
+    """
+    source, _, tag = _store_tag()
+    cached = not_modified(request, tag)
+    if cached is not None:
+        return cached
+    target = USER_EMBEDDINGS.get(profile_id)
+    names = _fields_or_400(fields)
+    if source is SHARED:
+        shared = SHARED.get(profile_id)
+        if shared is None:
+            raise HTTPException(status_code=404, detail="GiDi not found")
+        extra = [name for name in names or () if name not in shared]
+        if extra and target:
+            shared = {**target.to_dict(), **shared}
+        return FastJSONResponse(project(shared, names or tuple(shared), {}), headers={"ETag": tag})
     if not target:
         raise HTTPException(status_code=404, detail="GiDi not found")
-    return target
+    # One decode of the compressed fields instead of one per key
+    profile = target.to_dict()
+    if names is None:
+        names = tuple(key for key in profile if key not in VECTOR_FIELDS)
+    return FastJSONResponse(project(profile, names, {}), headers={"ETag": tag})
+
+
+class RespondRequest(BaseModel):
+    prompt: str
+
+
+@app.get("/profiles/{profile_id}/knowledge")
+def search_knowledge(profile_id: str, q: str, k: int = Query(5, ge=1, le=50)) -> Dict[str, object]:
+    """The ``k`` CV chunks of one GiDi closest to the question ``q``."""
+    if USER_EMBEDDINGS.get(profile_id) is None:
+        raise HTTPException(status_code=404, detail="GiDi not found")
+    with stage("knowledge_search"):
+        hits = KNOWLEDGE.search(q, k=k, profile_id=profile_id)
+    return {"chunks": [{"chunk": hit.chunk, "text": hit.text, "score": hit.score} for hit in hits]}
+
+
+@app.post("/profiles/{profile_id}/respond")
+def respond(profile_id: str, request: RespondRequest) -> Dict[str, object]:
+    """Let a GiDi's avatar answer ``prompt`` from its own knowledge chunks."""
+    target = USER_EMBEDDINGS.get(profile_id)
+    if target is None:
+        raise HTTPException(status_code=404, detail="GiDi not found")
+    avatar = Avatar(
+        user_name=target["name"],
+        voice_id=target.get("voice_id") or "default",
+        personality={},
+        knowledge_base={},
+        profile_id=profile_id,
+    )
+    return AVATARS.respond(avatar, request.prompt)
+
+
+def _nearest(profile_id: Optional[str], k: int) -> List[Dict[str, object]]:
+    """
+    Run k-NN for the profile ``profile_id`` and attach ids/coords of each
+    match. With GIDI_SHARED_STORE the search covers every worker's profiles.
+    """
+    if SHARED is not None:
+        matches = SHARED.nearest_to(profile_id, k) if profile_id is not None else None
+    else:
+        target = USER_EMBEDDINGS.get(profile_id) if profile_id is not None else None
+        matches = USER_EMBEDDINGS.nearest(target, k=k) if target else None
+    if matches is None:
+        raise HTTPException(status_code=404, detail="GiDi not found")
+    return [
+        {
+            "name": match["name"],
+            "distance": distance,
+            "id": match.get("id"),
+            "coords": match.get("coords"),
+        }
+        for match, distance in matches
+    ]
 
 
 @app.get("/neighbors/{name}")
 def neighbors(name: str, k: int = 5) -> Dict[str, List[NeighborResponse]]:
     """Find nearest GiDis by name."""
-    target = next((item for item in USER_EMBEDDINGS if item["name"] == name), None)
-    if not target:
-        raise HTTPException(status_code=404, detail="GiDi not found")
-    results = find_knn(np.array(target["embedding"], dtype=np.float32), USER_EMBEDDINGS, k=k)
-    # Enrich with coords
-    for r in results:
-        match = next((u for u in USER_EMBEDDINGS if u["name"] == r["name"]), None)
-        if match:
-            r["id"] = match.get("id")
-            r["coords"] = match.get("coords")
-    return {"neighbors": results}
+    target = (SHARED if SHARED is not None else USER_EMBEDDINGS).get_by_name(name)
+    return {"neighbors": _nearest(target["id"] if target else None, k)}
 
 
 @app.get("/neighbors/id/{profile_id}")
 def neighbors_by_id(profile_id: str, k: int = 5) -> Dict[str, List[NeighborResponse]]:
     """Find nearest GiDis by profile ID."""
-    target = next((item for item in USER_EMBEDDINGS if item.get("id") == profile_id), None)
-    if not target:
-        raise HTTPException(status_code=404, detail="GiDi not found")
-    results = find_knn(np.array(target["embedding"], dtype=np.float32), USER_EMBEDDINGS, k=k)
-    for r in results:
-        match = next((u for u in USER_EMBEDDINGS if u["name"] == r["name"]), None)
-        if match:
-            r["id"] = match.get("id")
-            r["coords"] = match.get("coords")
-    return {"neighbors": results}
+    return {"neighbors": _nearest(profile_id, k)}
 
 
 @app.put("/profiles/{profile_id}/online")
-async def set_online_status(profile_id: str, is_online: bool = True) -> Dict[str, str]:
-    """Update a GiDi's online status."""
-    target = next((item for item in USER_EMBEDDINGS if item.get("id") == profile_id), None)
-    if not target:
+async def set_online_status(profile_id: str, is_online: bool = True) -> Dict[str, object]:
+    """Update a GiDi's online status, wherever the GiDi was created."""
+    target = USER_EMBEDDINGS.get(profile_id)
+    # The segment's flag is the current one; this worker's copy may be stale
+    current = (SHARED.get(profile_id) if SHARED is not None else None) or target
+    if not current:
         raise HTTPException(status_code=404, detail="GiDi not found")
-    target["is_online"] = is_online
+    was_online = bool(current.get("is_online"))
+    if target:
+        target["is_online"] = is_online
+        USER_EMBEDDINGS.touch()
+    if SHARED is not None:
+        SHARED.set_online(profile_id, is_online)
+    room = current.get("room")
+    PRESENCE.place(profile_id, room if was_online else None, room if is_online else None)
 
-    if supabase:
-        try:
-            supabase.table("avatar_states").update({
-                "is_online": is_online
-            }).eq("profile_id", profile_id).execute()
-        except Exception as e:
-            print(f"Warning: Could not update online status: {e}")
+    if supabase and _in_supabase(profile_id):
+        WRITE_QUEUE.put("avatar_states", {"profile_id": profile_id, "is_online": is_online}, on_conflict="profile_id")
 
     return {"status": "ok", "is_online": is_online}
 
 
+@app.put("/profiles/{profile_id}/position")
+async def set_position(profile_id: str, position: PositionRequest) -> Dict[str, object]:
+    """Move a GiDi's avatar in the lounge (world units)."""
+    if _lookup(profile_id) is None:
+        raise HTTPException(status_code=404, detail="GiDi not found")
+    SPACE.upsert(profile_id, (position.x, position.y, position.z))
+    if supabase and _in_supabase(profile_id):
+        # Continuous movement coalesces into one row per avatar per flush
+        WRITE_QUEUE.put("avatar_states", {"profile_id": profile_id, "position": position.model_dump()}, on_conflict="profile_id")
+    return {"status": "ok", "position": position.model_dump()}
+
+
+def _space_center(profile_id: Optional[str], x: Optional[float], y: float, z: Optional[float]) -> np.ndarray:
+    """Query point: the avatar of ``profile_id``, or ``(x, y, z)``."""
+    if profile_id is not None:
+        position = SPACE.position(profile_id)
+        if position is None:
+            raise HTTPException(status_code=404, detail="GiDi not found")
+        return np.array(position)
+    if x is None or z is None:
+        raise HTTPException(status_code=400, detail="Pass profile_id or x and z")
+    return np.array([x, y, z])
+
+
+def _space_payload(hits: List[Tuple[str, float]]) -> Dict[str, List[Dict[str, object]]]:
+    return {"avatars": [{"id": key, "distance": distance, "position": SPACE.position(key)} for key, distance in hits]}
+
+
+@app.get("/space/within")
+def space_within(
+    radius: float = Query(..., gt=0, allow_inf_nan=False),
+    profile_id: Optional[str] = None,
+    x: Optional[float] = Query(None, allow_inf_nan=False),
+    y: float = Query(0.0, allow_inf_nan=False),
+    z: Optional[float] = Query(None, allow_inf_nan=False),
+    limit: int = Query(50, ge=1, le=1000),
+) -> Dict[str, List[Dict[str, object]]]:
+    """Avatars within ``radius`` world units of a GiDi or a point, closest first."""
+    center = _space_center(profile_id, x, y, z)
+    return _space_payload(SPACE.within(center, radius, limit=limit, exclude=profile_id))
+
+
+@app.get("/space/closest")
+def space_closest(
+    profile_id: Optional[str] = None,
+    x: Optional[float] = Query(None, allow_inf_nan=False),
+    y: float = Query(0.0, allow_inf_nan=False),
+    z: Optional[float] = Query(None, allow_inf_nan=False),
+    k: int = Query(5, ge=1, le=1000),
+) -> Dict[str, List[Dict[str, object]]]:
+    """The ``k`` avatars closest to a GiDi or a point in world space."""
+    center = _space_center(profile_id, x, y, z)
+    return _space_payload(SPACE.nearest(center, k=k, exclude=profile_id))
+
+
+@app.websocket("/ws/presence")
+async def presence_socket(websocket: WebSocket, rooms: Optional[str] = None, profile_id: Optional[str] = None) -> None:
+    """
+    Stream presence deltas (joined, left, moved room, new neighbor).
+
+    ``rooms`` is a comma-separated list of rooms to follow; with only
+    ``profile_id`` the socket follows that GiDi's room as it moves.
+    ``profile_id`` also subscribes to its new-neighbor events. Send
+    ``{"subscribe": [...], "unsubscribe": [...]}`` to change rooms. Initial
+    state comes from ``GET /profiles?room=...&online=true``.
+    """
+    await websocket.accept()
+    target = _lookup(profile_id) if profile_id else None
+    room_names = [room for room in (rooms or "").split(",") if room]
+    if not room_names and target is None:
+        await websocket.close(code=1008, reason="rooms or a known profile_id is required")
+        return
+    subscriber = PRESENCE.subscribe(
+        websocket.send_text, room_names, profile_id, target.get("room") if target is not None else None
+    )
+    pump = asyncio.create_task(subscriber.pump())
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict):
+                PRESENCE.update(
+                    subscriber,
+                    subscribe=[room for room in message.get("subscribe") or () if isinstance(room, str)],
+                    unsubscribe=[room for room in message.get("unsubscribe") or () if isinstance(room, str)],
+                )
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        PRESENCE.unsubscribe(subscriber)
+        pump.cancel()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Prometheus text: p50/p95/p99 per pipeline stage, route and Supabase
+    call, error counters, and the cache/queue/presence stats as gauges.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/presence/stats")
+def presence_stats() -> Dict[str, object]:
+    """WebSocket subscribers, events published/coalesced, frames sent and slow-consumer overflows."""
+    return PRESENCE.stats()
+
+
 @app.get("/rooms")
-def rooms() -> Dict[str, List[List[float]]]:
-    """Get all rooms and their member coordinates."""
-    return ROOMS
+def rooms() -> Dict[str, Dict[str, object]]:
+    """Get all rooms with their centroid and member ids."""
+    return ROOMS.to_payload()
+
+
+@app.post("/rooms/rebalance", status_code=202)
+async def rebalance_rooms() -> Dict[str, object]:
+    """Re-cluster all GiDis into capacity-limited rooms in the background."""
+    started = _start_rebalance()
+    return {"status": "started" if started else "already running"}
+
+
+@app.get("/rooms/rebalance")
+def rebalance_status() -> Dict[str, object]:
+    """Whether a rebalance is running, the report of the last completed one and the last failure."""
+    report = REBALANCER.last_report
+    return {
+        "running": _ROOMS_DIRTY is not None,
+        "last": report.to_dict() if report else None,
+        "error": REBALANCER.last_error,
+    }
+
+
+class ChatMessageRequest(BaseModel):
+    profile_id: str
+    content: str
+
+
+@app.post("/rooms/{room_id}/messages", status_code=201)
+async def post_room_message(room_id: str, request: ChatMessageRequest) -> Dict[str, object]:
+    """Post to a room's chat as ``profile_id``; the room's /ws/presence subscribers get it too."""
+    if room_id not in ROOMS:
+        raise HTTPException(status_code=404, detail="Room not found")
+    sender = _lookup(request.profile_id)
+    if sender is None:
+        raise HTTPException(status_code=404, detail="GiDi not found")
+    try:
+        message = await CHAT.post(room_id, request.profile_id, sender["name"], request.content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    PRESENCE.chat(room_id, message)
+    return message
+
+
+@app.get("/rooms/{room_id}/messages", response_class=FastJSONResponse)
+async def room_messages(
+    room_id: str,
+    before: Optional[int] = Query(None, ge=0),
+    after: Optional[int] = Query(None, ge=-1),
+    limit: int = Query(50, ge=1, le=1000),
+) -> Response:
+    """
+    A page of a room's recent chat, oldest first, served from memory.
+
+    Without cursors this is the latest ``limit`` messages; pass
+    ``next_cursor`` back as ``before`` for older ones. Pollers pass the
+    ``seq`` of the newest message they have as ``after`` and get what came
+    since, with ``next_cursor`` as the next ``after``.
+    """
+    if room_id not in ROOMS:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return FastJSONResponse(await CHAT.history(room_id, before, after, limit))
 
 
 @app.post("/extract-pdf")
@@ -315,26 +1110,29 @@ async def extract_pdf(file: UploadFile = File(...)) -> Dict[str, object]:
     if not file.filename or not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
 
+    # Copy the upload to disk in chunks so the worker process can open it by path;
+    # BodySizeLimit already capped its size while it was received
+    fd, path = tempfile.mkstemp(suffix=".pdf")
     try:
-        import PyPDF2
-        import io
-
-        contents = await file.read()
-        pdf_file = io.BytesIO(contents)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() or ""
-
-        # Clean up the text
-        text = " ".join(text.split())
-
-        return {
-            "text": text[:10000],  # Limit to 10k chars
-            "filename": file.filename,
-            "page_count": len(pdf_reader.pages),
-            "char_count": len(text)
-        }
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(PDF_CHUNK_BYTES):
+                out.write(chunk)
+        result = await PDF_POOL.extract(path)
+    except PdfExtractionBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PdfExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse PDF: {str(e)}")
+    finally:
+        os.unlink(path)
+
+    return {
+        "text": result["text"],  # Limited to 10k chars
+        "filename": file.filename,
+        "page_count": result["page_count"],
+        "char_count": result["char_count"],
+        "truncated": result["truncated"],
+    }
@@ -0,0 +1,231 @@
+"""
+Presence and proximity deltas pushed to WebSocket subscribers.
+
+Subscribers follow rooms and, optionally, their own profile. Events are
+routed only to the subscribers of the room they happen in (or to the one
+profile a ``neighbor`` event is about), and buffered until the next tick:
+within a tick the latest event per profile wins, and each room's batch is
+serialized once however many sockets receive it. Every subscriber has a
+bounded send queue drained by its own task; a consumer that falls
+``max_queue`` frames behind loses its backlog and gets a single ``resync``
+frame instead, telling it to re-read ``/profiles``.
+
+Chat messages ride in the same room batches but are never coalesced.
+
+Frames are JSON objects: ``{"t": "batch", "room": ..., "events": [...]}``
+with events ``joined``/``left`` (``id``, ``room``), ``moved`` (``id``,
+``from``, ``to``), ``neighbor`` (``id``, ``neighbor``, ``distance``) and
+``message`` (the chat message, see room_chat.py), or ``{"t": "resync"}``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from backend.api.serialization import dumps
+
+RESYNC = '{"t":"resync"}'
+
+
+class Subscriber:
+    def __init__(self, send: Callable[[str], Awaitable[None]], profile_id: Optional[str], max_queue: int) -> None:
+        self.send = send
+        self.profile_id = profile_id
+        self.rooms: Set[str] = set()
+        # Rooms were derived from the profile's seat and follow it when it moves
+        self.follows_profile = False
+        self.max_queue = max_queue
+        self._queue: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.overflows = 0
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    def offer(self, frame: str) -> bool:
+        """Queue ``frame`` without waiting; returns False if the backlog was dropped."""
+        if len(self._queue) >= self.max_queue:
+            self._queue.clear()
+            self._queue.append(RESYNC)
+            self.overflows += 1
+            self._ready.set()
+            return False
+        self._queue.append(frame)
+        self._ready.set()
+        return True
+
+    async def pump(self) -> None:
+        """Send queued frames until the socket fails or the task is cancelled."""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._queue:
+                await self.send(self._queue.popleft())
+                self.sent += 1
+
+
+class PresenceHub:
+    def __init__(self, tick: float = 0.05, max_queue: int = 256) -> None:
+        self.tick = tick
+        self.max_queue = max_queue
+        self._by_room: Dict[str, Set[Subscriber]] = {}
+        self._by_profile: Dict[str, Set[Subscriber]] = {}
+        # room -> profile id -> latest event this tick
+        self._pending: Dict[str, Dict[str, Dict[str, object]]] = {}
+        # profile id -> neighbor id -> latest neighbor event this tick
+        self._pending_personal: Dict[str, Dict[str, Dict[str, object]]] = {}
+        # room -> chat messages this tick, in order
+        self._pending_chat: Dict[str, List[Dict[str, object]]] = {}
+        self.published = 0
+        self.coalesced = 0
+        self.frames = 0
+        self.overflows = 0
+
+    # -- subscriptions -------------------------------------------------
+
+    def subscribe(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        rooms: Iterable[str] = (),
+        profile_id: Optional[str] = None,
+        profile_room: Optional[str] = None,
+    ) -> Subscriber:
+        """
+        Register a socket. With no ``rooms``, a subscriber for ``profile_id``
+        follows ``profile_room`` (the profile's seat) as the profile moves.
+        """
+        subscriber = Subscriber(send, profile_id, self.max_queue)
+        rooms = list(rooms)
+        if not rooms and profile_room is not None:
+            rooms = [profile_room]
+            subscriber.follows_profile = True
+        self.update(subscriber, subscribe=rooms)
+        if profile_id is not None:
+            self._by_profile.setdefault(profile_id, set()).add(subscriber)
+        return subscriber
+
+    def update(self, subscriber: Subscriber, subscribe: Iterable[str] = (), unsubscribe: Iterable[str] = ()) -> None:
+        for room in unsubscribe:
+            subscriber.rooms.discard(room)
+            self._discard(self._by_room, room, subscriber)
+        for room in subscribe:
+            subscriber.rooms.add(room)
+            self._by_room.setdefault(room, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.update(subscriber, unsubscribe=list(subscriber.rooms))
+        if subscriber.profile_id is not None:
+            self._discard(self._by_profile, subscriber.profile_id, subscriber)
+        self.overflows += subscriber.overflows
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[Subscriber]], key: str, subscriber: Subscriber) -> None:
+        subs = index.get(key)
+        if subs is not None:
+            subs.discard(subscriber)
+            if not subs:
+                del index[key]
+
+    def wants_neighbors(self) -> bool:
+        """Whether any socket follows a profile, i.e. neighbor events have a reader."""
+        return bool(self._by_profile)
+
+    # -- events --------------------------------------------------------
+
+    def _queue(self, room: str, profile_id: str, event: Dict[str, object]) -> None:
+        if room not in self._by_room:
+            return
+        events = self._pending.setdefault(room, {})
+        if profile_id in events:
+            self.coalesced += 1
+        events[profile_id] = event
+        self.published += 1
+
+    def place(self, profile_id: str, old_room: Optional[str], new_room: Optional[str]) -> None:
+        """
+        Report that a profile's online seat changed from ``old_room`` to
+        ``new_room`` (None = offline). Emits joined, left or moved.
+        """
+        if old_room == new_room:
+            return
+        if old_room is None:
+            self._queue(new_room, profile_id, {"t": "joined", "id": profile_id, "room": new_room})
+        elif new_room is None:
+            self._queue(old_room, profile_id, {"t": "left", "id": profile_id, "room": old_room})
+        else:
+            event = {"t": "moved", "id": profile_id, "from": old_room, "to": new_room}
+            self._queue(old_room, profile_id, event)
+            self._queue(new_room, profile_id, event)
+            for subscriber in self._by_profile.get(profile_id, ()):
+                if subscriber.follows_profile:
+                    self.update(subscriber, subscribe=[new_room], unsubscribe=[old_room])
+
+    def neighbor(self, profile_id: str, neighbor_id: str, distance: float) -> None:
+        """Tell ``profile_id``'s subscribers that ``neighbor_id`` is now close by."""
+        if profile_id not in self._by_profile:
+            return
+        events = self._pending_personal.setdefault(profile_id, {})
+        if neighbor_id in events:
+            self.coalesced += 1
+        events[neighbor_id] = {"t": "neighbor", "id": profile_id, "neighbor": neighbor_id, "distance": round(distance, 4)}
+        self.published += 1
+
+    def chat(self, room: str, message: Dict[str, object]) -> None:
+        """Send a chat message to ``room``'s subscribers with the next batch."""
+        if room not in self._by_room:
+            return
+        self._pending_chat.setdefault(room, []).append({"t": "message", **message})
+        self.published += 1
+
+    # -- delivery ------------------------------------------------------
+
+    def flush(self) -> int:
+        """Fan this tick's events out to subscriber queues. Returns frames queued."""
+        pending, self._pending = self._pending, {}
+        personal, self._pending_personal = self._pending_personal, {}
+        chat, self._pending_chat = self._pending_chat, {}
+        frames = 0
+        for room in list(pending) + [room for room in chat if room not in pending]:
+            subscribers = self._by_room.get(room)
+            if not subscribers:
+                continue
+            events = list(pending[room].values()) if room in pending else []
+            events.extend(chat.get(room, ()))
+            frame = dumps({"t": "batch", "room": room, "events": events}).decode()
+            for subscriber in subscribers:
+                subscriber.offer(frame)
+            frames += len(subscribers)
+        for profile_id, events in personal.items():
+            subscribers = self._by_profile.get(profile_id)
+            if not subscribers:
+                continue
+            frame = dumps({"t": "batch", "room": None, "events": list(events.values())}).decode()
+            for subscriber in subscribers:
+                subscriber.offer(frame)
+            frames += len(subscribers)
+        self.frames += frames
+        return frames
+
+    async def run_forever(self) -> None:
+        """Flush once per tick while there is anything to send, until cancelled."""
+        while True:
+            await asyncio.sleep(self.tick)
+            if self._pending or self._pending_personal or self._pending_chat:
+                self.flush()
+
+    def stats(self) -> Dict[str, object]:
+        subscribers = {s for subs in self._by_room.values() for s in subs}
+        subscribers.update(s for subs in self._by_profile.values() for s in subs)
+        return {
+            "subscribers": len(subscribers),
+            "rooms": len(self._by_room),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "frames": self.frames,
+            "overflows": self.overflows + sum(s.overflows for s in subscribers),
+            "max_backlog": max((s.backlog for s in subscribers), default=0),
+        }
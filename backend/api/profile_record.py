@@ -0,0 +1,286 @@
+"""
+Compact profile rows for :class:`~backend.api.profile_store.ProfileStore`.
+
+A profile used to be a dict of Python float lists and nested dicts, several
+KB per user. A :class:`ProfileRecord` keeps only the fields read on hot
+paths (id, name, room, online flag, bio, ...) as ``__slots__`` attributes. The
+float vectors live in slot-indexed columns shared by the whole store:
+float32 for ``text_embedding``/``voice_embedding``/``coords``, float64 for
+the ``interest_scores`` dict so scores round-trip exactly. ``embedding`` is
+read from the store's k-NN index, which already holds it. Everything else
+(cv, voice traits, prompts, unknown keys) is kept as one zlib-compressed JSON
+blob. A record still behaves like the dict it replaced; values are
+materialized only when a key is read or the record is serialized.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import zlib
+from collections.abc import MutableMapping
+from numbers import Real
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+HOT_FIELDS = ("id", "name", "room", "is_online", "avatar_model", "interests", "bio", "encoder_version")
+VECTOR_FIELDS = ("text_embedding", "voice_embedding", "coords")
+SCORE_FIELDS = ("interest_scores",)
+# Low-cardinality strings shared between records instead of copied per row
+_INTERNED = ("room", "avatar_model", "encoder_version")
+
+# Size of the preset dictionary used to compress cold fields
+ZDICT_BYTES = 16 * 1024
+
+_HOT, _EMBEDDING, _VECTOR, _SCORES, _COLD = range(5)
+
+
+class Layout:
+    """Which keys a record has, in order, and where each one is stored."""
+
+    __slots__ = ("keys", "kinds")
+
+    def __init__(self, pairs: Tuple[Tuple[str, int], ...]) -> None:
+        self.keys = tuple(key for key, _ in pairs)
+        self.kinds = dict(pairs)
+
+
+class ProfileColumns:
+    """Slot-indexed float columns shared by all records of one store."""
+
+    def __init__(self, index: Any) -> None:
+        self.index = index
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._score_keys: Dict[str, Tuple[str, ...]] = {}
+        self._layouts: Dict[Tuple[Tuple[str, int], ...], Layout] = {}
+        self._rows = 0
+        self._samples: List[bytes] = []
+        self._zdict: Optional[bytes] = None
+        self._compressor: Any = None
+
+    def reset(self) -> None:
+        self._arrays.clear()
+        self._score_keys.clear()
+        self._rows = 0
+        self._samples = []
+        self._zdict = self._compressor = None
+
+    def layout(self, pairs: Tuple[Tuple[str, int], ...]) -> Layout:
+        layout = self._layouts.get(pairs)
+        if layout is None:
+            layout = self._layouts[pairs] = Layout(pairs)
+        return layout
+
+    def reserve(self, rows: int) -> None:
+        """Make room for slot numbers below ``rows``."""
+        if rows <= self._rows:
+            return
+        self._rows = max(rows, self._rows * 2, 1024)
+        for key, array in self._arrays.items():
+            grown = np.zeros((self._rows, array.shape[1]), dtype=array.dtype)
+            grown[: array.shape[0]] = array
+            self._arrays[key] = grown
+
+    def kind_of(self, key: str, value: Any) -> int:
+        """Pick the storage for ``value``, creating its column on first use."""
+        if key in HOT_FIELDS:
+            return _HOT
+        if key == "embedding":
+            return _EMBEDDING
+        if key in VECTOR_FIELDS and isinstance(value, (list, tuple, np.ndarray)) and len(value) > 0:
+            array = self._arrays.get(key)
+            if array is None:
+                array = self._arrays[key] = np.zeros((self._rows, len(value)), dtype=np.float32)
+            if array.shape[1] == len(value):
+                return _VECTOR
+        if key in SCORE_FIELDS and isinstance(value, dict) and value:
+            if all(isinstance(v, Real) and not isinstance(v, bool) for v in value.values()):
+                keys = self._score_keys.setdefault(key, tuple(value))
+                if keys == tuple(value):
+                    if key not in self._arrays:
+                        self._arrays[key] = np.zeros((self._rows, len(keys)), dtype=np.float64)
+                    return _SCORES
+        return _COLD
+
+    def write(self, key: str, kind: int, slot: int, value: Any) -> None:
+        if kind == _VECTOR:
+            self._arrays[key][slot] = value
+        elif kind == _SCORES:
+            self._arrays[key][slot] = list(value.values())
+
+    def read(self, key: str, kind: int, slot: int) -> Any:
+        row = self._arrays[key][slot].tolist()
+        if kind == _SCORES:
+            return dict(zip(self._score_keys[key], row))
+        return row
+
+    def encode(self, values: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Compress cold fields. Each blob is only a few hundred bytes, too
+        little for zlib to find much repetition in, so once enough blobs
+        have been seen their tail becomes a preset dictionary shared by all
+        later ones (roughly halving their size). The first byte says which.
+        """
+        if not values:
+            return None
+        raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+        if self._compressor is None:
+            self._samples.append(raw)
+            if sum(map(len, self._samples)) >= ZDICT_BYTES:
+                self._zdict = b"".join(self._samples)[-ZDICT_BYTES:]
+                self._compressor = zlib.compressobj(6, zdict=self._zdict)
+                self._samples = []
+            return b"\x00" + zlib.compress(raw, 6)
+        compressor = self._compressor.copy()
+        return b"\x01" + compressor.compress(raw) + compressor.flush()
+
+    def decode(self, blob: Optional[bytes]) -> Dict[str, Any]:
+        if not blob:
+            return {}
+        if blob[0] == 0:
+            return json.loads(zlib.decompress(blob[1:]))
+        decompressor = zlib.decompressobj(zdict=self._zdict)
+        return json.loads(decompressor.decompress(blob[1:]) + decompressor.flush())
+
+
+def _hot_value(key: str, value: Any) -> Any:
+    if key == "interests" and isinstance(value, list):
+        return tuple(sys.intern(v) if isinstance(v, str) else v for v in value)
+    if key in _INTERNED and isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class ProfileRecord(MutableMapping):
+    __slots__ = (
+        "_columns",
+        "_slot",
+        "_layout",
+        "_cold",
+        "_detached",
+        "id",
+        "name",
+        "room",
+        "is_online",
+        "avatar_model",
+        "interests",
+        "bio",
+        "encoder_version",
+    )
+
+    def __init__(self, columns: ProfileColumns, slot: int, profile: Mapping[str, Any]) -> None:
+        self._columns = columns
+        self._slot = slot
+        self._detached: Optional[Dict[str, Any]] = None
+        pairs = []
+        cold: Dict[str, Any] = {}
+        for key, value in profile.items():
+            kind = columns.kind_of(key, value)
+            pairs.append((key, kind))
+            if kind == _HOT:
+                setattr(self, key, _hot_value(key, value))
+            elif kind == _COLD:
+                cold[key] = value
+            elif kind != _EMBEDDING:
+                columns.write(key, kind, slot, value)
+        self._layout = columns.layout(tuple(pairs))
+        self._cold = columns.encode(cold)
+
+    def _cold_values(self) -> Dict[str, Any]:
+        return self._columns.decode(self._cold)
+
+    def _read(self, key: str, kind: int, cold: Optional[Dict[str, Any]] = None) -> Any:
+        if kind == _HOT:
+            value = getattr(self, key)
+            return list(value) if key == "interests" and isinstance(value, tuple) else value
+        if kind == _EMBEDDING:
+            return self._columns.index.vector(self.id).tolist()
+        if kind == _COLD:
+            return (cold if cold is not None else self._cold_values())[key]
+        return self._columns.read(key, kind, self._slot)
+
+    def __getitem__(self, key: str) -> Any:
+        if self._detached is not None:
+            return self._detached[key]
+        kind = self._layout.kinds.get(key)
+        if kind is None:
+            raise KeyError(key)
+        return self._read(key, kind)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self._detached is not None:
+            self._detached[key] = value
+            return
+        columns = self._columns
+        old_kind = self._layout.kinds.get(key)
+        kind = columns.kind_of(key, value)
+        if kind == _HOT:
+            setattr(self, key, _hot_value(key, value))
+        elif kind == _EMBEDDING:
+            columns.index.upsert(self.id, value)
+        elif kind != _COLD:
+            columns.write(key, kind, self._slot, value)
+        if kind == _COLD or old_kind == _COLD:
+            cold = self._cold_values()
+            if kind == _COLD:
+                cold[key] = value
+            else:
+                cold.pop(key, None)
+            self._cold = columns.encode(cold)
+        if kind != old_kind:
+            pairs = [(k, kind if k == key else self._layout.kinds[k]) for k in self._layout.keys]
+            if old_kind is None:
+                pairs.append((key, kind))
+            self._layout = columns.layout(tuple(pairs))
+
+    def __delitem__(self, key: str) -> None:
+        if self._detached is not None:
+            del self._detached[key]
+            return
+        kind = self._layout.kinds.get(key)
+        if kind is None or kind == _EMBEDDING:
+            raise KeyError(key)
+        if kind == _COLD:
+            cold = self._cold_values()
+            del cold[key]
+            self._cold = self._columns.encode(cold)
+        self._layout = self._columns.layout(tuple((k, self._layout.kinds[k]) for k in self._layout.keys if k != key))
+
+    def __iter__(self) -> Iterator[str]:
+        if self._detached is not None:
+            return iter(self._detached)
+        return iter(self._layout.keys)
+
+    def __len__(self) -> int:
+        if self._detached is not None:
+            return len(self._detached)
+        return len(self._layout.keys)
+
+    def __contains__(self, key: object) -> bool:
+        if self._detached is not None:
+            return key in self._detached
+        return key in self._layout.kinds
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Avoid the KeyError round trip of the Mapping mixin on hot paths
+        if self._detached is not None:
+            return self._detached.get(key, default)
+        kind = self._layout.kinds.get(key)
+        return default if kind is None else self._read(key, kind)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with every value materialized, for JSON responses."""
+        if self._detached is not None:
+            return dict(self._detached)
+        cold = self._cold_values()
+        return {key: self._read(key, kind, cold) for key, kind in self._layout.kinds.items()}
+
+    def detach(self) -> Dict[str, Any]:
+        """Freeze this record's values before its slot is reused; returns them."""
+        if self._detached is None:
+            self._detached = self.to_dict()
+        return dict(self._detached)
+
+    def __repr__(self) -> str:
+        return f"ProfileRecord({self.to_dict()!r})"
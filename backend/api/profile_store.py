@@ -0,0 +1,164 @@
+"""
+In-memory registry of GiDi profiles with O(1) lookups.
+
+Rows live in fixed slots (freed slots are reused), with dict indexes by id
+and by name. Embeddings are mirrored into a k-NN index whose float32 matrix
+is patched in place on every upsert/delete instead of being rebuilt. Each
+row is stored as a compact :class:`~backend.api.profile_record.ProfileRecord`
+that reads the embedding back from that index rather than keeping a copy.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.api.profile_record import ProfileColumns, ProfileRecord
+from backend.spatial.ann_index import make_index
+from backend.spatial.knn_clustering import EmbeddingIndex
+
+Profile = Dict[str, object]
+
+
+class ProfileStore:
+    def __init__(self, index: Optional[EmbeddingIndex] = None) -> None:
+        self.index = index if index is not None else make_index()
+        self._columns = ProfileColumns(self.index)
+        self._slots: List[Optional[ProfileRecord]] = []
+        self._free: List[int] = []
+        self._slot_by_id: Dict[str, int] = {}
+        # name -> id, or ids in insertion order once a name is shared; a
+        # dict per unique name would cost more than the compact row itself
+        self._ids_by_name: Dict[str, Union[str, Dict[str, None]]] = {}
+        # Bumped on every mutation so callers can detect changes cheaply
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def __contains__(self, profile_id: object) -> bool:
+        return profile_id in self._slot_by_id
+
+    def __iter__(self) -> Iterator[ProfileRecord]:
+        return (row for row in self._slots if row is not None)
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        slot = self._slot_by_id.get(profile_id)
+        return None if slot is None else self._slots[slot]
+
+    def get_by_name(self, name: str) -> Optional[ProfileRecord]:
+        ids = self._ids_by_name.get(name)
+        if not ids:
+            return None
+        return self.get(ids if isinstance(ids, str) else next(iter(ids)))
+
+    def upsert(self, profile: Profile) -> Optional[Profile]:
+        """
+        Insert ``profile`` (which must carry an ``id``) or replace the row with
+        the same id in place. Returns the replaced row as a plain dict, if any.
+        """
+        if isinstance(profile, ProfileRecord):
+            profile = profile.to_dict()
+        profile_id = str(profile["id"])
+        slot = self._slot_by_id.get(profile_id)
+        previous = None
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._slots)
+                self._slots.append(None)
+            self._slot_by_id[profile_id] = slot
+        else:
+            previous = self._slots[slot].detach()
+            self._unlink_name(previous["name"], profile_id)
+        self._columns.reserve(slot + 1)
+        self._slots[slot] = ProfileRecord(self._columns, slot, profile)
+        self._link_name(profile["name"], profile_id)
+        self.index.upsert(profile_id, profile["embedding"])
+        self.version += 1
+        return previous
+
+    def load(self, profiles: Sequence[Profile], embeddings: np.ndarray) -> None:
+        """
+        Replace the whole store with ``profiles``, whose unit-length embeddings
+        are the rows of ``embeddings`` (adopted by the index without a copy).
+        """
+        for row in self._slots:
+            if row is not None:
+                row.detach()
+        self._columns.reset()
+        self._columns.reserve(len(profiles))
+        self._slots = [ProfileRecord(self._columns, slot, profile) for slot, profile in enumerate(profiles)]
+        self._free = []
+        self._slot_by_id = {str(profile["id"]): slot for slot, profile in enumerate(self._slots)}
+        self._ids_by_name = {}
+        for profile in self._slots:
+            self._link_name(profile["name"], str(profile["id"]))
+        self.index.adopt([str(profile["id"]) for profile in self._slots], embeddings)
+        self.version += 1
+
+    def remove(self, profile_id: str) -> Optional[Profile]:
+        slot = self._slot_by_id.pop(profile_id, None)
+        if slot is None:
+            return None
+        previous = self._slots[slot].detach()
+        self._slots[slot] = None
+        self._free.append(slot)
+        self._unlink_name(previous["name"], profile_id)
+        self.index.remove(profile_id)
+        self.version += 1
+        return previous
+
+    def _link_name(self, name: str, profile_id: str) -> None:
+        ids = self._ids_by_name.setdefault(name, profile_id)
+        if isinstance(ids, str):
+            if ids != profile_id:
+                self._ids_by_name[name] = {ids: None, profile_id: None}
+        else:
+            ids[profile_id] = None
+
+    def _unlink_name(self, name: str, profile_id: str) -> None:
+        ids = self._ids_by_name.get(name)
+        if isinstance(ids, str):
+            if ids == profile_id:
+                del self._ids_by_name[name]
+        elif ids is not None:
+            ids.pop(profile_id, None)
+            if len(ids) == 1:
+                self._ids_by_name[name] = next(iter(ids))
+            elif not ids:
+                del self._ids_by_name[name]
+
+    def nearest(self, profile: Profile, k: int = 5) -> List[Tuple[ProfileRecord, float]]:
+        """k-NN of ``profile``'s embedding, as ``(row, cosine_distance)`` pairs."""
+        return [
+            (self._slots[self._slot_by_id[profile_id]], distance)
+            for profile_id, distance in self.index.search(profile["embedding"], k=k)
+        ]
+
+    def touch(self) -> None:
+        """Record an in-place change made through a row (e.g. ``row["room"] = ...``)."""
+        self.version += 1
+
+    def page(
+        self, start: int = 0, limit: Optional[int] = None, where: Optional[Callable[[ProfileRecord], bool]] = None
+    ) -> Tuple[List[ProfileRecord], Optional[int]]:
+        """
+        Up to ``limit`` rows matching ``where``, scanning slots from ``start``.
+
+        Returns the rows and the slot to resume from (None once the scan is
+        done). Slot order is stable across pages; rows inserted into freed
+        slots behind the cursor are picked up on the next full scan.
+        """
+        rows: List[ProfileRecord] = []
+        slots = self._slots
+        for slot in range(max(start, 0), len(slots)):
+            row = slots[slot]
+            if row is None or (where is not None and not where(row)):
+                continue
+            if limit is not None and len(rows) >= limit:
+                return rows, slot
+            rows.append(row)
+        return rows, None
@@ -0,0 +1,226 @@
+"""
+Per-room chat history kept in memory and persisted in batches.
+
+Each room keeps its last ``capacity`` messages in a ring buffer indexed by
+a per-room sequence number modulo the capacity, so an append is one list
+store and never shifts or copies older messages. Messages are rendered to
+JSON once, on append, and a history page is the join of those bytes.
+Cursors are sequence numbers, so a page ``before`` or ``after`` a cursor is
+found by arithmetic instead of a scan. Pages stop at the oldest buffered
+message; anything older lives only in ``room_messages``.
+
+New messages go to ``persist`` (main.py queues them on the write-behind
+queue, which upserts them in bulk). With ``load`` set, a room that has no
+buffer yet (e.g. after a restart) is first refilled with its latest
+``room_messages`` rows, once per room, off the event loop. Room ids stay
+with their group across a rebalance (see ``match_room_names``); buffers of
+rooms that no longer exist are dropped with :meth:`ChatHub.retain`.
+
+Buffers and ``seq`` cursors are per process. With several uvicorn workers
+(``GIDI_SHARED_STORE``) each worker only buffers the messages posted to it
+plus what it loaded, and numbers them itself, so a cursor is only good
+against the worker that issued it; ``room_messages`` is the shared record.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Container, Dict, List, Optional, Tuple
+
+from backend.api.serialization import dumps
+
+Message = Dict[str, object]
+
+
+class RoomLog:
+    """Ring buffer of one room's rendered messages."""
+
+    __slots__ = ("capacity", "items", "next_seq")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self.items: List[bytes] = []
+        self.next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def oldest(self) -> int:
+        """Sequence number of the oldest message still buffered."""
+        return max(0, self.next_seq - self.capacity)
+
+    def append(self, rendered: bytes) -> None:
+        # The list grows until it is full, then slot seq % capacity is reused
+        if len(self.items) < self.capacity:
+            self.items.append(rendered)
+        else:
+            self.items[self.next_seq % self.capacity] = rendered
+        self.next_seq += 1
+
+    def before(self, cursor: Optional[int], limit: int) -> Tuple[List[bytes], Optional[int]]:
+        """
+        Up to ``limit`` messages older than ``cursor`` (the newest if None),
+        oldest first, and the cursor of the next older page (None at the end
+        of the buffer).
+        """
+        oldest = self.oldest
+        end = self.next_seq if cursor is None else min(max(cursor, oldest), self.next_seq)
+        start = max(oldest, end - limit)
+        return self._slice(start, end), start if start > oldest else None
+
+    def after(self, cursor: int, limit: int) -> Tuple[List[bytes], int]:
+        """
+        Up to ``limit`` messages newer than ``cursor``, oldest first, and the
+        cursor to poll with next. A cursor from a previous buffer (past the
+        newest message, e.g. from before a restart) starts over at the oldest.
+        """
+        if cursor >= self.next_seq:
+            cursor = -1
+        start = max(cursor + 1, self.oldest)
+        end = min(start + limit, self.next_seq)
+        return self._slice(start, end), max(cursor, end - 1)
+
+    def _slice(self, start: int, end: int) -> List[bytes]:
+        items, capacity = self.items, self.capacity
+        return [items[seq % capacity] for seq in range(start, end)]
+
+
+class ChatHub:
+    def __init__(
+        self,
+        capacity: int = 200,
+        max_length: int = 2000,
+        persist: Optional[Callable[[Message], None]] = None,
+        load: Optional[Callable[[str, int], List[Message]]] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.max_length = max_length
+        self.persist = persist
+        self.load = load
+        self._rooms: Dict[str, RoomLog] = {}
+        self._loading: Dict[str, "asyncio.Future[RoomLog]"] = {}
+        self.posted = 0
+        self.loaded = 0
+        self.load_failures = 0
+        self.bad_rows = 0
+        self.dropped_rooms = 0
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    async def room(self, room_id: str) -> RoomLog:
+        """
+        The buffer of ``room_id``, refilled from ``load`` the first time it is
+        used. A failed load is not remembered: the empty buffer returned then
+        is not kept, and the next request tries ``load`` again.
+        """
+        log = self._rooms.get(room_id)
+        if log is not None:
+            return log
+        if self.load is None:
+            log = self._rooms[room_id] = RoomLog(self.capacity)
+            return log
+        # Concurrent first requests for a room share one load
+        pending = self._loading.get(room_id)
+        if pending is None:
+            pending = self._loading[room_id] = asyncio.ensure_future(self._hydrate(room_id))
+        return await asyncio.shield(pending)
+
+    async def _hydrate(self, room_id: str) -> RoomLog:
+        try:
+            log = RoomLog(self.capacity)
+            try:
+                rows = await asyncio.to_thread(self.load, room_id, self.capacity)
+            except Exception as e:
+                self.load_failures += 1
+                print(f"Warning: Could not load chat history for {room_id}: {e}")
+                return log
+            for row in rows:
+                try:
+                    rendered = dumps(self._message(row, log.next_seq))
+                except Exception as e:
+                    self.bad_rows += 1
+                    print(f"Warning: Skipping malformed chat row in {room_id}: {e!r}")
+                    continue
+                log.append(rendered)
+                self.loaded += 1
+            self._rooms[room_id] = log
+            return log
+        finally:
+            # Also on failure, so the next request for the room shares a new load
+            self._loading.pop(room_id, None)
+
+    @staticmethod
+    def _message(row: Message, seq: int) -> Message:
+        return {
+            "seq": seq,
+            "id": row["id"],
+            "room_id": row["room_id"],
+            "profile_id": row.get("profile_id"),
+            "username": row["username"],
+            "content": row["content"],
+            "created_at": row["created_at"],
+        }
+
+    async def post(self, room_id: str, profile_id: Optional[str], username: str, content: str) -> Message:
+        """Append a message to ``room_id`` and hand its row to ``persist``. Returns the message."""
+        content = content.strip()
+        if not content:
+            raise ValueError("Message is empty")
+        if len(content) > self.max_length:
+            raise ValueError(f"Message is longer than {self.max_length} characters")
+        # After a failed load the buffer starts from this post; older messages stay in room_messages
+        log = self._rooms.setdefault(room_id, await self.room(room_id))
+        row = {
+            "id": str(uuid.uuid4()),
+            "room_id": room_id,
+            "profile_id": profile_id,
+            "username": username,
+            "content": content,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        message = self._message(row, log.next_seq)
+        log.append(dumps(message))
+        self.posted += 1
+        if self.persist is not None:
+            self.persist(row)
+        return message
+
+    async def history(
+        self, room_id: str, before: Optional[int] = None, after: Optional[int] = None, limit: int = 50
+    ) -> bytes:
+        """
+        Rendered ``{"messages": [...], "next_cursor": ...}`` for one page.
+
+        With ``after`` the page holds newer messages and ``next_cursor`` is
+        the ``after`` to poll with next; otherwise it holds older ones and
+        ``next_cursor`` is the next ``before`` (null once the buffer ends).
+        """
+        log = await self.room(room_id)
+        if after is not None:
+            items, cursor = log.after(after, limit)
+        else:
+            items, cursor = log.before(before, limit)
+        return b'{"messages":[' + b",".join(items) + b'],"next_cursor":' + dumps(cursor) + b"}"
+
+    def retain(self, room_ids: Container[str]) -> int:
+        """Drop the buffers of rooms not in ``room_ids`` (e.g. gone after a rebalance). Returns how many."""
+        gone = [room_id for room_id in self._rooms if room_id not in room_ids]
+        for room_id in gone:
+            del self._rooms[room_id]
+        self.dropped_rooms += len(gone)
+        return len(gone)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "rooms": len(self._rooms),
+            "dropped_rooms": self.dropped_rooms,
+            "buffered": sum(len(log) for log in self._rooms.values()),
+            "posted": self.posted,
+            "loaded": self.loaded,
+            "load_failures": self.load_failures,
+            "bad_rows": self.bad_rows,
+        }
@@ -0,0 +1,134 @@
+"""
+Fast JSON rendering and conditional GETs for the profile read endpoints.
+
+The frontend polls ``/profiles``, so an unchanged poll should cost nothing:
+every response carries an ETag built from the store's version counter, and a
+matching ``If-None-Match`` is answered with 304 before any row is touched.
+Bodies are rendered with orjson when it is installed (falling back to the
+stdlib encoder) and kept per store version, so many clients polling the same
+URL after a change share one serialization.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Fields of each row in /profiles when no ``fields=`` is given, with defaults
+PROFILE_LIST_FIELDS: Dict[str, Any] = {
+    "id": None,
+    "name": None,
+    "coords": [0, 0, 0],
+    "room": None,
+    "avatar_model": "/avatars/raiden.vrm",
+    "bio": None,
+    "interests": [],
+    "is_online": False,
+}
+# Left out of /profiles/{id} unless asked for by name
+VECTOR_FIELDS = ("embedding", "text_embedding", "voice_embedding")
+
+# ETags must not survive a restart: the version counter starts over at 0
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; ``bytes`` content is sent as already-rendered JSON."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """``"id,name,coords"`` -> ``("id", "name", "coords")``; None means the default set."""
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise ValueError("fields must name at least one field")
+    return names
+
+
+def project(row: Mapping[str, Any], fields: Sequence[str], defaults: Mapping[str, Any] = PROFILE_LIST_FIELDS) -> Dict[str, Any]:
+    """Only ``fields`` of ``row``; missing ones fall back to ``defaults`` (else None)."""
+    return {name: row.get(name, defaults.get(name)) for name in fields}
+
+
+def etag(version: int, run: Optional[str] = None) -> str:
+    """Weak ETag for ``version`` of this process's store, or of a store shared by the server ``run``."""
+    return f'W/"{run or _BOOT_ID}-{version}"'
+
+
+def not_modified(request: Request, tag: str) -> Optional[Response]:
+    """A 304 response if ``If-None-Match`` already names ``tag``, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # Weak comparison: W/"x" and "x" name the same representation
+    bare = tag[2:]
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == bare:
+            return Response(status_code=304, headers={"ETag": tag})
+    return None
+
+
+class RenderCache:
+    """
+    Rendered bodies for the current store version, keyed by request query.
+
+    The read endpoints are sync handlers running in the threadpool, so the
+    version check and the dict updates happen under one lock: a body
+    rendered for an older version is never stored under a newer one.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        self._version: Optional[int] = None
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: int, key: str) -> Optional[bytes]:
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._bodies.clear()
+            body = self._bodies.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, version: int, key: str, body: bytes) -> None:
+        with self._lock:
+            if version != self._version:
+                return
+            self._bodies[key] = body
+            if len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+    def stats(self) -> Dict[str, object]:
+        return {"entries": len(self._bodies), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,490 @@
+"""
+Profile lookups shared by every uvicorn worker through one shared-memory segment.
+
+Each worker process has its own :class:`~backend.api.profile_store.ProfileStore`,
+so with ``--workers N`` a profile created on one worker is invisible to the
+others. Workers mirror every row they write into a named
+``multiprocessing.shared_memory`` segment and answer cross-worker reads
+(k-NN, the /profiles listing, lookup by id or name) from it. Layout, fixed
+at creation:
+
+    header  8 x uint64  magic, dim, capacity, table size, seq, count, owner, -
+    arena   capacity x dim float32 unit embeddings, dense like EmbeddingIndex
+    rows    capacity x ROW: id, name, room, coords, online, avatar, bio, interests
+    table   int32 open-addressing hash of id -> row (-1 = empty)
+
+Writers serialize on a lock file (``flock``), so there is a single writer at
+a time across processes. Readers never lock: the writer bumps ``seq`` to an
+odd value before touching the segment and to the next even value after, and
+a reader that saw an odd or changed ``seq`` discards its result and retries
+(a seqlock). The segment is created by the first write; readers in other
+workers attach to it lazily.
+
+Rows are fixed-size, so the shared copy of a bio is cut to its first
+BIO_BYTES bytes and interests to as many whole items as fit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from backend.spatial.knn_clustering import normalize_rows, top_k_indices
+
+ROW = np.dtype([
+    ("id", "S64"),
+    ("name", "S96"),
+    ("room", "S32"),
+    ("coords", "<f4", (3,)),
+    ("online", "u1"),
+    ("avatar", "S64"),
+    ("bio", "S320"),
+    ("interests", "S128"),
+])
+BIO_BYTES = ROW.fields["bio"][0].itemsize
+MAGIC = 0x47494449_53484D32  # "GIDISHM2"
+HEADER_WORDS = 8
+_MAGIC, _DIM, _CAPACITY, _TABLE, _SEQ, _COUNT, _OWNER = range(7)
+READ_RETRIES = 64
+
+SharedProfile = Dict[str, object]
+_EMPTY_ROW = (b"", b"", b"", (0.0, 0.0, 0.0), 0, b"", b"", b"")
+T = TypeVar("T")
+
+
+class SharedStoreFull(RuntimeError):
+    """Every row of the segment is taken (raise GIDI_SHARED_CAPACITY)."""
+
+
+class _Torn(Exception):
+    """A read overlapped a write and has to be retried."""
+
+
+def server_run_id() -> int:
+    """
+    Id of this server run, the same in every uvicorn worker of it.
+
+    ``GIDI_RUN_ID``, if a launcher sets one, wins. Otherwise it is the
+    process that started the workers (the uvicorn supervisor, or this
+    process when it is the only worker), identified by pid and start time
+    so a reused pid still counts as a new run.
+    """
+    explicit = os.getenv("GIDI_RUN_ID")
+    if explicit:
+        return int.from_bytes(hashlib.blake2b(explicit.encode("utf-8"), digest_size=8).digest(), "little")
+    parent = multiprocessing.parent_process()  # set in workers uvicorn spawns
+    pid = parent.pid if parent is not None else os.getpid()
+    return (_start_ticks(pid) << 22) | pid  # pids fit in 22 bits
+
+
+def _start_ticks(pid: int) -> int:
+    """Start time of ``pid`` in clock ticks since boot (0 where /proc is unavailable)."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # Field 22, counted after the parenthesized command name
+            return int(f.read().rsplit(b")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _segment_size(dim: int, capacity: int, table: int) -> int:
+    return HEADER_WORDS * 8 + capacity * dim * 4 + capacity * ROW.itemsize + table * 4
+
+
+def _fixed(text: str, size: int) -> bytes:
+    """UTF-8 ``text`` cut to ``size`` bytes without splitting a character."""
+    return text.encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _interests(items: Iterable[str], size: int) -> bytes:
+    """JSON list of as many of ``items`` as fit in ``size`` bytes."""
+    kept: List[str] = []
+    encoded = b"[]"
+    for item in items:
+        candidate = json.dumps(kept + [str(item)], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(candidate) > size:
+            break
+        kept.append(str(item))
+        encoded = candidate
+    return encoded
+
+
+def _untrack(shm: SharedMemory) -> None:
+    # The segment outlives the worker that created it; left registered, the
+    # resource tracker would unlink it as soon as that worker exits
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class SharedProfileStore:
+    """
+    Ids, names, rooms, coords, online flags and embeddings of every profile,
+    in a segment called ``name``.
+
+    ``owner`` identifies the server run (main.py passes :func:`server_run_id`):
+    a writer that finds a segment left by another run clears it before its
+    first write.
+    """
+
+    def __init__(self, name: str, capacity: int = 131_072, owner: Optional[int] = None) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.owner = owner
+        self.retries = 0
+        self._shm: Optional[SharedMemory] = None
+        self._lock = threading.Lock()
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_fd: Optional[int] = None
+        self._checked_owner = owner is None
+
+    # -- segment ---------------------------------------------------------
+
+    def _map(self, shm: SharedMemory) -> None:
+        header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        dim, capacity, table = int(header[_DIM]), int(header[_CAPACITY]), int(header[_TABLE])
+        offset = HEADER_WORDS * 8
+        self._arena = np.ndarray((capacity, dim), dtype=np.float32, buffer=shm.buf, offset=offset)
+        offset += capacity * dim * 4
+        self._rows = np.ndarray((capacity,), dtype=ROW, buffer=shm.buf, offset=offset)
+        offset += capacity * ROW.itemsize
+        self._table = np.ndarray((table,), dtype=np.int32, buffer=shm.buf, offset=offset)
+        self._header = header
+        self._mask = table - 1
+        self.dim = dim
+        self.capacity = capacity
+        self._shm = shm
+
+    def _attach(self) -> bool:
+        """Map the segment if some worker has created it already."""
+        if self._shm is not None:
+            return True
+        try:
+            shm = SharedMemory(name=self.name)
+        except (FileNotFoundError, ValueError):  # ValueError: created but not yet sized
+            return False
+        _untrack(shm)
+        if shm.size < HEADER_WORDS * 8 or int(np.ndarray((1,), dtype=np.uint64, buffer=shm.buf)[0]) != MAGIC:
+            shm.close()  # still being initialized by its creator
+            return False
+        self._map(shm)
+        return True
+
+    def _create(self, dim: int) -> None:
+        """Create and initialize the segment; called with the writer lock held."""
+        table = 1 << max(4, (2 * self.capacity - 1).bit_length())
+        shm = SharedMemory(name=self.name, create=True, size=_segment_size(dim, self.capacity, table))
+        _untrack(shm)
+        header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        header[_DIM], header[_CAPACITY], header[_TABLE] = dim, self.capacity, table
+        header[_OWNER] = self.owner or 0
+        self._map(shm)
+        self._table[:] = -1
+        header[_MAGIC] = MAGIC  # last: readers attach only once this is set
+        self._checked_owner = True
+
+    def close(self) -> None:
+        if self._shm is not None:
+            # Views into the buffer must go before it can be closed
+            self._arena = self._rows = self._table = self._header = None
+            self._shm.close()
+            self._shm = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def unlink(self) -> None:
+        """Remove the segment for every process (after the last server run is gone)."""
+        self.close()
+        try:
+            shm = SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+        try:
+            os.unlink(self._lock_path)
+        except FileNotFoundError:
+            pass
+
+    # -- writer ----------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        import fcntl
+
+        with self._lock:
+            if self._lock_fd is None:
+                self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self, dim: int) -> Iterator[None]:
+        """Writer lock plus the odd/even ``seq`` bump that readers validate against."""
+        with self._locked():
+            if not self._attach():
+                self._create(dim)
+            if dim != self.dim:
+                raise ValueError(f"Expected embedding of dim {self.dim}, got {dim}")
+            self._header[_SEQ] += 1
+            try:
+                if not self._checked_owner:
+                    if int(self._header[_OWNER]) != self.owner:
+                        self._clear()
+                        self._header[_OWNER] = self.owner
+                    self._checked_owner = True
+                yield
+            finally:
+                self._header[_SEQ] += 1
+
+    def _home(self, key: bytes) -> int:
+        return zlib.crc32(key) & self._mask
+
+    def _probe(self, key: bytes) -> Tuple[int, int]:
+        """``(table position, row)`` of ``key``, or the empty position it would take and -1."""
+        table, rows, mask = self._table, self._rows, self._mask
+        position = self._home(key)
+        for _ in range(len(table)):
+            row = int(table[position])
+            if row < 0:
+                return position, -1
+            if row >= len(rows):
+                raise _Torn()
+            if rows[row]["id"] == key:
+                return position, row
+            position = (position + 1) & mask
+        raise _Torn()
+
+    def _unlink_position(self, position: int) -> None:
+        """Empty ``position``, shifting later entries of the probe run back (no tombstones)."""
+        table, rows, mask = self._table, self._rows, self._mask
+        hole = probe = position
+        while True:
+            probe = (probe + 1) & mask
+            row = int(table[probe])
+            if row < 0:
+                break
+            home = self._home(bytes(rows[row]["id"]))
+            # Entries whose home lies cyclically in (hole, probe] stay put
+            if (hole < probe and hole < home <= probe) or (hole > probe and (home > hole or home <= probe)):
+                continue
+            table[hole] = row
+            hole = probe
+        table[hole] = -1
+
+    def _put(self, profile: SharedProfile, vector: np.ndarray, keep_online: bool) -> None:
+        key = str(profile["id"]).encode("utf-8")
+        if len(key) > ROW.fields["id"][0].itemsize:
+            raise ValueError(f"Profile id is longer than {ROW.fields['id'][0].itemsize} bytes: {profile['id']!r}")
+        position, row = self._probe(key)
+        online = 1 if profile.get("is_online") else 0
+        if row >= 0 and keep_online:
+            online = int(self._rows[row]["online"])
+        if row < 0:
+            row = int(self._header[_COUNT])
+            if row >= self.capacity:
+                raise SharedStoreFull(f"Shared profile store {self.name} is full ({self.capacity} rows)")
+            self._table[position] = row
+            self._header[_COUNT] = row + 1
+        self._arena[row] = vector
+        coords = profile.get("coords") or (0.0, 0.0, 0.0)
+        self._rows[row] = (
+            key,
+            _fixed(str(profile.get("name") or ""), ROW.fields["name"][0].itemsize),
+            _fixed(str(profile.get("room") or ""), ROW.fields["room"][0].itemsize),
+            tuple(coords),
+            online,
+            _fixed(str(profile.get("avatar_model") or ""), ROW.fields["avatar"][0].itemsize),
+            _fixed(str(profile.get("bio") or ""), BIO_BYTES),
+            _interests(profile.get("interests") or (), ROW.fields["interests"][0].itemsize),
+        )
+
+    def upsert(self, profile: SharedProfile, keep_online: bool = False) -> None:
+        """Insert or replace the row of ``profile`` (a dict or ProfileRecord with an ``id``)."""
+        self.upsert_many([profile], keep_online=keep_online)
+
+    def upsert_many(self, profiles: Iterable[SharedProfile], keep_online: bool = False) -> None:
+        """
+        Write many rows under one lock and one ``seq`` bump. With
+        ``keep_online``, rows already in the segment keep their online flag
+        (another worker may have changed it since this one read it).
+        """
+        profiles = list(profiles)
+        if not profiles:
+            return
+        vectors = normalize_rows(np.array([profile["embedding"] for profile in profiles], dtype=np.float32))
+        with self._writing(vectors.shape[1]):
+            for profile, vector in zip(profiles, vectors):
+                self._put(profile, vector, keep_online)
+
+    def set_online(self, profile_id: str, is_online: bool) -> bool:
+        """Flip the online flag of a row, whichever worker wrote it. Returns False if it is absent."""
+        if not self._attach():
+            return False
+        with self._writing(self.dim):
+            row = self._probe(profile_id.encode("utf-8"))[1]
+            if row < 0:
+                return False
+            self._rows[row]["online"] = 1 if is_online else 0
+            return True
+
+    def remove(self, profile_id: str) -> bool:
+        """Drop a row, moving the last row into its place. Returns False if it was absent."""
+        if not self._attach():
+            return False
+        with self._writing(self.dim):
+            position, row = self._probe(profile_id.encode("utf-8"))
+            if row < 0:
+                return False
+            self._unlink_position(position)
+            last = int(self._header[_COUNT]) - 1
+            if row != last:
+                moved_position, _ = self._probe(bytes(self._rows[last]["id"]))
+                self._arena[row] = self._arena[last]
+                self._rows[row] = self._rows[last]
+                self._table[moved_position] = row
+            self._rows[last] = _EMPTY_ROW
+            self._header[_COUNT] = last
+            return True
+
+    def _clear(self) -> None:
+        self._table[:] = -1
+        self._rows[:] = _EMPTY_ROW
+        self._header[_COUNT] = 0
+
+    def clear(self) -> None:
+        if self._attach():
+            with self._writing(self.dim):
+                self._clear()
+
+    # -- readers ---------------------------------------------------------
+
+    def _read(self, fn: Callable[[], T], default: T) -> T:
+        """Run ``fn`` against a consistent view of the segment, retrying while writes overlap."""
+        if not self._attach():
+            return default
+        header = self._header
+        for _ in range(READ_RETRIES):
+            start = int(header[_SEQ])
+            if not start & 1:
+                try:
+                    result = fn()
+                except _Torn:
+                    result = None
+                else:
+                    if int(header[_SEQ]) == start:
+                        return result
+            self.retries += 1
+            time.sleep(0)  # let the writer finish
+        # A writer that keeps the segment busy: wait for it instead of spinning
+        with self._locked():
+            return fn()
+
+    def _row(self, row: int) -> SharedProfile:
+        record = self._rows[row]
+        return {
+            "id": bytes(record["id"]).decode("utf-8", "replace"),
+            "name": bytes(record["name"]).decode("utf-8", "replace"),
+            "room": bytes(record["room"]).decode("utf-8", "replace") or None,
+            "coords": record["coords"].tolist(),
+            "is_online": bool(record["online"]),
+            "avatar_model": bytes(record["avatar"]).decode("utf-8", "replace") or None,
+            "bio": bytes(record["bio"]).decode("utf-8", "replace") or None,
+            "interests": json.loads(bytes(record["interests"]) or b"[]"),
+        }
+
+    def _count(self) -> int:
+        return min(int(self._header[_COUNT]), self.capacity)
+
+    def __len__(self) -> int:
+        return self._read(self._count, 0)
+
+    def __contains__(self, profile_id: object) -> bool:
+        return isinstance(profile_id, str) and self.get(profile_id) is not None
+
+    @property
+    def version(self) -> int:
+        """Completed writes so far, across all workers."""
+        return int(self._header[_SEQ]) // 2 if self._attach() else 0
+
+    def stats(self) -> Dict[str, object]:
+        return {"rows": len(self), "capacity": self.capacity, "version": self.version, "read_retries": self.retries}
+
+    def get(self, profile_id: str) -> Optional[SharedProfile]:
+        key = profile_id.encode("utf-8")
+
+        def read() -> Optional[SharedProfile]:
+            row = self._probe(key)[1]
+            return None if row < 0 else self._row(row)
+
+        return self._read(read, None)
+
+    def page(
+        self, start: int = 0, limit: Optional[int] = None, room: Optional[str] = None, online: Optional[bool] = None
+    ) -> Tuple[List[SharedProfile], Optional[int]]:
+        """
+        Up to ``limit`` rows in ``room`` / with that online flag, from row
+        ``start`` on, and the row to resume from (None once done), like
+        ProfileStore.page. A removal moves the last row into the freed one,
+        so a profile can be skipped by a scan that is already past it.
+        """
+        room_key = _fixed(room, ROW.fields["room"][0].itemsize) if room is not None else None
+
+        def read() -> Tuple[List[SharedProfile], Optional[int]]:
+            rows = self._rows[: self._count()]
+            mask = np.ones(len(rows), dtype=bool)
+            if room_key is not None:
+                mask &= rows["room"] == room_key
+            if online is not None:
+                mask &= rows["online"] == (1 if online else 0)
+            matches = np.flatnonzero(mask[max(start, 0):]) + max(start, 0)
+            if limit is not None and len(matches) > limit:
+                return [self._row(int(row)) for row in matches[:limit]], int(matches[limit])
+            return [self._row(int(row)) for row in matches], None
+
+        return self._read(read, ([], None))
+
+    def get_by_name(self, name: str) -> Optional[SharedProfile]:
+        key = _fixed(name, ROW.fields["name"][0].itemsize)
+
+        def read() -> Optional[SharedProfile]:
+            rows = np.flatnonzero(self._rows["name"][: self._count()] == key)
+            return self._row(int(rows[0])) if len(rows) else None
+
+        return self._read(read, None)
+
+    def _search(self, query: np.ndarray, k: int) -> List[Tuple[SharedProfile, float]]:
+        sims = self._arena[: self._count()] @ query
+        return [(self._row(int(row)), 1.0 - float(sims[row])) for row in top_k_indices(sims, k)]
+
+    def nearest(self, embedding: Sequence[float], k: int = 5) -> List[Tuple[SharedProfile, float]]:
+        """k-NN of ``embedding`` over every worker's profiles, as ``(row, cosine_distance)`` pairs."""
+        query = normalize_rows(embedding)[0]
+        return self._read(lambda: self._search(query, k), [])
+
+    def nearest_to(self, profile_id: str, k: int = 5) -> Optional[List[Tuple[SharedProfile, float]]]:
+        """k-NN of a stored profile (itself included, like ProfileStore.nearest); None if unknown."""
+        key = profile_id.encode("utf-8")
+
+        def read() -> Optional[List[Tuple[SharedProfile, float]]]:
+            row = self._probe(key)[1]
+            return None if row < 0 else self._search(self._arena[row].copy(), k)
+
+        return self._read(read, None)
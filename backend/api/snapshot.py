@@ -0,0 +1,142 @@
+"""
+On-disk snapshot of the profile store for fast cold starts.
+
+A snapshot is a float32 ``embeddings-<stamp>.npy`` matrix (one unit-length
+row per profile) plus ``index.json`` holding the creation time, the
+Supabase sync watermark the store had reached, and each profile's
+non-vector fields (id, name, room, coords, ...) in row order.
+``index.json`` is replaced atomically after the matrix is fully written, so
+readers never see a half-written snapshot. Several uvicorn workers share
+the directory: writers take an exclusive ``flock`` on ``.lock`` for the
+whole write and prune, and readers a shared one until the matrix is
+mapped, so no one deletes the matrix another worker's index points at. The matrix is opened with
+``np.memmap`` in copy-on-write mode: uvicorn workers on the same host share
+its pages until they modify a row.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_FORMAT = 1
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+VECTOR_FIELDS = ("embedding",)
+
+
+@dataclass
+class Snapshot:
+    created_at: str  # ISO-8601 UTC
+    profiles: List[Dict[str, object]]
+    embeddings: np.ndarray
+    watermark: Optional[str] = None  # last Supabase updated_at applied before the snapshot
+    watermark_id: Optional[str] = None
+
+
+def write_snapshot(
+    directory: str,
+    profiles: Sequence[Dict[str, object]],
+    embeddings: np.ndarray,
+    created_at: Optional[str] = None,
+    watermark: Optional[str] = None,
+    watermark_id: Optional[str] = None,
+) -> Path:
+    """
+    Write ``profiles`` (row-aligned with ``embeddings``) and prune older
+    matrices. ``watermark``/``watermark_id`` are the sync position the
+    profiles reflect, so a restart resumes the pull exactly there.
+    """
+    if len(profiles) != embeddings.shape[0]:
+        raise ValueError("profiles and embeddings must have the same length")
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    created_at = created_at or datetime.now(timezone.utc).isoformat()
+    index = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": created_at,
+        "watermark": watermark,
+        "watermark_id": watermark_id,
+        "count": len(profiles),
+        "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        "profiles": [{k: v for k, v in profile.items() if k not in VECTOR_FIELDS} for profile in profiles],
+    }
+
+    with _locked(root, exclusive=True):
+        matrix_name = f"embeddings-{time.time_ns()}.npy"
+        with _temp_file(root, matrix_name) as (f, tmp_matrix):
+            np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        os.replace(tmp_matrix, root / matrix_name)
+
+        index["embeddings"] = matrix_name
+        with _temp_file(root, INDEX_FILE) as (f, tmp_index):
+            f.write(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+        os.replace(tmp_index, root / INDEX_FILE)
+
+        # Workers that still map an older matrix keep their pages after unlink
+        for stale in root.glob("embeddings-*.npy"):
+            if stale.name != matrix_name:
+                stale.unlink(missing_ok=True)
+    return root / INDEX_FILE
+
+
+@contextmanager
+def _locked(root: Path, exclusive: bool) -> Iterator[None]:
+    import fcntl
+
+    with (root / LOCK_FILE).open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _temp_file(root: Path, name: str) -> Iterator[Tuple[BinaryIO, str]]:
+    """A uniquely named ``<name>.*.tmp`` in ``root``, removed unless it was renamed."""
+    fd, path = tempfile.mkstemp(dir=root, prefix=name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f, path
+    except BaseException:
+        os.unlink(path)
+        raise
+
+
+def load_snapshot(directory: str) -> Optional[Snapshot]:
+    """Open the latest snapshot in ``directory``, or None if there is no usable one."""
+    root = Path(directory)
+    index_path = root / INDEX_FILE
+    if not index_path.exists():
+        return None
+    # Hold off writers until the matrix is mapped; the mapping outlives a later unlink
+    with _locked(root, exclusive=False):
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        if index.get("format") != SNAPSHOT_FORMAT:
+            return None
+        matrix_path = root / index["embeddings"]
+        if not matrix_path.exists():
+            return None
+        embeddings = np.load(matrix_path, mmap_mode="c")
+    if embeddings.shape[0] != index["count"]:
+        return None
+    profiles = index["profiles"]
+    for profile, row in zip(profiles, embeddings):
+        profile["embedding"] = row.tolist()
+    return Snapshot(
+        created_at=index["created_at"],
+        profiles=profiles,
+        embeddings=embeddings,
+        watermark=index.get("watermark"),
+        watermark_id=index.get("watermark_id"),
+    )
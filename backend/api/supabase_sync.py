@@ -0,0 +1,135 @@
+"""
+Incremental pull of the ``profiles`` table using an ``updated_at`` watermark.
+
+Rows are read in keyset-paginated pages ordered by ``(updated_at, id)``.
+After each page the watermark advances to the last row, so a sync only
+transfers rows changed since the previous one and memory stays bounded by
+``page_size``. Rows sharing the watermark timestamp are drained by id
+first, which keeps pagination exact when many rows have the same
+``updated_at``. Client calls are blocking and run in a worker thread; the
+``apply`` callback runs on the caller's event loop. It may return an
+awaitable (e.g. be a coroutine function that does its heavy work in a
+thread), which is awaited before the watermark moves past the page.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from backend.observability.metrics import supabase_call
+
+Row = Dict[str, Any]
+
+
+def _parse_timestamp(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+@dataclass
+class SyncStats:
+    runs: int = 0
+    rows_applied: int = 0
+    pages: int = 0
+    last_rows: int = 0
+    last_seconds: float = 0.0
+    rows_per_sec: float = 0.0
+    lag_seconds: Optional[float] = None  # apply time minus updated_at of the newest row
+    watermark: Optional[str] = None
+    last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+class SupabaseSyncEngine:
+    def __init__(
+        self,
+        client: Any,
+        apply: Callable[[List[Row]], Union[None, Awaitable[None]]],
+        table: str = "profiles",
+        page_size: int = 500,
+        watermark: Optional[str] = None,
+        watermark_id: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.apply = apply
+        self.table = table
+        self.page_size = page_size
+        self.watermark = watermark
+        self.watermark_id = watermark_id  # id of the last row applied at ``watermark``
+        self.stats = SyncStats(watermark=watermark)
+
+    def _fetch_ties(self) -> List[Row]:
+        """Rows at exactly the watermark timestamp with an id past the last one seen."""
+        query = self.client.table(self.table).select("*").eq("updated_at", self.watermark)
+        if self.watermark_id is not None:
+            query = query.gt("id", self.watermark_id)
+        with supabase_call("select", self.table):
+            return query.order("id").limit(self.page_size).execute().data
+
+    def _fetch_after(self) -> List[Row]:
+        query = self.client.table(self.table).select("*")
+        if self.watermark is not None:
+            query = query.gt("updated_at", self.watermark)
+        with supabase_call("select", self.table):
+            return query.order("updated_at").order("id").limit(self.page_size).execute().data
+
+    async def sync_once(self) -> int:
+        """Pull and apply every row changed since the watermark. Returns the row count."""
+        start = time.perf_counter()
+        applied = 0
+        draining_ties = self.watermark is not None and self.watermark_id is not None
+        try:
+            while True:
+                fetch = self._fetch_ties if draining_ties else self._fetch_after
+                rows = await asyncio.to_thread(fetch)
+                self.stats.pages += 1
+                if rows:
+                    applying = self.apply(rows)
+                    if inspect.isawaitable(applying):
+                        await applying
+                    applied += len(rows)
+                    newest = rows[-1]
+                    self.watermark = newest["updated_at"]
+                    self.watermark_id = newest["id"]
+                    updated = _parse_timestamp(newest["updated_at"])
+                    if updated is not None:
+                        self.stats.lag_seconds = max(0.0, time.time() - updated)
+                if draining_ties and len(rows) < self.page_size:
+                    draining_ties = False
+                    continue
+                if not draining_ties:
+                    if len(rows) < self.page_size:
+                        break
+                    # Finish rows sharing the last timestamp before moving past it
+                    draining_ties = True
+            self.stats.last_error = None
+        except Exception as e:
+            self.stats.last_error = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.runs += 1
+            self.stats.rows_applied += applied
+            self.stats.last_rows = applied
+            self.stats.last_seconds = elapsed
+            self.stats.rows_per_sec = applied / elapsed if elapsed > 0 else 0.0
+            self.stats.watermark = self.watermark
+        return applied
+
+    async def run_forever(self, interval: float) -> None:
+        """Sync every ``interval`` seconds until cancelled; errors are logged and retried."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_once()
+            except Exception as e:
+                print(f"Warning: Supabase sync failed: {e}")
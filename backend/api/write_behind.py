@@ -0,0 +1,265 @@
+"""
+Write-behind queue for Supabase upserts.
+
+Request handlers call :meth:`WriteBehindQueue.put`, which only merges the
+row into an in-memory buffer keyed by ``(table, conflict key)``: repeated
+updates to the same profile coalesce into one row, later fields winning.
+A background task flushes the buffer as bulk upserts when it reaches
+``max_batch`` rows or ``flush_interval`` seconds have passed, running the
+blocking client calls in a worker thread so the event loop never waits on
+Supabase. Failed batches are merged back under any newer writes and
+retried with exponential backoff per table. When a table fails on two
+flushes in a row its batch is bisected, so the good rows go through and
+only the rows that fail on their own are retried; those are dropped after
+``max_attempts`` so one bad row cannot wedge the queue. Tables after a
+failing one wait untouched, without using up their attempts; tables
+flush in ``table_order`` (parents before the children that reference
+them), then any others in the order they were first written. Beyond
+``max_pending`` rows the oldest pending row is dropped (``overflowed``)
+instead of letting the buffer grow without bound while Supabase is down.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.observability.metrics import supabase_call
+
+Row = Dict[str, Any]
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        client: Any,
+        max_batch: int = 500,
+        flush_interval: float = 0.5,
+        base_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_attempts: int = 8,
+        max_pending: Optional[int] = None,
+        table_order: Sequence[str] = (),
+    ) -> None:
+        self.client = client
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self._rank = {table: rank for rank, table in enumerate(table_order)}
+        # table -> conflict key -> merged row
+        self._pending: Dict[str, Dict[Any, Row]] = {}
+        self._conflict: Dict[str, str] = {}
+        self._attempts: Dict[Tuple[str, Any], int] = {}
+        self._table_failures: Dict[str, int] = {}  # consecutive failed flushes per table
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._retry_at = 0.0
+        self._latencies: Deque[float] = deque(maxlen=1024)
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.isolated = 0
+        self.last_error: Optional[str] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._depth
+
+    def put(self, table: str, row: Row, on_conflict: str = "id") -> None:
+        """Queue an upsert of ``row``; merges into any pending row with the same key."""
+        key = row[on_conflict]
+        with self._lock:
+            self._conflict.setdefault(table, on_conflict)
+            rows = self._pending.setdefault(table, {})
+            pending = rows.get(key)
+            if pending is None:
+                if self.max_pending is not None and self._depth >= self.max_pending:
+                    self._drop_oldest(table)
+                rows[key] = dict(row)
+                self._depth += 1
+            else:
+                pending.update(row)
+                self.coalesced += 1
+            self.enqueued += 1
+            depth = self._depth
+        if depth >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _drop_oldest(self, table: str) -> None:
+        """Make room for one row, from ``table`` itself if it has any pending."""
+        if not self._pending[table]:
+            table = max(self._pending, key=lambda name: len(self._pending[name]))
+        rows = self._pending[table]
+        victim = next(iter(rows))
+        del rows[victim]
+        self._attempts.pop((table, victim), None)
+        self._depth -= 1
+        self.overflowed += 1
+
+    def _take(self) -> Dict[str, Dict[Any, Row]]:
+        with self._lock:
+            taken = {table: rows for table, rows in self._pending.items() if rows}
+            self._pending = {table: {} for table in self._pending}
+            self._depth = 0
+        # Stable sort: tables outside table_order keep their first-seen order, last
+        unranked = len(self._rank)
+        return dict(sorted(taken.items(), key=lambda item: self._rank.get(item[0], unranked)))
+
+    def _requeue(self, table: str, rows: Dict[Any, Row], attempted: bool = True) -> None:
+        """
+        Put failed rows back underneath anything written since they were
+        taken. ``attempted=False`` (rows that were never sent) keeps their
+        attempt counts as they were.
+        """
+        with self._lock:
+            pending = self._pending.setdefault(table, {})
+            for key, row in rows.items():
+                if attempted:
+                    attempts = self._attempts.get((table, key), 0) + 1
+                    if attempts >= self.max_attempts:
+                        self._attempts.pop((table, key), None)
+                        self.dropped += 1
+                        continue
+                    self._attempts[(table, key)] = attempts
+                newer = pending.get(key)
+                if newer is None:
+                    self._depth += 1
+                pending[key] = {**row, **newer} if newer else row
+
+    def _upsert(self, table: str, rows: List[Row]) -> None:
+        # PostgREST bulk upserts need every object to carry the same columns
+        by_columns: Dict[Tuple[str, ...], List[Row]] = {}
+        for row in rows:
+            by_columns.setdefault(tuple(sorted(row)), []).append(row)
+        for group in by_columns.values():
+            for start in range(0, len(group), self.max_batch):
+                with supabase_call("upsert", table):
+                    self.client.table(table).upsert(
+                        group[start : start + self.max_batch], on_conflict=self._conflict[table]
+                    ).execute()
+
+    def _isolate(self, table: str, rows: Dict[Any, Row]) -> Tuple[Dict[Any, Row], bool]:
+        """
+        Bisect a failing batch, writing every half that goes through. Returns
+        the rows still unwritten and whether they failed on their own (as
+        opposed to nothing getting through at all, e.g. an outage).
+        """
+        budget = 2 * len(rows).bit_length()  # probes before calling it an outage
+        progress = False
+        failing = deque([list(rows.items())])
+        failed: List[Tuple[Any, Row]] = []
+        while failing:
+            batch = failing.popleft()
+            if len(batch) == 1:
+                failed.extend(batch)
+                continue
+            middle = len(batch) // 2
+            for half in (batch[:middle], batch[middle:]):
+                if not progress and budget <= 0:
+                    failing.append(half)
+                    continue
+                budget -= 1
+                try:
+                    self._upsert(table, [row for _, row in half])
+                except Exception:
+                    failing.append(half)
+                    continue
+                progress = True
+                self._wrote(table, dict(half))
+            if not progress and budget <= 0:
+                failed.extend(item for batch in failing for item in batch)
+                break
+        return dict(failed), progress
+
+    def _wrote(self, table: str, rows: Dict[Any, Row]) -> None:
+        self.flushed_rows += len(rows)
+        with self._lock:
+            for key in rows:
+                self._attempts.pop((table, key), None)
+
+    def flush_now(self) -> int:
+        """Write everything pending (blocking). Returns the number of rows written."""
+        written = 0
+        taken = self._take()
+        for position, (table, rows) in enumerate(taken.items()):
+            start = time.perf_counter()
+            try:
+                self._upsert(table, list(rows.values()))
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                failures = self._table_failures[table] = self._table_failures.get(table, 0) + 1
+                failed, isolated = rows, False
+                # A second failure in a row is more likely bad rows than a blip
+                if failures > 1 and len(rows) > 1:
+                    failed, isolated = self._isolate(table, rows)
+                self._requeue(table, failed)
+                if isolated:
+                    # The rest of the table went through; only the bad rows wait
+                    written += len(rows) - len(failed)
+                    self.isolated += len(failed)
+                    if not failed:
+                        self._table_failures.pop(table, None)
+                    continue
+                self._retry_at = time.monotonic() + min(self.max_backoff, self.base_backoff * 2 ** (failures - 1))
+                # Later tables may depend on this one, so they wait, untried
+                for later, later_rows in list(taken.items())[position + 1 :]:
+                    self._requeue(later, later_rows, attempted=False)
+                break
+            self._latencies.append(time.perf_counter() - start)
+            self.flushes += 1
+            self._table_failures.pop(table, None)
+            self._wrote(table, rows)
+            written += len(rows)
+        return written
+
+    async def flush(self) -> int:
+        return await asyncio.to_thread(self.flush_now)
+
+    async def run_forever(self) -> None:
+        """Flush on size or time triggers until cancelled."""
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                delay = self._retry_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(self):
+                    await self.flush()
+        finally:
+            self._wakeup = None
+
+    def stats(self) -> Dict[str, object]:
+        latencies = np.array(self._latencies) if self._latencies else None
+        return {
+            "depth": len(self),
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "flushed_rows": self.flushed_rows,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "isolated": self.isolated,
+            "overflowed": self.overflowed,
+            "flush_p50_ms": float(np.percentile(latencies, 50) * 1e3) if latencies is not None else None,
+            "flush_p99_ms": float(np.percentile(latencies, 99) * 1e3) if latencies is not None else None,
+            "last_error": self.last_error,
+        }
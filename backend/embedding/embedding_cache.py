@@ -0,0 +1,179 @@
+"""
+Content-addressed cache of embed_user results.
+
+Entries are keyed by a SHA-256 of the embedding inputs (CV text or file
+identity, audio path, transcript, interests) plus a fingerprint of the
+pipeline configuration. Lookups go through an in-memory LRU tier and then
+an optional SQLite tier, so restarts and no-op profile updates skip the
+pipeline. Changing ``EMBED_DIM``, the taxonomy, the skill vocabulary or the
+token hash changes the fingerprint, which invalidates old entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from backend.profile_extraction.cv_parser import PARSER_VERSION, SKILL_KEYWORDS
+from backend.profile_extraction.interest_mapper import TAXONOMY
+from backend.profile_extraction.keyword_matcher import MATCHER_VERSION
+
+from . import text_encoder, voice_encoder
+from .lru import LRUCache
+from .user_embedder import UserProfile, batch_embed
+
+
+def pipeline_fingerprint() -> str:
+    """Digest of every setting that changes what embed_user produces."""
+    return _fingerprint(text_encoder.encoder_version(), text_encoder.EMBED_DIM, voice_encoder.EMBED_DIM)
+
+
+@lru_cache(maxsize=8)
+def _fingerprint(text_version: str, text_dim: int, voice_dim: int) -> str:
+    # Vocabularies and versions below only change with the code; the encoder
+    # settings can change at runtime (set_hash_scheme), so they key the cache
+    config = {
+        "text": text_version,
+        "text_dim": text_dim,
+        "voice_dim": voice_dim,
+        "voice_keys": voice_encoder.ORDERED_KEYS,
+        "taxonomy": {bucket: sorted(keywords) for bucket, keywords in sorted(TAXONOMY.items())},
+        "skills": sorted(SKILL_KEYWORDS),
+        "matcher": MATCHER_VERSION,
+        "cv_parser": PARSER_VERSION,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(profile: UserProfile, fingerprint: Optional[str] = None) -> str:
+    """Content address of a profile's embedding inputs (the name is not an input)."""
+    cv_file = None
+    if profile.cv_path:
+        stat = os.stat(profile.cv_path)
+        cv_file = [os.path.abspath(profile.cv_path), stat.st_size, stat.st_mtime_ns]
+    payload = {
+        "fp": fingerprint or pipeline_fingerprint(),
+        "cv_file": cv_file,
+        "cv_text": None if profile.cv_path else profile.cv_text,
+        "audio": profile.audio_path,
+        "transcript": profile.transcript,
+        "interests": profile.interests or [],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache in front of :func:`batch_embed`.
+
+    Values are stored as JSON (without the profile name), so every hit hands
+    back a fresh dict the caller is free to mutate.
+    """
+
+    def __init__(self, path: Optional[str] = None, maxsize: int = 4096) -> None:
+        self.memory: LRUCache[str, bytes] = LRUCache(maxsize=maxsize)
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._fingerprint = pipeline_fingerprint()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, value BLOB)")
+            self._check_fingerprint()
+
+    def _check_fingerprint(self) -> None:
+        """Drop every stored entry if the pipeline changed since they were written."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if row is None or row[0] != self._fingerprint:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (self._fingerprint,)
+                )
+                self._db.commit()
+
+    def _refresh_fingerprint(self) -> str:
+        fingerprint = pipeline_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self.memory.clear()
+            if self._db is not None:
+                self._check_fingerprint()
+        return fingerprint
+
+    def _load(self, key: str) -> Optional[bytes]:
+        value = self.memory.get(key)
+        if value is not None or self._db is None:
+            return value
+        with self._lock:
+            row = self._db.execute("SELECT value FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.disk_hits += 1
+        self.memory.put(key, row[0])
+        return row[0]
+
+    def _store(self, entries: Dict[str, bytes]) -> None:
+        for key, value in entries.items():
+            self.memory.put(key, value)
+        if self._db is not None and entries:
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, value) VALUES (?, ?)", list(entries.items())
+                )
+                self._db.commit()
+
+    def embed(self, profile: UserProfile) -> Dict[str, object]:
+        return self.embed_many([profile])[0]
+
+    def embed_many(self, profiles: Sequence[UserProfile]) -> List[Dict[str, object]]:
+        """Embed ``profiles``, running the pipeline only for inputs not seen before."""
+        fingerprint = self._refresh_fingerprint()
+        keys = [cache_key(profile, fingerprint) for profile in profiles]
+        results: List[Optional[Dict[str, object]]] = [None] * len(profiles)
+        missing: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            cached = self._load(key)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                results[i] = {"name": profiles[i].name, **json.loads(cached)}
+
+        self.misses += sum(len(positions) for positions in missing.values())
+        if missing:
+            computed = batch_embed([profiles[positions[0]] for positions in missing.values()])
+            entries = {}
+            for (key, positions), created in zip(missing.items(), computed):
+                value = {k: v for k, v in created.items() if k != "name"}
+                entries[key] = json.dumps(value).encode("utf-8")
+                for i in positions:
+                    results[i] = {"name": profiles[i].name, **json.loads(entries[key])}
+            self._store(entries)
+        return results
+
+    def stats(self) -> Dict[str, object]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.disk_hits + self.misses
+        return {
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_size": memory["size"],
+            "hit_rate": (memory["hits"] + self.disk_hits) / lookups if lookups else 0.0,
+            "fingerprint": self._fingerprint,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
@@ -0,0 +1,118 @@
+"""
+Micro-batching executor that keeps embedding work off the event loop.
+
+Handlers ``await executor.embed(profile)``. Requests that arrive within
+``max_delay`` seconds of each other (or while every worker is busy) are
+grouped into one call of the vectorized batch function, which runs in a
+thread pool by default. At most ``workers`` batches run at once, so while
+the pool is saturated the next batch keeps growing up to ``max_batch``;
+beyond ``max_queue`` waiting requests :meth:`EmbeddingExecutor.embed`
+raises :class:`EmbeddingBusy` instead of queueing without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BatchFn = Callable[[Sequence[Any]], List[Dict[str, object]]]
+
+
+class EmbeddingBusy(Exception):
+    pass
+
+
+class EmbeddingExecutor:
+    def __init__(
+        self,
+        fn: BatchFn,
+        workers: int = 2,
+        max_batch: int = 64,
+        max_delay: float = 0.002,
+        max_queue: int = 1024,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """``executor`` may be a ProcessPoolExecutor, in which case ``fn`` must be picklable."""
+        self.fn = fn
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self._executor = executor
+        self._queue: Deque[Tuple[Any, asyncio.Future]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._batch_sizes: Deque[int] = deque(maxlen=1024)
+        self.batches = 0
+        self.embedded = 0
+        self.rejected = 0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+        return self._executor
+
+    async def embed(self, item: Any) -> Dict[str, object]:
+        """Embed one profile as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._slots, self._dispatcher = loop, asyncio.Semaphore(self.workers), None
+            self._queue.clear()
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise EmbeddingBusy("embedding queue is full")
+        future = loop.create_future()
+        self._queue.append((item, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            if len(self._queue) < self.max_batch and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+            await self._slots.acquire()
+            batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+            self._loop.create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self._loop.run_in_executor(self._pool(), self.fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.embedded += len(batch)
+        finally:
+            self._slots.release()
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+
+    def stats(self) -> Dict[str, object]:
+        sizes = np.array(self._batch_sizes) if self._batch_sizes else None
+        return {
+            "queued": len(self._queue),
+            "batches": self.batches,
+            "embedded": self.embedded,
+            "rejected": self.rejected,
+            "mean_batch": float(sizes.mean()) if sizes is not None else None,
+            "max_batch": int(sizes.max()) if sizes is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -4,17 +4,33 @@ Multi-modal fusion that blends text, voice, and interest signals.
 
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Sequence
 
 import numpy as np
 
+from .text_encoder import l2_normalize_rows
+
+
+def interest_matrix(interest_scores_list: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Stack interest score dicts into an (N, buckets) matrix in sorted-key order."""
+    if not interest_scores_list:
+        return np.zeros((0, 0), dtype=np.float32)
+    interest_keys = sorted(interest_scores_list[0].keys())
+    return np.array(
+        [[scores[k] for k in interest_keys] for scores in interest_scores_list], dtype=np.float32
+    )
+
+
+def fuse_embeddings_batch(
+    text_embeddings: np.ndarray, voice_embeddings: np.ndarray, interest_vectors: np.ndarray
+) -> np.ndarray:
+    merged = np.concatenate([text_embeddings, voice_embeddings, interest_vectors], axis=1)
+    return l2_normalize_rows(merged)
+
 
 def fuse_embeddings(
     text_embedding: np.ndarray, voice_embedding: np.ndarray, interest_scores: Dict[str, float]
 ) -> np.ndarray:
-    interest_keys = sorted(interest_scores.keys())
-    interest_vector = np.array([interest_scores[k] for k in interest_keys], dtype=np.float32)
-
-    merged = np.concatenate([text_embedding, voice_embedding, interest_vector], axis=0)
-    norm = np.linalg.norm(merged) + 1e-8
-    return merged / norm
+    return fuse_embeddings_batch(
+        text_embedding[None, :], voice_embedding[None, :], interest_matrix([interest_scores])
+    )[0]
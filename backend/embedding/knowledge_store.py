@@ -0,0 +1,223 @@
+"""
+In-process vector store for avatar knowledge chunks.
+
+Each profile's CV is cut into overlapping word windows (see
+``cv_parser.chunk_cv``) and encoded with ``text_encoder.encode_texts``.
+Vectors live in one float32 or float16 arena where every profile owns a
+contiguous span, so "top-k chunks of this avatar" scores one small slice
+instead of the whole table. Replacing a profile's chunks reuses its span
+when they fit and otherwise appends a new one; abandoned rows are
+compacted away once they outnumber the live ones.
+
+Rows for the ``knowledge_chunks`` table carry deterministic ids
+(:func:`chunk_id`), so a re-sync upserts in place.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.spatial.knn_clustering import top_k_indices
+
+from .text_encoder import CHUNK_DIM, chunk_encoder_version, encode_texts, l2_normalize_rows
+
+# knowledge_chunks.embedding is vector(1536); zero padding leaves cosine scores unchanged
+TABLE_DIM = 1536
+_NAMESPACE = uuid.UUID("5f0b7c52-8d8e-4c1b-9a43-6a2f1d0e9b17")
+# Rows converted to float32 at a time when scanning a float16 arena
+_SCAN_BLOCK = 65536
+
+
+def chunk_id(profile_id: str, chunk: int) -> str:
+    return str(uuid.uuid5(_NAMESPACE, f"{profile_id}:{chunk}"))
+
+
+@dataclass(frozen=True)
+class ChunkHit:
+    profile_id: str
+    chunk: int
+    text: str
+    score: float
+
+
+class KnowledgeStore:
+    def __init__(self, dim: int = CHUNK_DIM, dtype: str = "float32", capacity: int = 1024) -> None:
+        if np.dtype(dtype) not in (np.float32, np.float16):
+            raise ValueError("dtype must be float32 or float16")
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._vectors = np.zeros((max(1, capacity), dim), dtype=self.dtype)
+        # Ordinal of the owning profile per arena row; -1 for unused rows
+        self._owner = np.full(max(1, capacity), -1, dtype=np.int32)
+        self._used = 0
+        self._garbage = 0
+        self._profiles: List[Optional[str]] = []
+        self._ordinal: Dict[str, int] = {}
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._texts: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return self._used - self._garbage
+
+    def __contains__(self, profile_id: object) -> bool:
+        return profile_id in self._spans
+
+    def chunks(self, profile_id: str) -> List[str]:
+        return list(self._texts.get(profile_id, ()))
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.zeros((capacity, self.dim), dtype=self.dtype)
+        vectors[: self._used] = self._vectors[: self._used]
+        owner = np.full(capacity, -1, dtype=np.int32)
+        owner[: self._used] = self._owner[: self._used]
+        self._vectors, self._owner = vectors, owner
+
+    def _release(self, start: int, count: int) -> None:
+        self._owner[start : start + count] = -1
+        self._garbage += count
+
+    def put(self, profile_id: str, texts: Sequence[str], vectors: Optional[np.ndarray] = None) -> int:
+        """
+        Replace ``profile_id``'s chunks with ``texts`` (encoded here unless
+        ``vectors`` are given). Returns how many chunks it had before.
+        """
+        texts = list(texts)
+        if vectors is None:
+            vectors = encode_texts(texts, self.dim)
+        start, previous = self._spans.get(profile_id, (0, 0))
+        count = len(texts)
+        if count == 0:
+            self.remove(profile_id)
+            return previous
+        ordinal = self._ordinal.get(profile_id)
+        if ordinal is None:
+            ordinal = self._ordinal[profile_id] = len(self._profiles)
+            self._profiles.append(profile_id)
+        if count > previous:
+            if previous:
+                self._release(start, previous)
+            start = self._used
+            self._grow(start + count)
+            self._used += count
+        elif count < previous:
+            self._release(start + count, previous - count)
+        self._vectors[start : start + count] = vectors
+        self._owner[start : start + count] = ordinal
+        self._spans[profile_id] = (start, count)
+        self._texts[profile_id] = texts
+        if self._garbage > max(1024, len(self)):
+            self.compact()
+        return previous
+
+    def put_many(self, items: Iterable[Tuple[str, Sequence[str]]]) -> None:
+        """Bulk :meth:`put`: every chunk of every profile is encoded in one call."""
+        items = [(profile_id, list(texts)) for profile_id, texts in items]
+        vectors = encode_texts([text for _, texts in items for text in texts], self.dim)
+        offset = 0
+        for profile_id, texts in items:
+            self.put(profile_id, texts, vectors[offset : offset + len(texts)])
+            offset += len(texts)
+
+    def remove(self, profile_id: str) -> bool:
+        span = self._spans.pop(profile_id, None)
+        if span is None:
+            return False
+        self._release(*span)
+        del self._texts[profile_id]
+        self._profiles[self._ordinal.pop(profile_id)] = None
+        return True
+
+    def compact(self) -> None:
+        """Pack live spans to the front of the arena, in profile order."""
+        live = [(profile_id, span) for profile_id, span in self._spans.items()]
+        vectors = np.zeros((max(1, len(self)), self.dim), dtype=self.dtype)
+        owner = np.full(vectors.shape[0], -1, dtype=np.int32)
+        profiles: List[Optional[str]] = []
+        cursor = 0
+        for ordinal, (profile_id, (start, count)) in enumerate(live):
+            vectors[cursor : cursor + count] = self._vectors[start : start + count]
+            owner[cursor : cursor + count] = ordinal
+            self._spans[profile_id] = (cursor, count)
+            self._ordinal[profile_id] = ordinal
+            profiles.append(profile_id)
+            cursor += count
+        self._vectors, self._owner, self._profiles = vectors, owner, profiles
+        self._used, self._garbage = cursor, 0
+
+    def _query(self, query: Union[str, Sequence[float]]) -> np.ndarray:
+        if isinstance(query, str):
+            return encode_texts([query], self.dim)[0]
+        return l2_normalize_rows(np.asarray(query, dtype=np.float32)[None, :])[0]
+
+    def _scores(self, start: int, stop: int, query: np.ndarray) -> np.ndarray:
+        if self.dtype == np.float32:
+            return self._vectors[start:stop] @ query
+        scores = np.empty(stop - start, dtype=np.float32)
+        for block in range(start, stop, _SCAN_BLOCK):
+            end = min(stop, block + _SCAN_BLOCK)
+            scores[block - start : end - start] = self._vectors[block:end].astype(np.float32) @ query
+        return scores
+
+    def search(self, query: Union[str, Sequence[float]], k: int = 5, profile_id: Optional[str] = None) -> List[ChunkHit]:
+        """
+        Top ``k`` chunks by cosine similarity to ``query`` (text or a vector),
+        best first. With ``profile_id`` only that profile's span is scored.
+        """
+        vector = self._query(query)
+        if profile_id is not None:
+            start, count = self._spans.get(profile_id, (0, 0))
+            if not count:
+                return []
+            scores = self._scores(start, start + count, vector)
+            texts = self._texts[profile_id]
+            return [ChunkHit(profile_id, int(i), texts[i], float(scores[i])) for i in top_k_indices(scores, k).tolist()]
+
+        scores = self._scores(0, self._used, vector)
+        owners = self._owner[: self._used]
+        if self._garbage:
+            scores[owners < 0] = -np.inf
+        hits = []
+        for row in top_k_indices(scores, k).tolist():
+            if owners[row] < 0:
+                break
+            owner = self._profiles[owners[row]]
+            chunk = row - self._spans[owner][0]
+            hits.append(ChunkHit(owner, chunk, self._texts[owner][chunk], float(scores[row])))
+        return hits
+
+    def sync_rows(self, profile_id: str) -> List[Dict[str, object]]:
+        """``knowledge_chunks`` rows for ``profile_id``'s current chunks."""
+        start, count = self._spans.get(profile_id, (0, 0))
+        if not count:
+            return []
+        padded = np.zeros((count, max(TABLE_DIM, self.dim)), dtype=np.float32)
+        padded[:, : self.dim] = self._vectors[start : start + count]
+        version = chunk_encoder_version(self.dim)
+        return [
+            {
+                "id": chunk_id(profile_id, i),
+                "profile_id": profile_id,
+                "content": text,
+                "embedding": vector,
+                "metadata": {"chunk": i, "encoder": version},
+            }
+            for i, (text, vector) in enumerate(zip(self._texts[profile_id], padded.tolist()))
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "profiles": len(self._spans),
+            "chunks": len(self),
+            "garbage": self._garbage,
+            "dtype": self.dtype.name,
+            "bytes": int(self._vectors.nbytes + self._owner.nbytes),
+        }
@@ -6,21 +6,66 @@ This is intentionally lightweight so it can run without external models.
 from __future__ import annotations
 
 import hashlib
-from typing import Dict, Iterable, List
+import os
+import re
+import zlib
+from typing import Callable, Dict, Iterable, List, Sequence
 
 import numpy as np
 
+from .lru import LRUCache
+
 EMBED_DIM = 16
+# Knowledge chunks need finer buckets than profile-level features
+CHUNK_DIM = 256
 
 
 def _hash_token(token: str) -> int:
     return int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
 
 
-def encode_text_features(features: Dict[str, object]) -> np.ndarray:
-    """
-    Encode text-like profile fields into a numeric vector.
-    """
+def _crc32_token(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+# Stable token hashes by versioned name. Embeddings built with different
+# schemes are not comparable, so the name is part of ENCODER_VERSION.
+HASH_SCHEMES: Dict[str, Callable[[str], int]] = {
+    "md5-v1": _hash_token,
+    "crc32-v1": _crc32_token,
+}
+
+HASH_SCHEME = os.getenv("GIDI_TOKEN_HASH", "md5-v1")
+if HASH_SCHEME not in HASH_SCHEMES:
+    raise ValueError(f"Unknown GIDI_TOKEN_HASH scheme: {HASH_SCHEME}")
+
+# token -> bucket for the active scheme
+TOKEN_CACHE: LRUCache[str, int] = LRUCache(maxsize=int(os.getenv("GIDI_TOKEN_CACHE_SIZE", "65536")))
+
+
+def encoder_version() -> str:
+    """Tag identifying the text encoder configuration that produced an embedding."""
+    return f"text-{HASH_SCHEME}-d{EMBED_DIM}"
+
+
+def set_hash_scheme(name: str) -> None:
+    """Switch the token hash scheme and drop buckets cached under the old one."""
+    global HASH_SCHEME
+    if name not in HASH_SCHEMES:
+        raise ValueError(f"Unknown token hash scheme: {name}")
+    HASH_SCHEME = name
+    TOKEN_CACHE.clear()
+
+
+def _token_bucket(token: str) -> int:
+    bucket = TOKEN_CACHE.get(token)
+    if bucket is None:
+        bucket = HASH_SCHEMES[HASH_SCHEME](token) % EMBED_DIM
+        TOKEN_CACHE.put(token, bucket)
+    return bucket
+
+
+def _tokenize(features: Dict[str, object]) -> List[str]:
     tokens: List[str] = []
     for key, value in features.items():
         if isinstance(value, str):
@@ -29,12 +74,91 @@ def encode_text_features(features: Dict[str, object]) -> np.ndarray:
             tokens.extend([str(item).lower() for item in value])
         else:
             tokens.append(str(value))
+    return tokens
+
+
+def l2_normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Row-wise L2 normalization shared by every encoder.
+
+    Squares are accumulated column by column in a fixed order (numpy's own
+    reductions pick a summation order based on the array shape), so a
+    profile encodes to the same bits alone or inside a large batch.
+    """
+    squares = np.zeros(matrix.shape[0], dtype=matrix.dtype)
+    for column in matrix.T:
+        squares += column * column
+    norm = np.sqrt(squares)[:, None] + 1e-8
+    return matrix / norm
+
+
+def encode_text_features_batch(features_list: Sequence[Dict[str, object]]) -> np.ndarray:
+    """
+    Encode many profiles into an (N, EMBED_DIM) matrix.
+
+    Every distinct token is hashed once for the whole batch and the bucket
+    counts are accumulated with a single ``bincount``.
+    """
+    bucket_of: Dict[str, int] = {}
+    rows: List[int] = []
+    buckets: List[int] = []
+    for row, features in enumerate(features_list):
+        for token in _tokenize(features):
+            bucket = bucket_of.get(token)
+            if bucket is None:
+                bucket = bucket_of[token] = _token_bucket(token)
+            rows.append(row)
+            buckets.append(bucket)
 
-    vector = np.zeros(EMBED_DIM, dtype=np.float32)
-    for token in tokens:
-        idx = _hash_token(token) % EMBED_DIM
-        vector[idx] += 1.0
+    n = len(features_list)
+    flat = np.asarray(rows, dtype=np.int64) * EMBED_DIM + np.asarray(buckets, dtype=np.int64)
+    counts = np.bincount(flat, minlength=n * EMBED_DIM).astype(np.float32).reshape(n, EMBED_DIM)
 
     # L2 normalize to keep distances meaningful
-    norm = np.linalg.norm(vector) + 1e-8
-    return vector / norm
+    return l2_normalize_rows(counts)
+
+
+def encode_text_features(features: Dict[str, object]) -> np.ndarray:
+    """
+    Encode text-like profile fields into a numeric vector.
+    """
+    return encode_text_features_batch([features])[0]
+
+
+_WORD = re.compile(r"[a-z0-9](?:[a-z0-9+#]|\.(?=[a-z0-9]))*")  # keeps "c++", "three.js"
+# Too common to tell chunks apart
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it my of on or our that the this to was we were with "
+    "you your".split()
+)
+
+
+def chunk_encoder_version(dim: int = CHUNK_DIM) -> str:
+    return f"chunk-{HASH_SCHEME}-d{dim}"
+
+
+def encode_texts(texts: Sequence[str], dim: int = CHUNK_DIM) -> np.ndarray:
+    """
+    Encode free text (knowledge chunks, questions) into an (N, dim) matrix
+    of unit rows: words minus stopwords, hashed into ``dim`` buckets with
+    the active scheme, counts damped with log1p.
+    """
+    hash_token = HASH_SCHEMES[HASH_SCHEME]
+    bucket_of: Dict[str, int] = {}
+    rows: List[int] = []
+    buckets: List[int] = []
+    for row, text in enumerate(texts):
+        for token in _WORD.findall(text.lower()):
+            if token in _STOPWORDS:
+                continue
+            bucket = bucket_of.get(token)
+            if bucket is None:
+                bucket = bucket_of[token] = hash_token(token) % dim
+            rows.append(row)
+            buckets.append(bucket)
+
+    n = len(texts)
+    flat = np.asarray(rows, dtype=np.int64) * dim + np.asarray(buckets, dtype=np.int64)
+    weights = np.log1p(np.bincount(flat, minlength=n * dim).astype(np.float32).reshape(n, dim))
+    # Chunks are never compared across batch sizes, so a plain row norm will do
+    return weights / (np.sqrt(np.einsum("ij,ij->i", weights, weights))[:, None] + 1e-8)
@@ -5,17 +5,18 @@ End-to-end embedding builder combining CV, voice, and interest inputs.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
+from backend.observability.metrics import stage
 from backend.profile_extraction.cv_parser import parse_cv
 from backend.profile_extraction.interest_mapper import normalize_interests
 from backend.profile_extraction.voice_analyzer import analyze_voice
 
-from .fusion_model import fuse_embeddings
-from .text_encoder import encode_text_features
-from .voice_encoder import encode_voice_features
+from .fusion_model import fuse_embeddings, fuse_embeddings_batch, interest_matrix
+from .text_encoder import encode_text_features, encode_text_features_batch, encoder_version
+from .voice_encoder import encode_voice_features, encode_voice_features_batch
 
 
 @dataclass
@@ -28,17 +29,21 @@ class UserProfile:
     interests: Optional[List[str]] = None
 
 
-def embed_user(profile: UserProfile) -> Dict[str, object]:
-    if profile.cv_path:
-        cv_data = parse_cv(profile.cv_path)
-    elif profile.cv_text:
-        from backend.profile_extraction.cv_parser import parse_cv_text
+def _extract(profile: UserProfile) -> Tuple[Dict[str, object], Dict[str, float], Dict[str, float], Dict[str, object]]:
+    """Run the per-profile parsers: (cv_data, voice_features, interest_scores, text_features)."""
+    with stage("cv_parse"):
+        if profile.cv_path:
+            cv_data = parse_cv(profile.cv_path)
+        elif profile.cv_text:
+            from backend.profile_extraction.cv_parser import parse_cv_text
 
-        cv_data = parse_cv_text(profile.cv_text)
-    else:
-        cv_data = {"summary": "", "skills": [], "experience": []}
-    voice_features = analyze_voice(profile.audio_path or "audio_placeholder", transcript=profile.transcript)
-    interest_scores = normalize_interests(profile.interests or [])
+            cv_data = parse_cv_text(profile.cv_text)
+        else:
+            cv_data = {"summary": "", "skills": [], "experience": []}
+    with stage("voice_analysis"):
+        voice_features = analyze_voice(profile.audio_path or "audio_placeholder", transcript=profile.transcript)
+    with stage("interest_mapping"):
+        interest_scores = normalize_interests(profile.interests or [])
 
     text_features = {
         "summary": cv_data.get("summary", ""),
@@ -46,10 +51,18 @@ def embed_user(profile: UserProfile) -> Dict[str, object]:
         "experience": cv_data.get("experience", []),
         "interests": profile.interests or [],
     }
+    return cv_data, voice_features, interest_scores, text_features
+
+
+def embed_user(profile: UserProfile) -> Dict[str, object]:
+    cv_data, voice_features, interest_scores, text_features = _extract(profile)
 
-    text_embedding = encode_text_features(text_features)
-    voice_embedding = encode_voice_features(voice_features)
-    final_embedding = fuse_embeddings(text_embedding, voice_embedding, interest_scores)
+    with stage("text_encode"):
+        text_embedding = encode_text_features(text_features)
+    with stage("voice_encode"):
+        voice_embedding = encode_voice_features(voice_features)
+    with stage("fusion"):
+        final_embedding = fuse_embeddings(text_embedding, voice_embedding, interest_scores)
 
     return {
         "name": profile.name,
@@ -59,8 +72,44 @@ def embed_user(profile: UserProfile) -> Dict[str, object]:
         "interest_scores": interest_scores,
         "cv": cv_data,
         "voice": voice_features,
+        "encoder_version": encoder_version(),
     }
 
 
 def batch_embed(profiles: List[UserProfile]) -> List[Dict[str, object]]:
-    return [embed_user(profile) for profile in profiles]
+    """
+    Embed many profiles at once.
+
+    Parsing stays per profile, but encoding and fusion run on whole (N, D)
+    matrices. Output is identical to calling :func:`embed_user` on each.
+    """
+    if not profiles:
+        return []
+    extracted = [_extract(profile) for profile in profiles]
+
+    # Batch stages are timed per call, not per profile
+    with stage("text_encode_batch"):
+        text_embeddings = encode_text_features_batch([item[3] for item in extracted])
+    with stage("voice_encode_batch"):
+        voice_embeddings = encode_voice_features_batch([item[1] for item in extracted])
+    version = encoder_version()
+    with stage("fusion_batch"):
+        final_embeddings = fuse_embeddings_batch(
+            text_embeddings, voice_embeddings, interest_matrix([item[2] for item in extracted])
+        )
+
+    return [
+        {
+            "name": profile.name,
+            "embedding": final,
+            "text_embedding": text,
+            "voice_embedding": voice,
+            "interest_scores": interest_scores,
+            "cv": cv_data,
+            "voice": voice_features,
+            "encoder_version": version,
+        }
+        for profile, (cv_data, voice_features, interest_scores, _), final, text, voice in zip(
+            profiles, extracted, final_embeddings.tolist(), text_embeddings.tolist(), voice_embeddings.tolist()
+        )
+    ]
@@ -4,23 +4,27 @@ Voice feature encoder that maps scalar traits to a fixed vector.
 
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Sequence
 
 import numpy as np
 
-EMBED_DIM = 8
+from .text_encoder import l2_normalize_rows
 
+EMBED_DIM = 8
+ORDERED_KEYS = ["energy", "warmth", "confidence", "articulation"]
 
-def encode_voice_features(features: Dict[str, float]) -> np.ndarray:
-    ordered_keys = ["energy", "warmth", "confidence", "articulation"]
-    vector = np.zeros(EMBED_DIM, dtype=np.float32)
 
-    for idx, key in enumerate(ordered_keys):
-        vector[idx] = float(features.get(key, 0.0))
+def encode_voice_features_batch(features_list: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Encode many voice trait dicts into an (N, EMBED_DIM) matrix."""
+    traits = np.array(
+        [[float(features.get(key, 0.0)) for key in ORDERED_KEYS] for features in features_list],
+        dtype=np.float32,
+    ).reshape(len(features_list), len(ORDERED_KEYS))
 
     # Repeat values to fill the vector
-    for i in range(len(ordered_keys), EMBED_DIM):
-        vector[i] = vector[i % len(ordered_keys)]
+    matrix = traits[:, np.arange(EMBED_DIM) % len(ORDERED_KEYS)]
+    return l2_normalize_rows(matrix)
 
-    norm = np.linalg.norm(vector) + 1e-8
-    return vector / norm
+
+def encode_voice_features(features: Dict[str, float]) -> np.ndarray:
+    return encode_voice_features_batch([features])[0]
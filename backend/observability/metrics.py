@@ -0,0 +1,279 @@
+"""
+Low-overhead timers, histograms and counters with Prometheus text output.
+
+Pipeline stages, API routes and Supabase calls are timed with
+``time.perf_counter`` into fixed log-spaced histograms (25% wide buckets
+from 1 µs to ~100 s), so recording is one bisect and three adds and p50 /
+p95 / p99 are read back from the buckets within a bucket's width.
+Counters are plain floats. ``collect`` registers a ``stats()``-style
+callable whose numeric values are exported as gauges at scrape time, which
+is how the existing cache and queue stats reach ``/metrics``.
+
+Set ``GIDI_METRICS=0`` to turn recording off: ``span``/``stage`` then hand
+back a shared no-op context manager after one flag check.
+
+Updates are not locked. Under the GIL a racing increment can at worst be
+lost, which is acceptable for monitoring.
+"""
+
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+ENABLED = os.getenv("GIDI_METRICS", "1") != "0"
+
+_GROWTH = 1.25
+BOUNDS: Tuple[float, ...] = tuple(1e-6 * _GROWTH**i for i in range(84))
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def set_enabled(enabled: bool) -> None:
+    global ENABLED
+    ENABLED = enabled
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_right(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the ``q`` quantile, interpolated geometrically inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if bucket == len(BOUNDS):
+                    return self.max
+                lo = BOUNDS[bucket - 1] if bucket else 0.0
+                hi = min(BOUNDS[bucket], self.max)
+                if lo <= 0.0 or hi <= lo:
+                    return hi
+                return lo * (hi / lo) ** ((rank - seen) / n)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        result = {f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES}
+        result.update(count=self.count, mean=self.sum / self.count if self.count else 0.0, max=self.max)
+        return result
+
+
+class _Span:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._histogram.observe(perf_counter() - self._start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, object]]]] = []
+        self._stages: Dict[str, Histogram] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def stage(self, name: str) -> Histogram:
+        """``gidi_stage_seconds{stage=name}``, cached by name for the hot path."""
+        histogram = self._stages.get(name)
+        if histogram is None:
+            histogram = self._stages[name] = self.histogram("gidi_stage_seconds", stage=name)
+        return histogram
+
+    def collect(self, prefix: str, source: Callable[[], Dict[str, object]]) -> None:
+        """Export the numeric values of ``source()`` as ``gidi_<prefix>_<key>`` gauges."""
+        self._collectors.append((prefix, source))
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.counters.clear()
+        self._stages.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99, count, mean and max per histogram series, keyed like Prometheus."""
+        return {_series(name, labels): histogram.summary() for (name, labels), histogram in self.histograms.items()}
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4); histograms are exported as summaries."""
+        lines: List[str] = []
+        typed = set()
+
+        def header(name: str, kind: str) -> None:
+            if name in typed:
+                return
+            typed.add(name)
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, "summary")
+            for q in QUANTILES:
+                lines.append(f"{_series(name, labels + (('quantile', str(q)),))} {histogram.quantile(q):.9g}")
+            lines.append(f"{_series(name + '_sum', labels)} {histogram.sum:.9g}")
+            lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{_series(name, labels)} {value:.9g}")
+        for prefix, source in self._collectors:
+            try:
+                stats = source()
+            except Exception as e:
+                print(f"Warning: metrics collector {prefix} failed: {e}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"gidi_{prefix}_{key}"
+                header(name, "gauge")
+                lines.append(f"{name} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+REGISTRY = Registry()
+REGISTRY.describe("gidi_stage_seconds", "Time spent in one pipeline stage.")
+REGISTRY.describe("gidi_request_seconds", "HTTP request latency per route template.")
+REGISTRY.describe("gidi_request_errors_total", "HTTP responses with a 5xx status per route template.")
+REGISTRY.describe("gidi_supabase_seconds", "Latency of blocking Supabase client calls.")
+REGISTRY.describe("gidi_supabase_errors_total", "Supabase client calls that raised.")
+
+
+def stage(name: str):
+    """``with stage("cv_parse"): ...`` times the block into ``gidi_stage_seconds``."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(REGISTRY.stage(name))
+
+
+def span(name: str, **labels: str):
+    """Time a block into histogram ``name`` with ``labels``."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(REGISTRY.histogram(name, **labels))
+
+
+def inc(name: str, amount: float = 1.0, **labels: str) -> None:
+    if ENABLED:
+        REGISTRY.inc(name, amount, **labels)
+
+
+class _SupabaseSpan(_Span):
+    __slots__ = ("_op", "_table")
+
+    def __init__(self, op: str, table: str) -> None:
+        super().__init__(REGISTRY.histogram("gidi_supabase_seconds", op=op, table=table))
+        self._op = op
+        self._table = table
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        super().__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            REGISTRY.inc("gidi_supabase_errors_total", op=self._op, table=self._table)
+        return False
+
+
+def supabase_call(op: str, table: str):
+    """Time a blocking Supabase call and count it as an error if it raises."""
+    if not ENABLED:
+        return _NOOP
+    return _SupabaseSpan(op, table)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request into ``gidi_request_seconds``
+    labelled with the matched route template (``/profiles/{profile_id}``,
+    not the raw path) so series stay bounded.
+    """
+
+    def __init__(self, app, registry: Optional[Registry] = None) -> None:
+        self.app = app
+        self.registry = registry or REGISTRY
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        start = perf_counter()
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            self.registry.histogram("gidi_request_seconds", method=method, route=route).observe(perf_counter() - start)
+            if status >= 500:
+                self.registry.inc("gidi_request_errors_total", method=method, route=route)
@@ -3,14 +3,24 @@ Lightweight CV/LinkedIn parsing for demo users.
 
 This keeps dependencies minimal by using keyword spotting instead of heavy NLP.
 The output is a simple profile dictionary consumed by the embedding pipeline.
+
+Files are read as a stream of segments (text lines, or the values of a JSON
+array/object decoded one at a time) and summary, skills and experience are
+collected in a single pass that stops once the experience cap is reached.
+Only a digest of the text read is kept, not the text itself; the avatar
+knowledge store re-reads the file as overlapping word windows instead
+(:func:`chunk_cv`).
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import re
 from pathlib import Path
-from typing import Dict, List
+from typing import IO, Dict, Iterable, Iterator, List
+
+from .keyword_matcher import KeywordMatcher
 
 SKILL_KEYWORDS = {
     "python",
@@ -36,58 +46,203 @@ SKILL_KEYWORDS = {
 }
 
 
-def _read_text(path: Path) -> str:
-    if path.suffix.lower() == ".json":
-        with path.open("r", encoding="utf-8") as f:
-            payload = json.load(f)
-        if isinstance(payload, dict):
-            return " ".join(str(v) for v in payload.values())
-        if isinstance(payload, list):
-            return " ".join(str(item) for item in payload)
-    return path.read_text(encoding="utf-8")
+# Compiled once; rebuild if SKILL_KEYWORDS is changed at runtime
+SKILL_MATCHER = KeywordMatcher({skill: [skill] for skill in SKILL_KEYWORDS})
 
+# Bump when parsing output changes (part of the embedding cache fingerprint)
+PARSER_VERSION = "stream-v1"
+SUMMARY_CHARS = 280
+MAX_EXPERIENCE = 5
+_YEAR = re.compile(r"\b(20\d{2}|19\d{2})\b")
+_JSON_CHUNK = 1 << 16
+# Knowledge chunks: words per window and words shared with the previous one
+CHUNK_WORDS = 48
+CHUNK_OVERLAP = 12
 
-def _extract_skills(text: str) -> List[str]:
-    lowered = text.lower()
-    return sorted({skill for skill in SKILL_KEYWORDS if skill in lowered})
 
+def _iter_json_values(f: IO[str], decoder: json.JSONDecoder, buffer: str) -> Iterator[object]:
+    """
+    Decode the elements of a top-level JSON array (or the values of an
+    object) one at a time, reading ``f`` in chunks.
+    """
+    is_object = buffer[0] == "{"
+    closing = "}" if is_object else "]"
+    pos = 1
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(_JSON_CHUNK)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos] if pos < len(buffer) else ""
+
+    def decode() -> object:
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buffer) and not eof and fill():
+                continue
+            pos = end
+            return value
+
+    if skip_ws() == closing:
+        return
+    while True:
+        skip_ws()
+        if is_object:
+            decode()
+            if skip_ws() != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", buffer, pos)
+            pos += 1
+            skip_ws()
+        yield decode()
+        delimiter = skip_ws()
+        pos += 1
+        if delimiter == closing:
+            return
+        if delimiter != ",":
+            raise json.JSONDecodeError(f"Expecting ',' or '{closing}'", buffer, pos - 1)
+
+
+def _iter_segments(f: IO[str], is_json: bool) -> Iterator[str]:
+    """Text of the CV in reading order, split at line / JSON item boundaries."""
+    if is_json:
+        buffer = f.read(_JSON_CHUNK).lstrip()
+        if buffer[:1] in ("[", "{"):
+            decoder = json.JSONDecoder()
+            for i, value in enumerate(_iter_json_values(f, decoder, buffer)):
+                yield str(value) if i == 0 else " " + str(value)
+            return
+        # Not a container: treat the file as plain text
+        yield buffer
+    yield from f
+
+
+def parse_cv_segments(segments: Iterable[str], max_experience: int = MAX_EXPERIENCE) -> Dict[str, object]:
+    """
+    Single pass over ``segments``: the first 280 chars become the summary,
+    skills are matched across segment boundaries, and lines with a year or
+    the word "experience" are kept until ``max_experience`` are found, at
+    which point reading stops.
+    """
+    summary_parts: List[str] = []
+    summary_len = 0
+    scan = SKILL_MATCHER.scan()
+    experience: List[str] = []
+    digest = hashlib.sha256()
+    chars = 0
+    truncated = False
+
+    for segment in segments:
+        if len(experience) >= max_experience and summary_len > SUMMARY_CHARS:
+            truncated = True
+            break
+        digest.update(segment.encode("utf-8"))
+        chars += len(segment)
+        if summary_len <= SUMMARY_CHARS:
+            summary_parts.append(segment[: SUMMARY_CHARS + 1 - summary_len])
+            summary_len += len(summary_parts[-1])
+        scan.feed(segment)
+        for line in segment.splitlines():
+            if len(experience) >= max_experience:
+                break
+            if _YEAR.search(line) or "experience" in line.lower():
+                experience.append(line.strip())
+
+    head = "".join(summary_parts)
+    summary = head[:SUMMARY_CHARS].replace("\n", " ") + ("..." if len(head) > SUMMARY_CHARS else "")
+    return {
+        "summary": summary,
+        "skills": sorted(scan.count_labels()),
+        "experience": experience,
+        "digest": digest.hexdigest(),
+        "chars": chars,
+        "truncated": truncated,
+    }
 
-def _extract_experience(text: str) -> List[str]:
-    experience_lines = []
-    for line in text.splitlines():
-        if re.search(r"\b(20\d{2}|19\d{2})\b", line):
-            experience_lines.append(line.strip())
-        elif "experience" in line.lower():
-            experience_lines.append(line.strip())
-    return experience_lines[:5]
+
+def count_skills(text: str) -> Dict[str, int]:
+    """Whole-word hit count per skill keyword in one pass over ``text``."""
+    return SKILL_MATCHER.count_labels(text)
 
 
 def parse_cv_text(raw_text: str) -> Dict[str, object]:
     """
     Parse raw text into structured fields.
     """
-    skills = _extract_skills(raw_text)
-    experience = _extract_experience(raw_text)
+    return parse_cv_segments(raw_text.splitlines(keepends=True))
 
-    summary = raw_text[:280].replace("\n", " ") + ("..." if len(raw_text) > 280 else "")
 
-    return {
-        "summary": summary,
-        "skills": skills,
-        "experience": experience,
-        "raw_text": raw_text,
-    }
-
-
-def parse_cv(cv_path: str) -> Dict[str, object]:
+def parse_cv(cv_path: str, max_experience: int = MAX_EXPERIENCE) -> Dict[str, object]:
     """
     Parse a resume or LinkedIn export into structured fields.
 
-    Returns a dict with keys: summary, skills, experience, raw_text.
+    Returns a dict with keys: summary, skills, experience, digest (SHA-256
+    of the text read), chars and truncated.
+    """
+    path = Path(cv_path)
+    if not path.exists():
+        raise FileNotFoundError(f"CV path not found: {cv_path}")
+
+    with path.open("r", encoding="utf-8") as f:
+        return parse_cv_segments(_iter_segments(f, path.suffix.lower() == ".json"), max_experience)
+
+
+def chunk_segments(segments: Iterable[str], words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """
+    Overlapping windows of ``words`` words streamed from ``segments``; each
+    window repeats the last ``overlap`` words of the one before it. Words
+    split across segment boundaries are rejoined.
     """
+    if not 0 <= overlap < words:
+        raise ValueError("overlap must be smaller than words")
+    window: List[str] = []
+    fresh = 0  # words in ``window`` not yet emitted
+    carry = ""
+    for segment in segments:
+        text = carry + segment
+        parts = text.split()
+        carry = parts.pop() if parts and not text[-1].isspace() else ""
+        window.extend(parts)
+        fresh += len(parts)
+        while len(window) >= words:
+            yield " ".join(window[:words])
+            window = window[words - overlap :]
+            fresh = len(window) - overlap
+    if carry:
+        window.append(carry)
+        fresh += 1
+    if fresh > 0:
+        yield " ".join(window)
+
+
+def chunk_cv_text(raw_text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    return list(chunk_segments(raw_text.splitlines(keepends=True), words, overlap))
+
+
+def chunk_cv(cv_path: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Overlapping word windows over a resume or LinkedIn export (see :func:`chunk_segments`)."""
     path = Path(cv_path)
     if not path.exists():
         raise FileNotFoundError(f"CV path not found: {cv_path}")
 
-    raw_text = _read_text(path)
-    return parse_cv_text(raw_text)
+    with path.open("r", encoding="utf-8") as f:
+        return list(chunk_segments(_iter_segments(f, path.suffix.lower() == ".json"), words, overlap))
@@ -6,11 +6,14 @@ from __future__ import annotations
 
 from typing import Dict, List, Set
 
+from .keyword_matcher import KeywordMatcher
+
 TAXONOMY = {
     "ai": {"ai", "artificial intelligence", "machine learning", "ml"},
     "llm": {"llm", "large language model", "chatgpt", "gpt"},
     "nlp": {"nlp", "language", "text"},
-    "audio": {"voice", "audio", "speech"},
+    # Compound phrases outrank their parts: "text to speech" is audio, not nlp
+    "audio": {"voice", "audio", "speech", "text to speech", "speech to text", "tts"},
     "web": {"frontend", "javascript", "three.js", "react", "webrtc"},
     "gaming": {"unity", "unreal", "game"},
     "product": {"product", "pm"},
@@ -18,17 +21,31 @@ TAXONOMY = {
 }
 
 
+TAXONOMY_MATCHER = KeywordMatcher(TAXONOMY)
+
+
+def count_interest_buckets(text: str) -> Dict[str, int]:
+    """Whole-word taxonomy keyword hits per bucket in free text (e.g. a CV)."""
+    return TAXONOMY_MATCHER.count_labels(text)
+
+
 def normalize_interests(raw_interests: List[str]) -> Dict[str, float]:
     """
     Assign a soft score per taxonomy bucket based on matched interests.
+
+    Keywords match whole tokens inside each interest, leftmost-longest, so a
+    listed phrase counts only as itself and not also as the words in it.
     """
     scores: Dict[str, float] = {bucket: 0.0 for bucket in TAXONOMY.keys()}
-    lowered: Set[str] = {item.lower() for item in raw_interests}
-
-    for bucket, keywords in TAXONOMY.items():
-        hits = lowered.intersection(keywords)
-        if hits:
-            scores[bucket] = min(1.0, len(hits) / len(keywords) + 0.2)
+    hits: Dict[str, Set[str]] = {}
+    # Match each interest on its own so phrases never span two entries
+    for item in raw_interests:
+        for keyword, buckets in TAXONOMY_MATCHER.match(item):
+            for bucket in buckets:
+                hits.setdefault(bucket, set()).add(keyword)
+
+    for bucket, matched in hits.items():
+        scores[bucket] = min(1.0, len(matched) / len(TAXONOMY[bucket]) + 0.2)
 
     # Soft fallback: boost AI if nothing else
     if all(value == 0.0 for value in scores.values()):
@@ -0,0 +1,200 @@
+"""
+Multi-keyword matcher over word tokens (Aho-Corasick on a token trie).
+
+Text is lowercased and split into word tokens in one regex pass; keywords
+are tokenized the same way and compiled once into an automaton whose edges
+are whole tokens. A single walk over the tokens reports every keyword, so
+cost is linear in the text and independent of vocabulary size. Matching
+whole tokens gives word boundaries for free: "ml" does not match inside
+"html". Tokens keep interior dots and trailing ``+``/``#`` so "three.js",
+"c++" and "c#" stay single words.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Bump when tokenization or match semantics change (part of the embedding cache fingerprint)
+MATCHER_VERSION = "tokens-v1"
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9][a-z0-9+#]*)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class KeywordMatcher:
+    """
+    Built from ``{label: keywords}``; a keyword may belong to several labels.
+
+    Overlapping hits are resolved leftmost-longest, so "large language model"
+    counts once as that phrase and not also as "language".
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]) -> None:
+        self.terms: List[str] = []
+        self._term_ids: Dict[Tuple[str, ...], int] = {}
+        self._term_len: List[int] = []
+        self._labels: List[Tuple[str, ...]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+        for label, keywords in groups.items():
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if not tokens:
+                    continue
+                term = self._term_ids.get(tokens)
+                if term is None:
+                    term = self._add(tokens, keyword.lower())
+                if label not in self._labels[term]:
+                    self._labels[term] += (label,)
+        self._fail = self._build_fail_links()
+
+    def _add(self, tokens: Tuple[str, ...], text: str) -> int:
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._out.append([])
+            state = nxt
+        term = len(self.terms)
+        self.terms.append(text)
+        self._term_ids[tokens] = term
+        self._term_len.append(len(tokens))
+        self._labels.append(())
+        self._out[state].append(term)
+        return term
+
+    def _build_fail_links(self) -> List[int]:
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                back = fail[state]
+                while back and token not in self._goto[back]:
+                    back = fail[back]
+                target = self._goto[back].get(token, 0)
+                fail[nxt] = target if target != nxt else 0
+                # Inherit keywords that end here via a shorter suffix
+                self._out[nxt] = self._out[nxt] + self._out[fail[nxt]]
+        return fail
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def scan(self) -> "KeywordScan":
+        """Incremental matcher state for text that arrives in pieces (e.g. file lines)."""
+        return KeywordScan(self)
+
+    def match(self, text: str) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Every hit in text order, as ``(keyword, labels)``."""
+        scan = KeywordScan(self, keep_hits=True)
+        scan.feed(text)
+        return [(self.terms[term], self._labels[term]) for _, term in scan.hits()]
+
+    def count_terms(self, text: str) -> Dict[str, int]:
+        """Hit count per matched keyword."""
+        scan = KeywordScan(self)
+        scan.feed(text)
+        return scan.count_terms()
+
+    def count_labels(self, text: str) -> Dict[str, int]:
+        """Hit count per label (skill or taxonomy bucket)."""
+        scan = KeywordScan(self)
+        scan.feed(text)
+        return scan.count_labels()
+
+
+class KeywordScan:
+    """
+    Automaton walk that can be fed text piece by piece. Pieces must break
+    between tokens (line or item boundaries); phrases may span pieces.
+    Hits are resolved as soon as no longer phrase can overlap them, so
+    memory stays bounded however much text is fed.
+    """
+
+    def __init__(self, matcher: KeywordMatcher, keep_hits: bool = False) -> None:
+        self.matcher = matcher
+        self._state = 0
+        self._position = 0
+        self._pending: List[Tuple[int, int]] = []
+        self._counts: Dict[int, int] = {}
+        # Ordered hits are only kept when asked for; counts are always kept
+        self._chosen: Optional[List[Tuple[int, int]]] = [] if keep_hits else None
+        self._free = 0
+        self._max_len = max(matcher._term_len, default=1)
+
+    def feed(self, text: str) -> None:
+        m = self.matcher
+        goto, fail, out, term_len = m._goto, m._fail, m._out, m._term_len
+        root = goto[0]
+        pending = self._pending
+        state = self._state
+        i = self._position - 1
+        for i, token in enumerate(tokenize(text), start=self._position):
+            if state:
+                while state and token not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(token, 0)
+            else:
+                # Most tokens are not keywords; skip them with one dict probe
+                state = root.get(token, 0)
+                if not state:
+                    continue
+            if out[state]:
+                for term in out[state]:
+                    pending.append((i - term_len[term] + 1, term))
+        self._state = state
+        self._position = i + 1
+        if len(pending) > 64:
+            # Later hits start at or after this position, so earlier ones are final
+            self._resolve(self._position - self._max_len + 1)
+
+    def _resolve(self, before: int) -> None:
+        """Pick leftmost-longest, non-overlapping hits among those starting before ``before``."""
+        term_len = self.matcher._term_len
+        self._pending.sort(key=lambda hit: (hit[0], -term_len[hit[1]]))
+        split = 0
+        for start, term in self._pending:
+            if start >= before:
+                break
+            split += 1
+            if start >= self._free:
+                self._counts[term] = self._counts.get(term, 0) + 1
+                if self._chosen is not None:
+                    self._chosen.append((start, term))
+                self._free = start + term_len[term]
+        del self._pending[:split]
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._resolve(self._position + 1)
+
+    def hits(self) -> List[Tuple[int, int]]:
+        """Non-overlapping ``(token_position, term_id)`` hits, leftmost-longest."""
+        if self._chosen is None:
+            raise ValueError("scan was created without keep_hits")
+        self._flush()
+        return list(self._chosen)
+
+    def count_terms(self) -> Dict[str, int]:
+        self._flush()
+        terms = self.matcher.terms
+        return {terms[term]: count for term, count in self._counts.items()}
+
+    def count_labels(self) -> Dict[str, int]:
+        self._flush()
+        labels = self.matcher._labels
+        counts: Dict[str, int] = {}
+        for term, count in self._counts.items():
+            for label in labels[term]:
+                counts[label] = counts.get(label, 0) + count
+        return counts
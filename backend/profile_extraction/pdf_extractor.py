@@ -0,0 +1,172 @@
+"""
+Bounded PDF text extraction for CV uploads.
+
+Pages are parsed one at a time and extraction stops as soon as the
+character budget is filled, so a 500-page upload costs about as much as
+its first few pages. Parsing runs in a small process pool: PyPDF2 is pure
+Python and holds the GIL, and a malformed file can spin for a long time,
+so each job gets a timeout after which the pool's workers are replaced.
+ProcessPoolExecutor cannot tell which worker runs which job, so the other
+jobs running in that pool are lost with it; they are run again, once, on
+the fresh pool instead of failing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+DEFAULT_CHAR_LIMIT = 10_000
+
+
+class PdfExtractionError(Exception):
+    pass
+
+
+class PdfExtractionBusy(PdfExtractionError):
+    """Every worker slot and queue slot is taken."""
+
+
+class PdfExtractionTimeout(PdfExtractionError):
+    pass
+
+
+def extract_pdf_text(path: str, char_limit: int = DEFAULT_CHAR_LIMIT) -> Dict[str, object]:
+    """
+    Whitespace-normalized text of the PDF at ``path``, truncated to ``char_limit``.
+
+    ``pages_read`` is how many pages were parsed before the budget was met;
+    ``truncated`` is True when text was cut or pages were skipped.
+    """
+    import PyPDF2
+
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        parts: List[str] = []
+        size = 0
+        pages_read = 0
+        for page in reader.pages:
+            pages_read += 1
+            text = " ".join((page.extract_text() or "").split())
+            if not text:
+                continue
+            parts.append(text)
+            size += len(text) + (1 if len(parts) > 1 else 0)
+            if size >= char_limit:
+                break
+    text = " ".join(parts)
+    return {
+        "text": text[:char_limit],
+        "page_count": page_count,
+        "pages_read": pages_read,
+        "char_count": min(len(text), char_limit),
+        "truncated": len(text) > char_limit or pages_read < page_count,
+    }
+
+
+class PdfExtractionPool:
+    """
+    Runs :func:`extract_pdf_text` in at most ``max_workers`` processes.
+
+    Up to ``max_pending`` further jobs wait for a worker; beyond that
+    :meth:`extract` raises :class:`PdfExtractionBusy` instead of queueing
+    without bound.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, timeout: float = 20.0) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._killed: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self._waiting = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.retried = 0
+        self.rejected = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs background threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _kill_workers(self, executor: ProcessPoolExecutor) -> None:
+        """Stop a stuck job; ProcessPoolExecutor cannot cancel one that is running."""
+        if self._executor is executor:
+            self._executor = None
+        if executor in self._killed:
+            return
+        self._killed.add(executor)
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        # Jobs still running in it fail with BrokenProcessPool and are retried
+        executor.shutdown(wait=False)
+
+    async def extract(self, path: str, char_limit: int = DEFAULT_CHAR_LIMIT) -> Dict[str, object]:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_workers), loop
+        if self._slots.locked() and self._waiting >= self.max_pending:
+            self.rejected += 1
+            raise PdfExtractionBusy("PDF extraction queue is full")
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            for attempt in range(2):
+                executor = self._pool()
+                future = loop.run_in_executor(executor, extract_pdf_text, path, char_limit)
+                try:
+                    result = await asyncio.wait_for(future, timeout=self.timeout)
+                    break
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    self._kill_workers(executor)
+                    raise PdfExtractionTimeout(f"PDF extraction took longer than {self.timeout:g}s")
+                except BrokenProcessPool as e:
+                    if self._executor is executor:
+                        self._executor = None
+                    # Killed for another job's timeout: this one did nothing wrong, run it again
+                    if attempt or executor not in self._killed:
+                        raise PdfExtractionError(str(e)) from e
+                    self.retried += 1
+        finally:
+            self._slots.release()
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "workers": self.max_workers,
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "retried": self.retried,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def default_pool() -> PdfExtractionPool:
+    return PdfExtractionPool(
+        max_workers=int(os.getenv("GIDI_PDF_WORKERS", "2")),
+        max_pending=int(os.getenv("GIDI_PDF_QUEUE", "8")),
+        timeout=float(os.getenv("GIDI_PDF_TIMEOUT", "20")),
+    )
@@ -0,0 +1,220 @@
+"""
+Approximate nearest-neighbor search with an inverted-file (IVF) index.
+
+Embeddings are partitioned by spherical k-means into ``nlist`` coarse cells.
+A query only scores the members of its ``nprobe`` closest cells, so
+``nprobe`` is the recall/latency knob: ``nprobe == nlist`` is exact search.
+Until enough rows exist to train the quantizer, searches fall back to the
+exact brute-force path of :class:`EmbeddingIndex`.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .kmeans import assign_to_centroids, spherical_kmeans
+from .knn_clustering import EmbeddingIndex, normalize_rows, top_k_indices
+
+
+class IVFIndex(EmbeddingIndex):
+    """
+    Inverted-file index over the dense matrix of :class:`EmbeddingIndex`.
+
+    Each cell keeps a growable array of row numbers; inserts append to the
+    nearest cell and deletes swap-remove, so both are O(1) after the
+    quantizer is trained. The quantizer is retrained when the index has
+    grown by ``retrain_factor`` since the last fit.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 2048,
+        retrain_factor: float = 4.0,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(dim=dim)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._cells: List[np.ndarray] = []
+        self._cell_sizes = np.zeros(0, dtype=np.int64)
+        self._cell_of_row = np.zeros(0, dtype=np.int64)
+        self._pos_of_row = np.zeros(0, dtype=np.int64)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    # -- cell bookkeeping -------------------------------------------------
+
+    def _grow_side_tables(self) -> None:
+        needed = self._matrix.shape[0]
+        if self._cell_of_row.shape[0] < needed:
+            self._cell_of_row = np.resize(self._cell_of_row, needed)
+            self._pos_of_row = np.resize(self._pos_of_row, needed)
+
+    def _cell_add(self, row: int, cell: int) -> None:
+        size = self._cell_sizes[cell]
+        members = self._cells[cell]
+        if size == members.shape[0]:
+            members = np.resize(members, max(8, size * 2))
+            self._cells[cell] = members
+        members[size] = row
+        self._cell_of_row[row] = cell
+        self._pos_of_row[row] = size
+        self._cell_sizes[cell] = size + 1
+
+    def _cell_remove(self, row: int) -> None:
+        cell = self._cell_of_row[row]
+        pos = self._pos_of_row[row]
+        last = self._cell_sizes[cell] - 1
+        members = self._cells[cell]
+        tail = members[last]
+        members[pos] = tail
+        self._pos_of_row[tail] = pos
+        self._cell_sizes[cell] = last
+
+    def _on_row_moved(self, old_row: int, new_row: int) -> None:
+        if not self.is_trained:
+            return
+        cell = self._cell_of_row[old_row]
+        pos = self._pos_of_row[old_row]
+        self._cells[cell][pos] = new_row
+        self._cell_of_row[new_row] = cell
+        self._pos_of_row[new_row] = pos
+
+    # -- training ---------------------------------------------------------
+
+    def train(self, nlist: Optional[int] = None, sample_size: int = 65536) -> None:
+        """Fit the coarse quantizer on the current rows and rebuild every cell."""
+        n = len(self)
+        if n == 0:
+            return
+        nlist = nlist or self.nlist or max(1, int(np.sqrt(n)))
+        data = self._matrix[:n]
+        if n > sample_size:
+            sample = data[np.random.default_rng(self.seed).choice(n, size=sample_size, replace=False)]
+        else:
+            sample = data
+        self.centroids, _, _ = spherical_kmeans(sample, nlist, seed=self.seed)
+        self._trained_size = n
+        self._rebuild_cells()
+
+    def _rebuild_cells(self) -> None:
+        n = len(self)
+        nlist = self.centroids.shape[0]
+        self._grow_side_tables()
+        labels, _ = assign_to_centroids(self._matrix[:n], self.centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=nlist)
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        self._cells = [order[bounds[c] : bounds[c + 1]].astype(np.int64) for c in range(nlist)]
+        self._cell_sizes = counts.astype(np.int64)
+        self._cell_of_row[:n] = labels
+        for members in self._cells:
+            self._pos_of_row[members] = np.arange(members.shape[0])
+
+    def _maybe_train(self) -> None:
+        n = len(self)
+        if not self.is_trained:
+            if n >= self.min_train_size:
+                self.train()
+        elif n >= self._trained_size * self.retrain_factor:
+            self.train()
+
+    # -- mutation ---------------------------------------------------------
+
+    def upsert(self, key: str, embedding: Sequence[float]) -> None:
+        existing = self._rows.get(key)
+        super().upsert(key, embedding)
+        if self.is_trained:
+            row = self._rows[key]
+            self._grow_side_tables()
+            if existing is not None:
+                self._cell_remove(row)
+            cell = int(np.argmax(self.centroids @ self._matrix[row]))
+            self._cell_add(row, cell)
+        self._maybe_train()
+
+    def upsert_many(self, keys: Sequence[str], embeddings: np.ndarray) -> None:
+        if not self.is_trained:
+            super().upsert_many(keys, embeddings)
+            self._maybe_train()
+            return
+        for key, vector in zip(keys, normalize_rows(embeddings)):
+            self.upsert(key, vector)
+
+    def adopt(self, keys: Sequence[str], matrix: np.ndarray) -> None:
+        self.clear()
+        super().adopt(keys, matrix)
+        self._maybe_train()
+
+    def remove(self, key: str) -> bool:
+        row = self._rows.get(key)
+        if row is None:
+            return False
+        if self.is_trained:
+            self._cell_remove(row)
+        return super().remove(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self.centroids = None
+        self._trained_size = 0
+        self._cells = []
+        self._cell_sizes = np.zeros(0, dtype=np.int64)
+
+    # -- search -----------------------------------------------------------
+
+    def search(self, query: Sequence[float], k: int = 5, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        return self.search_batch(np.asarray(query, dtype=np.float32)[None, :], k=k, nprobe=nprobe)[0]
+
+    def search_batch(
+        self, queries: np.ndarray, k: int = 5, nprobe: Optional[int] = None
+    ) -> List[List[Tuple[str, float]]]:
+        if not self.is_trained:
+            return super().search_batch(queries, k=k)
+        queries = normalize_rows(queries)
+        nprobe = min(nprobe or self.nprobe, self.centroids.shape[0])
+        probes = top_k_indices(queries @ self.centroids.T, nprobe)
+
+        results: List[List[Tuple[str, float]]] = []
+        keys = self._keys
+        for query, cells in zip(queries, probes):
+            candidates = np.concatenate([self._cells[c][: self._cell_sizes[c]] for c in cells])
+            if candidates.size == 0:
+                results.append([])
+                continue
+            sims = self._matrix[candidates] @ query
+            best = top_k_indices(sims, k)
+            results.append([(keys[candidates[i]], 1.0 - float(sims[i])) for i in best])
+        return results
+
+
+def make_index(kind: Optional[str] = None) -> EmbeddingIndex:
+    """
+    Build the k-NN index selected by ``kind`` or the ``GIDI_KNN_INDEX`` env var.
+
+    ``exact`` (default) is brute force; ``ivf`` is :class:`IVFIndex`, tuned by
+    ``GIDI_IVF_NPROBE`` and ``GIDI_IVF_NLIST``.
+    """
+    kind = (kind or os.getenv("GIDI_KNN_INDEX", "exact")).lower()
+    if kind == "exact":
+        return EmbeddingIndex()
+    if kind == "ivf":
+        nlist = os.getenv("GIDI_IVF_NLIST")
+        return IVFIndex(
+            nlist=int(nlist) if nlist else None,
+            nprobe=int(os.getenv("GIDI_IVF_NPROBE", "8")),
+        )
+    raise ValueError(f"Unknown k-NN index kind: {kind}")
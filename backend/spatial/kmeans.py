@@ -0,0 +1,151 @@
+"""
+Spherical k-means on L2-normalized embeddings.
+
+Similarity is the dot product, so centroids are re-normalized after every
+update and inertia is reported as the summed cosine distance to the
+assigned centroid.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+from .knn_clustering import normalize_rows, top_k_indices
+
+
+def assign_to_centroids(data: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(labels, similarities)`` of each row's closest centroid."""
+    labels = np.empty(data.shape[0], dtype=np.int64)
+    sims = np.empty(data.shape[0], dtype=np.float32)
+    for start in range(0, data.shape[0], chunk):
+        block = data[start : start + chunk] @ centroids.T
+        labels[start : start + chunk] = block.argmax(axis=1)
+        sims[start : start + chunk] = block[np.arange(block.shape[0]), labels[start : start + chunk]]
+    return labels, sims
+
+
+def spherical_kmeans(
+    data: np.ndarray, n_clusters: int, n_iter: int = 20, seed: int = 0, tol: float = 1e-4
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Lloyd iterations of cosine k-means.
+
+    Returns ``(centroids, labels, inertia)``. Empty clusters are re-seeded
+    from the points worst served by their current centroid.
+    """
+    data = normalize_rows(data)
+    n = data.shape[0]
+    n_clusters = max(1, min(n_clusters, n))
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(n, size=n_clusters, replace=False)].copy()
+
+    inertia = float("inf")
+    labels = np.zeros(n, dtype=np.int64)
+    for _ in range(n_iter):
+        labels, sims = assign_to_centroids(data, centroids)
+        new_inertia = float(np.sum(1.0 - sims))
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            worst = np.argsort(sims)[: empty.size]
+            sums[empty] = data[worst]
+        centroids = normalize_rows(sums)
+
+        if inertia - new_inertia <= tol * max(new_inertia, 1e-12):
+            inertia = new_inertia
+            break
+        inertia = new_inertia
+
+    labels, sims = assign_to_centroids(data, centroids)
+    return centroids, labels, float(np.sum(1.0 - sims))
+
+
+def minibatch_kmeans(
+    data: np.ndarray,
+    n_clusters: int,
+    batch_size: int = 2048,
+    n_iter: int = 30,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Mini-batch spherical k-means (Sculley, 2010) returning unit centroids.
+
+    Each step assigns one random batch and moves every touched centroid
+    towards the batch mean with a per-centroid learning rate of
+    ``batch_count / total_count``, all as whole-array operations.
+    """
+    data = normalize_rows(data)
+    n = data.shape[0]
+    n_clusters = max(1, min(n_clusters, n))
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(n, size=n_clusters, replace=False)].copy()
+    totals = np.zeros(n_clusters, dtype=np.float64)
+
+    for _ in range(n_iter):
+        batch = data[rng.integers(0, n, size=min(batch_size, n))]
+        labels = (batch @ centroids.T).argmax(axis=1)
+        counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, batch)
+        touched = counts > 0
+        totals[touched] += counts[touched]
+        rate = (counts[touched] / totals[touched]).astype(np.float32)[:, None]
+        means = sums[touched] / counts[touched, None]
+        centroids[touched] = (1.0 - rate) * centroids[touched] + rate * means
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+def capacity_assign(
+    data: np.ndarray, centroids: np.ndarray, capacity: int, n_candidates: int = 8, chunk: int = 8192
+) -> np.ndarray:
+    """
+    Assign every row to a centroid without exceeding ``capacity`` per centroid.
+
+    Rows first compete for their closest centroid, most similar first; rows
+    that do not fit fall through to their next preference for
+    ``n_candidates`` rounds. Stragglers take the closest centroid with room
+    left. Requires ``capacity * len(centroids) >= len(data)``.
+    """
+    n, n_clusters = data.shape[0], centroids.shape[0]
+    if capacity * n_clusters < n:
+        raise ValueError("Not enough total capacity for every row")
+    n_candidates = min(n_candidates, n_clusters)
+
+    prefs = np.empty((n, n_candidates), dtype=np.int64)
+    pref_sims = np.empty((n, n_candidates), dtype=np.float32)
+    for start in range(0, n, chunk):
+        sims = data[start : start + chunk] @ centroids.T
+        top = top_k_indices(sims, n_candidates)
+        prefs[start : start + chunk] = top
+        pref_sims[start : start + chunk] = np.take_along_axis(sims, top, axis=1)
+
+    labels = np.full(n, -1, dtype=np.int64)
+    room_left = np.full(n_clusters, capacity, dtype=np.int64)
+    pending = np.arange(n)
+    for rank in range(n_candidates):
+        if pending.size == 0:
+            break
+        want = prefs[pending, rank]
+        order = np.lexsort((-pref_sims[pending, rank], want))
+        want_sorted = want[order]
+        group_start = np.searchsorted(want_sorted, want_sorted, side="left")
+        seat = np.arange(want_sorted.size) - group_start
+        accepted = seat < room_left[want_sorted]
+        winners = pending[order[accepted]]
+        labels[winners] = want_sorted[accepted]
+        room_left -= np.bincount(want_sorted[accepted], minlength=n_clusters)
+        pending = pending[order[~accepted]]
+
+    for row in pending:
+        sims = centroids @ data[row]
+        sims[room_left <= 0] = -np.inf
+        best = int(np.argmax(sims))
+        labels[row] = best
+        room_left[best] -= 1
+    return labels
@@ -4,7 +4,7 @@ K-NN utilities for embedding similarity.
 
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -14,11 +14,186 @@ def cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
     return 1.0 - float(np.dot(a, b) / denom)
 
 
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of ``matrix`` with every row scaled to unit length."""
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the ``k`` largest scores along the last axis, best first.
+
+    Uses ``argpartition`` so only the winning ``k`` entries are sorted.
+    """
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
+
+
+class EmbeddingIndex:
+    """
+    Exact k-NN over a contiguous, L2-normalized float32 embedding matrix.
+
+    Rows are kept dense: removing a key moves the last row into the hole, so a
+    search is always a single matrix-vector product over ``matrix[:len(self)]``
+    with no masking. Keys are opaque strings (profile ids in the API).
+    """
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 1024) -> None:
+        self.dim = dim
+        self._capacity = max(1, capacity)
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._rows
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only view of the active rows."""
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        view = self._matrix[: len(self._keys)]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if self._matrix is None:
+            self._matrix = np.zeros((max(self._capacity, needed), self.dim), dtype=np.float32)
+            return
+        if needed <= self._matrix.shape[0]:
+            return
+        grown = np.zeros((max(needed, self._matrix.shape[0] * 2), self.dim), dtype=np.float32)
+        grown[: len(self._keys)] = self._matrix[: len(self._keys)]
+        self._matrix = grown
+
+    def upsert(self, key: str, embedding: Sequence[float]) -> None:
+        """Insert or replace the embedding stored under ``key``."""
+        vector = normalize_rows(embedding)[0]
+        if self.dim is None:
+            self.dim = vector.shape[0]
+        elif vector.shape[0] != self.dim:
+            raise ValueError(f"Expected embedding of dim {self.dim}, got {vector.shape[0]}")
+
+        row = self._rows.get(key)
+        if row is None:
+            self._ensure_capacity(len(self._keys) + 1)
+            row = len(self._keys)
+            self._keys.append(key)
+            self._rows[key] = row
+        self._matrix[row] = vector
+
+    def upsert_many(self, keys: Sequence[str], embeddings: np.ndarray) -> None:
+        """Bulk variant of :meth:`upsert` that normalizes all rows at once."""
+        vectors = normalize_rows(embeddings)
+        if len(keys) != vectors.shape[0]:
+            raise ValueError("keys and embeddings must have the same length")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        self._ensure_capacity(len(self._keys) + len(keys))
+        for key, vector in zip(keys, vectors):
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                self._keys.append(key)
+                self._rows[key] = row
+            self._matrix[row] = vector
+
+    def adopt(self, keys: Sequence[str], matrix: np.ndarray) -> None:
+        """
+        Replace the contents with ``matrix`` (rows already unit length) without
+        copying it. A read-only or copy-on-write ``np.memmap`` stays shared
+        until the first write; growing past its rows moves it into RAM.
+        """
+        if len(keys) != matrix.shape[0]:
+            raise ValueError("keys and matrix must have the same length")
+        self.dim = matrix.shape[1]
+        self._matrix = matrix
+        self._keys = list(keys)
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+
+    def remove(self, key: str) -> bool:
+        """Drop ``key`` from the index. Returns False if it was not present."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._keys[row] = moved
+            self._rows[moved] = row
+            self._on_row_moved(last, row)
+        self._keys.pop()
+        return True
+
+    def _on_row_moved(self, old_row: int, new_row: int) -> None:
+        """Hook for subclasses that keep per-row side tables."""
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._rows.clear()
+
+    def vector(self, key: str) -> np.ndarray:
+        return self._matrix[self._rows[key]].copy()
+
+    def search(self, query: Sequence[float], k: int = 5) -> List[Tuple[str, float]]:
+        """Return ``(key, cosine_distance)`` pairs for the ``k`` closest rows."""
+        return self.search_batch(np.asarray(query, dtype=np.float32)[None, :], k=k)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Answer many queries with one matrix-matrix product."""
+        queries = normalize_rows(queries)
+        if not self._keys:
+            return [[] for _ in range(queries.shape[0])]
+        sims = queries @ self._matrix[: len(self._keys)].T
+        best = top_k_indices(sims, k)
+        keys = self._keys
+        return [
+            [(keys[idx], 1.0 - float(sims[q, idx])) for idx in row]
+            for q, row in enumerate(best)
+        ]
+
+
 def find_knn(target_embedding: np.ndarray, candidates: List[Dict[str, object]], k: int = 5) -> List[Dict[str, object]]:
-    distances = []
-    for candidate in candidates:
-        emb = np.array(candidate["embedding"], dtype=np.float32)
-        distances.append({"name": candidate.get("name", "unknown"), "distance": cosine_distance(target_embedding, emb)})
+    if not candidates:
+        return []
+    matrix = normalize_rows(np.array([candidate["embedding"] for candidate in candidates], dtype=np.float32))
+    target = normalize_rows(target_embedding)[0]
+    sims = matrix @ target
+    return [
+        {"name": candidates[idx].get("name", "unknown"), "distance": 1.0 - float(sims[idx])}
+        for idx in top_k_indices(sims, k)
+    ]
+
 
-    distances.sort(key=lambda item: item["distance"])
-    return distances[:k]
+def find_knn_batch(
+    target_embeddings: np.ndarray, candidates: Iterable[Dict[str, object]], k: int = 5
+) -> List[List[Dict[str, object]]]:
+    """Batched :func:`find_knn`: one result list per row of ``target_embeddings``."""
+    candidates = list(candidates)
+    if not candidates:
+        return [[] for _ in range(len(target_embeddings))]
+    matrix = normalize_rows(np.array([candidate["embedding"] for candidate in candidates], dtype=np.float32))
+    sims = normalize_rows(target_embeddings) @ matrix.T
+    return [
+        [{"name": candidates[idx].get("name", "unknown"), "distance": 1.0 - float(sims[q, idx])} for idx in row]
+        for q, row in enumerate(top_k_indices(sims, k))
+    ]
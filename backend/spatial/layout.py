@@ -0,0 +1,137 @@
+"""
+3D layout of the population fitted with PCA over all embeddings.
+
+``map_to_3d_space`` keeps the first three embedding dimensions, which are
+hashed text buckets, so nearby coordinates say little about similarity.
+:class:`LayoutEngine` projects unit-length embeddings onto the top three
+principal components of the whole population instead, with one isotropic
+scale so distances stay comparable across axes. The two strongest
+components land on x and z, the lounge floor (see ``to_world``).
+
+The engine keeps running sums of the embeddings and their outer products,
+so the covariance is always current without rescanning the matrix. The
+fitted projection is only replaced when it has drifted from what those
+sums imply by more than ``drift_threshold``, so coordinates stay put as
+users trickle in and everyone is re-projected in bulk when it matters.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .knn_clustering import normalize_rows
+from .space_mapper import map_to_3d_space
+
+# Principal component feeding each output axis: x, y (height), z
+_AXIS_COMPONENTS = (0, 2, 1)
+# Output units per standard deviation along the first component
+_SPREAD = 0.5
+
+
+class LayoutEngine:
+    def __init__(self, drift_threshold: float = 0.05, check_every: int = 64, min_fit: int = 8) -> None:
+        self.drift_threshold = drift_threshold
+        self.check_every = check_every
+        self.min_fit = min_fit
+        self._count = 0
+        self._sum: Optional[np.ndarray] = None
+        self._outer: Optional[np.ndarray] = None
+        self._since_check = 0
+        # (mean, components d x 3, scale) swapped as one tuple so projecting from
+        # another thread never sees a half-updated fit
+        self._projection: Optional[Tuple[np.ndarray, np.ndarray, float]] = None
+        self.version = 0
+
+    @property
+    def fitted(self) -> bool:
+        return self._projection is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _fit_from_stats(self) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+        if self._count < self.min_fit:
+            return None
+        mean = self._sum / self._count
+        covariance = self._outer / self._count - np.outer(mean, mean)
+        values, vectors = np.linalg.eigh(covariance)  # ascending
+        top = vectors[:, ::-1][:, :3]
+        if top.shape[1] < 3:
+            top = np.pad(top, ((0, 0), (0, 3 - top.shape[1])))
+        top = top[:, _AXIS_COMPONENTS]
+        if self._projection is not None:
+            # Eigenvectors are only defined up to sign; keep the world from mirroring
+            signs = np.sign(np.sum(top * self._projection[1], axis=0))
+            top = top * np.where(signs == 0, 1.0, signs)
+        spread = float(np.sqrt(max(values[-1], 1e-12)))
+        return mean, top, _SPREAD / spread
+
+    def fit(self, matrix: np.ndarray) -> np.ndarray:
+        """Reset the statistics to ``matrix`` (one embedding per row), refit, and project it."""
+        matrix = normalize_rows(matrix).astype(np.float64) if len(matrix) else np.zeros((0, 0))
+        self._count = len(matrix)
+        self._sum = matrix.sum(axis=0) if self._count else None
+        self._outer = matrix.T @ matrix if self._count else None
+        self._since_check = 0
+        self._projection = self._fit_from_stats()
+        self.version += 1
+        return self.project(matrix) if self._count else np.zeros((0, 3), dtype=np.float32)
+
+    def update(self, old: Optional[Sequence[float]], new: Optional[Sequence[float]]) -> None:
+        """Account for one embedding replaced (``old`` -> ``new``); either may be None."""
+        for vector, sign in ((old, -1.0), (new, 1.0)):
+            if vector is None:
+                continue
+            row = normalize_rows(vector)[0].astype(np.float64)
+            if self._sum is None:
+                self._sum = np.zeros_like(row)
+                self._outer = np.zeros((row.shape[0], row.shape[0]))
+            self._sum += sign * row
+            self._outer += sign * np.outer(row, row)
+            self._count += int(sign)
+        self._since_check += 1
+
+    def drift(self) -> float:
+        """
+        How far the fitted projection is from the current statistics: the
+        larger of the lost share of the fitted subspace (0 = same three axes,
+        1 = orthogonal) and the mean's shift in output units.
+        """
+        if self._projection is None:
+            return 1.0 if self._count >= self.min_fit else 0.0
+        fresh = self._fit_from_stats()
+        if fresh is None:
+            return 0.0
+        mean, components, scale = self._projection
+        overlap = float(np.sum((components.T @ fresh[1]) ** 2)) / 3.0
+        shift = float(np.linalg.norm(fresh[0] - mean)) * scale
+        return max(1.0 - overlap, shift)
+
+    def needs_refit(self) -> bool:
+        """Checked every ``check_every`` updates so the eigendecomposition stays off the hot path."""
+        if self._since_check < self.check_every and self._projection is not None:
+            return False
+        self._since_check = 0
+        return self.drift() > self.drift_threshold
+
+    def refit(self) -> bool:
+        """Refit from the running statistics. Returns False if there are too few embeddings."""
+        projection = self._fit_from_stats()
+        if projection is None:
+            return False
+        self._projection = projection
+        self._since_check = 0
+        self.version += 1
+        return True
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, 3) float32 coordinates for a batch of embeddings in one call."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        projection = self._projection
+        if projection is None:
+            return np.array([map_to_3d_space(row) for row in vectors], dtype=np.float32).reshape(-1, 3)
+        mean, components, scale = projection
+        unit = normalize_rows(vectors)
+        return ((unit - mean) @ components * scale).astype(np.float32)
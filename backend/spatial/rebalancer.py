@@ -0,0 +1,155 @@
+"""
+Offline re-partitioning of rooms with capacity limits.
+
+Greedy one-at-a-time assignment drifts into one giant room plus many
+singletons. The rebalancer re-clusters every embedding with mini-batch
+spherical k-means, seats members under a per-room cap and builds a fresh
+:class:`RoomIndex`, off the request path in a worker thread.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .kmeans import capacity_assign, minibatch_kmeans
+from .knn_clustering import normalize_rows
+from .room_generator import RoomIndex, match_room_names
+
+
+@dataclass
+class RebalanceReport:
+    n_profiles: int
+    n_rooms: int
+    largest_room: int
+    inertia: float
+    seconds: float
+    finished_at: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+class RoomRebalancer:
+    """
+    Re-cluster all members into rooms of at most ``capacity`` people.
+
+    The room count is chosen so rooms end up about ``fill`` full on average,
+    leaving slack for people who sign up after the rebalance.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 50,
+        fill: float = 0.8,
+        batch_size: int = 2048,
+        n_iter: int = 30,
+        threshold: float = 0.8,
+        seed: int = 0,
+    ) -> None:
+        self.capacity = capacity
+        self.fill = fill
+        self.batch_size = batch_size
+        self.n_iter = n_iter
+        self.threshold = threshold
+        self.seed = seed
+        self.last_report: Optional[RebalanceReport] = None
+        self.last_error: Optional[str] = None
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def run(
+        self,
+        member_ids: Sequence[str],
+        embeddings: np.ndarray,
+        previous_rooms: Optional[Sequence[Optional[str]]] = None,
+        next_number: int = 1,
+    ) -> Tuple[RoomIndex, RebalanceReport]:
+        """
+        Compute a new room partition synchronously. With ``previous_rooms``
+        (each member's current room) rooms keep the old name they share the
+        most members with, so room ids and their chat stay with the same
+        group; other rooms are numbered from ``next_number`` on.
+        """
+        start = time.perf_counter()
+        data = normalize_rows(embeddings) if len(member_ids) else np.zeros((0, 0), dtype=np.float32)
+        n = data.shape[0]
+        if n == 0:
+            rooms = RoomIndex.from_assignment(
+                [], np.zeros((0, 1)), np.zeros(0), self.threshold, self.capacity, next_number=next_number
+            )
+            labels = np.zeros(0, dtype=np.int64)
+            inertia = 0.0
+        else:
+            n_rooms = max(1, math.ceil(n / (self.capacity * self.fill)))
+            centroids = minibatch_kmeans(data, n_rooms, batch_size=self.batch_size, n_iter=self.n_iter, seed=self.seed)
+            labels = capacity_assign(data, centroids, self.capacity)
+            # Relabel densely so room ids stay contiguous if a centroid got no members
+            _, labels = np.unique(labels, return_inverse=True)
+            names = match_room_names(labels, previous_rooms, next_number) if previous_rooms is not None else None
+            rooms = RoomIndex.from_assignment(
+                member_ids,
+                data,
+                labels,
+                threshold=self.threshold,
+                max_members=self.capacity,
+                room_names=names,
+                next_number=next_number,
+            )
+            inertia = float(np.sum(1.0 - np.einsum("ij,ij->i", data, rooms.centroids[labels])))
+
+        report = RebalanceReport(
+            n_profiles=n,
+            n_rooms=len(rooms),
+            largest_room=int(np.bincount(labels).max()) if labels.size else 0,
+            inertia=inertia,
+            seconds=time.perf_counter() - start,
+            finished_at=time.time(),
+        )
+        self.last_report = report
+        return rooms, report
+
+    def start(
+        self,
+        member_ids: Sequence[str],
+        embeddings: np.ndarray,
+        on_done: Callable[[RoomIndex, RebalanceReport], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        previous_rooms: Optional[Sequence[Optional[str]]] = None,
+        next_number: int = 1,
+    ) -> bool:
+        """
+        Run :meth:`run` in a daemon thread and hand the result to ``on_done``
+        (called from the worker thread). If the run raises, the error is
+        logged and passed to ``on_error`` instead. Returns False if a run is
+        in flight.
+        """
+        if self.is_running:
+            return False
+        ids = list(member_ids)
+        data = np.array(embeddings, dtype=np.float32, copy=True)
+        previous = list(previous_rooms) if previous_rooms is not None else None
+
+        def _work() -> None:
+            try:
+                rooms, report = self.run(ids, data, previous, next_number)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Warning: Room rebalance failed: {self.last_error}")
+                if on_error is not None:
+                    on_error(e)
+                return
+            self.last_error = None
+            on_done(rooms, report)
+
+        self._worker = threading.Thread(target=_work, name="room-rebalancer", daemon=True)
+        self._worker.start()
+        return True
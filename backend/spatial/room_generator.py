@@ -1,10 +1,10 @@
 """
-Simple room assignment based on distance thresholds.
+Room assignment based on distance thresholds.
 """
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 
 import numpy as np
 
@@ -21,3 +21,209 @@ def assign_room(user_embedding: List[float], existing_rooms: Dict[str, List[List
     room_name = f"room-{len(existing_rooms)+1}"
     existing_rooms[room_name] = [user_embedding]
     return room_name
+
+
+def match_room_names(
+    labels: np.ndarray, previous: Sequence[Optional[str]], next_number: int = 1
+) -> List[str]:
+    """
+    Names for rooms ``0..labels.max()`` of a new partition that keep each
+    room on the old name it shares the most members with. ``previous[i]``
+    is member i's room before (None if it had none). Each old name goes to
+    at most one room; the rest get fresh ``room-<n>`` names past every old
+    number and ``next_number``, so a vanished room's name is never reused.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    n_rooms = int(labels.max()) + 1 if labels.size else 0
+    old_ids: Dict[str, int] = {}
+    old = np.array(
+        [-1 if name is None else old_ids.setdefault(name, len(old_ids)) for name in previous], dtype=np.int64
+    )
+    old_names = list(old_ids)
+    width = max(1, len(old_names))
+    seated = old >= 0
+    pairs, overlap = np.unique(labels[seated] * width + old[seated], return_counts=True)
+
+    names: List[Optional[str]] = [None] * n_rooms
+    taken = set()
+    # Largest overlaps claim their old name first
+    for pair in pairs[np.argsort(-overlap, kind="stable")].tolist():
+        room, name = divmod(pair, width)
+        if names[room] is None and name not in taken:
+            names[room] = old_names[name]
+            taken.add(name)
+    numbers = [int(name.rsplit("-", 1)[1]) for name in old_names if name.rsplit("-", 1)[-1].isdigit()]
+    next_number = max([next_number, *(number + 1 for number in numbers)])
+    for room in range(n_rooms):
+        if names[room] is None:
+            names[room] = f"room-{next_number}"
+            next_number += 1
+    return names
+
+
+class RoomIndex:
+    """
+    Rooms summarized by a running centroid instead of every member vector.
+
+    Each room keeps the sum of its members' normalized embeddings and a
+    member count; the normalized sums form a centroid matrix, so assigning a
+    user is one matrix-vector product over the rooms. Members can be removed
+    (e.g. when a profile is replaced) by subtracting their vector back out.
+    With ``max_members`` set, full rooms are skipped during assignment.
+    """
+
+    def __init__(self, threshold: float = 0.8, capacity: int = 64, max_members: Optional[int] = None) -> None:
+        self.threshold = threshold
+        self.max_members = max_members
+        self._capacity = max(1, capacity)
+        self._sums: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._room_ids: List[str] = []
+        self._room_rows: Dict[str, int] = {}
+        self._next_number = 1
+        self._members: List[Dict[str, None]] = []
+        self._room_of: Dict[str, int] = {}
+        self._vectors: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._counts[: len(self._room_ids)]))
+
+    def __contains__(self, room_id: object) -> bool:
+        """Whether ``room_id`` was ever opened (rooms that emptied out included)."""
+        return room_id in self._room_rows
+
+    @classmethod
+    def from_assignment(
+        cls,
+        member_ids: Sequence[str],
+        embeddings: np.ndarray,
+        labels: np.ndarray,
+        threshold: float = 0.8,
+        max_members: Optional[int] = None,
+        room_names: Optional[Sequence[str]] = None,
+        next_number: int = 1,
+    ) -> "RoomIndex":
+        """
+        Build an index from a precomputed ``labels[i]`` room number per member.
+        Rooms are named ``room-1..`` unless ``room_names[label]`` is given.
+        Rooms opened later are numbered from at least ``next_number``.
+        """
+        data = np.asarray(embeddings, dtype=np.float32)
+        data = data / (np.linalg.norm(data, axis=1, keepdims=True) + 1e-8)
+        labels = np.asarray(labels, dtype=np.int64)
+        n_rooms = int(labels.max()) + 1 if labels.size else 0
+
+        rooms = cls(threshold=threshold, capacity=max(n_rooms, 1), max_members=max_members)
+        if data.shape[0] == 0:
+            rooms._next_number = max(1, next_number)
+            return rooms
+        for _ in range(n_rooms):
+            rooms._new_room(data.shape[1])
+        if room_names is not None:
+            rooms._room_ids = list(room_names)
+            rooms._room_rows = {name: room for room, name in enumerate(rooms._room_ids)}
+            numbers = [int(name.rsplit("-", 1)[1]) for name in room_names if name.rsplit("-", 1)[-1].isdigit()]
+            rooms._next_number = max(numbers, default=0) + 1
+        rooms._next_number = max(rooms._next_number, next_number)
+        np.add.at(rooms._sums, labels, data)
+        rooms._counts[:n_rooms] = np.bincount(labels, minlength=n_rooms)
+        for room in range(n_rooms):
+            rooms._refresh_centroid(room)
+        for member_id, room, vector in zip(member_ids, labels.tolist(), data):
+            rooms._members[room][member_id] = None
+            rooms._room_of[member_id] = room
+            rooms._vectors[member_id] = vector
+        return rooms
+
+    @property
+    def next_number(self) -> int:
+        """Number the next room opened will get (``room-<n>``)."""
+        return self._next_number
+
+    @property
+    def centroids(self) -> np.ndarray:
+        return self._centroids[: len(self._room_ids)] if self._centroids is not None else np.zeros((0, 0))
+
+    def room_of(self, member_id: str) -> Optional[str]:
+        room = self._room_of.get(member_id)
+        return None if room is None else self._room_ids[room]
+
+    def members(self, room_id: str) -> List[str]:
+        return list(self._members[self._room_rows[room_id]])
+
+    def _new_room(self, dim: int) -> int:
+        if self._sums is None:
+            self._sums = np.zeros((self._capacity, dim), dtype=np.float32)
+            self._centroids = np.zeros((self._capacity, dim), dtype=np.float32)
+            self._counts = np.zeros(self._capacity, dtype=np.int64)
+        elif len(self._room_ids) == self._sums.shape[0]:
+            grow = self._sums.shape[0]
+            self._sums = np.vstack([self._sums, np.zeros_like(self._sums[:grow])])
+            self._centroids = np.vstack([self._centroids, np.zeros_like(self._centroids[:grow])])
+            self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int64)])
+        room = len(self._room_ids)
+        self._room_ids.append(f"room-{self._next_number}")
+        self._next_number += 1
+        self._room_rows[self._room_ids[room]] = room
+        self._members.append({})
+        return room
+
+    def _refresh_centroid(self, room: int) -> None:
+        if self._counts[room] == 0:
+            self._sums[room] = 0.0
+            self._centroids[room] = 0.0
+            return
+        total = self._sums[room]
+        self._centroids[room] = total / (np.linalg.norm(total) + 1e-8)
+
+    def assign(self, member_id: str, embedding: Sequence[float]) -> str:
+        """Place ``member_id`` in the closest room within ``threshold``, or open a new one."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) + 1e-8)
+        self.remove(member_id)
+
+        room = -1
+        n_rooms = len(self._room_ids)
+        if n_rooms:
+            sims = self._centroids[:n_rooms] @ vector
+            counts = self._counts[:n_rooms]
+            sims[counts == 0] = -np.inf
+            if self.max_members is not None:
+                sims[counts >= self.max_members] = -np.inf
+            best = int(np.argmax(sims))
+            if 1.0 - sims[best] < self.threshold:
+                room = best
+        if room < 0:
+            room = self._new_room(vector.shape[0])
+
+        self._sums[room] += vector
+        self._counts[room] += 1
+        self._refresh_centroid(room)
+        self._members[room][member_id] = None
+        self._room_of[member_id] = room
+        self._vectors[member_id] = vector
+        return self._room_ids[room]
+
+    def remove(self, member_id: str) -> Optional[str]:
+        """Take ``member_id`` out of its room. Returns the room id it left."""
+        room = self._room_of.pop(member_id, None)
+        if room is None:
+            return None
+        self._sums[room] -= self._vectors.pop(member_id)
+        self._counts[room] -= 1
+        self._refresh_centroid(room)
+        del self._members[room][member_id]
+        return self._room_ids[room]
+
+    def to_payload(self) -> Dict[str, Dict[str, object]]:
+        """Compact description of the non-empty rooms: centroid plus member ids."""
+        return {
+            room_id: {
+                "centroid": self._centroids[room].tolist(),
+                "count": int(self._counts[room]),
+                "members": list(self._members[room]),
+            }
+            for room, room_id in enumerate(self._room_ids)
+            if self._counts[room] > 0
+        }
@@ -4,6 +4,8 @@ Map embeddings into 3D coordinates.
 
 from __future__ import annotations
 
+from typing import Sequence
+
 import numpy as np
 
 
@@ -13,3 +15,15 @@ def map_to_3d_space(embedding: np.ndarray) -> np.ndarray:
     coords = embedding[:3]
     norm = np.linalg.norm(coords) or 1.0
     return coords / norm
+
+
+# Lounge units per unit of embedding space; avatar_states.position uses this scale
+WORLD_SCALE = 20.0
+
+
+def to_world(coords: Sequence[float], scale: float = WORLD_SCALE) -> np.ndarray:
+    """Avatar spawn position for ``coords``: x and z scaled onto the floor plane, y = 0."""
+    coords = np.asarray(coords, dtype=np.float64)
+    return np.array(
+        [coords[0] * scale, 0.0, coords[2] * scale if coords.shape[0] > 2 else 0.0], dtype=np.float64
+    )
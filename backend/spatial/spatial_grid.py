@@ -0,0 +1,182 @@
+"""
+Uniform grid over 3D world positions for proximity queries.
+
+Space is cut into cubes of ``cell_size``; each cell lists the rows of the
+avatars inside it. Moving an avatar is O(1) (a position write, plus a list
+move when it crosses into another cell), and a radius or k-closest query
+only measures distances to avatars in the cells around the query point.
+Positions are kept dense like :class:`~backend.spatial.knn_clustering.EmbeddingIndex`:
+removing a key moves the last row into the hole.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Cell = Tuple[int, int, int]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: float = 2.0, capacity: int = 1024) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self._positions = np.zeros((max(1, capacity), 3), dtype=np.float64)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._cell_of: List[Cell] = []
+        self._cells: Dict[Cell, List[int]] = {}
+        # Bounding box of every cell ever occupied (never shrinks); queries clamp
+        # to it so a flat lounge is not probed floor to ceiling
+        self._lo = [0, 0, 0]
+        self._hi = [-1, -1, -1]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._rows
+
+    def _link(self, cell: Cell, row: int) -> None:
+        members = self._cells.get(cell)
+        if members is None:
+            members = self._cells[cell] = []
+            if self._hi[0] < self._lo[0]:
+                self._lo, self._hi = list(cell), list(cell)
+            else:
+                for axis in range(3):
+                    self._lo[axis] = min(self._lo[axis], cell[axis])
+                    self._hi[axis] = max(self._hi[axis], cell[axis])
+        members.append(row)
+
+    def _cell(self, x: float, y: float, z: float) -> Cell:
+        size = self.cell_size
+        return (math.floor(x / size), math.floor(y / size), math.floor(z / size))
+
+    def position(self, key: str) -> Optional[Tuple[float, float, float]]:
+        row = self._rows.get(key)
+        return None if row is None else tuple(self._positions[row].tolist())
+
+    def upsert(self, key: str, position: Sequence[float]) -> None:
+        """Insert ``key`` at ``position`` or move it there."""
+        x, y, z = (float(v) for v in position)
+        cell = self._cell(x, y, z)
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == self._positions.shape[0]:
+                grown = np.zeros((row * 2, 3), dtype=np.float64)
+                grown[:row] = self._positions
+                self._positions = grown
+            self._keys.append(key)
+            self._rows[key] = row
+            self._cell_of.append(cell)
+            self._link(cell, row)
+        else:
+            old = self._cell_of[row]
+            if old != cell:
+                self._unlink(old, row)
+                self._link(cell, row)
+                self._cell_of[row] = cell
+        self._positions[row] = (x, y, z)
+
+    def upsert_many(self, keys: Iterable[str], positions: np.ndarray) -> None:
+        for key, position in zip(keys, np.asarray(positions, dtype=np.float64).tolist()):
+            self.upsert(key, position)
+
+    def remove(self, key: str) -> bool:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        self._unlink(self._cell_of[row], row)
+        last = len(self._keys) - 1
+        if row != last:
+            moved_key, moved_cell = self._keys[last], self._cell_of[last]
+            members = self._cells[moved_cell]
+            members[members.index(last)] = row
+            self._keys[row] = moved_key
+            self._cell_of[row] = moved_cell
+            self._positions[row] = self._positions[last]
+            self._rows[moved_key] = row
+        self._keys.pop()
+        self._cell_of.pop()
+        return True
+
+    def _unlink(self, cell: Cell, row: int) -> None:
+        members = self._cells[cell]
+        members.remove(row)
+        if not members:
+            del self._cells[cell]
+
+    def _rows_near(self, center: Tuple[float, float, float], reach: float) -> np.ndarray:
+        """Rows in every cell that overlaps the cube of half-width ``reach`` around ``center``."""
+        size = self.cell_size
+        (x0, y0, z0), (x1, y1, z1) = self._lo, self._hi
+        x0 = max(x0, math.floor((center[0] - reach) / size))
+        y0 = max(y0, math.floor((center[1] - reach) / size))
+        z0 = max(z0, math.floor((center[2] - reach) / size))
+        x1 = min(x1, math.floor((center[0] + reach) / size))
+        y1 = min(y1, math.floor((center[1] + reach) / size))
+        z1 = min(z1, math.floor((center[2] + reach) / size))
+        if x0 > x1 or y0 > y1 or z0 > z1:
+            return np.empty(0, dtype=np.intp)
+        rows: List[int] = []
+        cells = self._cells
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1) <= len(cells):
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    for cz in range(z0, z1 + 1):
+                        members = cells.get((cx, cy, cz))
+                        if members:
+                            rows.extend(members)
+        else:
+            # Mostly empty space: walk the occupied cells instead
+            for (cx, cy, cz), members in cells.items():
+                if x0 <= cx <= x1 and y0 <= cy <= y1 and z0 <= cz <= z1:
+                    rows.extend(members)
+        return np.array(rows, dtype=np.intp)
+
+    def _distances(self, rows: np.ndarray, center: Tuple[float, float, float]) -> np.ndarray:
+        delta = self._positions[rows] - center
+        return np.sqrt(np.einsum("ij,ij->i", delta, delta))
+
+    def _ranked(self, rows: np.ndarray, distances: np.ndarray, exclude: Optional[str]) -> List[Tuple[str, float]]:
+        order = np.argsort(distances, kind="stable")
+        keys = self._keys
+        return [(keys[row], float(d)) for row, d in zip(rows[order].tolist(), distances[order].tolist()) if keys[row] != exclude]
+
+    def within(
+        self, center: Sequence[float], radius: float, limit: Optional[int] = None, exclude: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Keys within ``radius`` of ``center`` as ``(key, distance)``, closest first."""
+        center = tuple(float(v) for v in center)
+        rows = self._rows_near(center, radius)
+        if not len(rows):
+            return []
+        distances = self._distances(rows, center)
+        keep = distances <= radius
+        hits = self._ranked(rows[keep], distances[keep], exclude)
+        return hits if limit is None else hits[:limit]
+
+    def nearest(self, center: Sequence[float], k: int = 5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """The ``k`` keys closest to ``center`` as ``(key, distance)``, closest first."""
+        center = tuple(float(v) for v in center)
+        want = k + (1 if exclude in self._rows else 0)
+        if want <= 0 or not self._keys:
+            return []
+        reach = self.cell_size
+        while True:
+            rows = self._rows_near(center, reach)
+            everything = len(rows) == len(self._keys)
+            if len(rows) >= want or everything:
+                distances = self._distances(rows, center)
+                if len(rows) > want:
+                    part = np.argpartition(distances, want - 1)[:want]
+                    rows, distances = rows[part], distances[part]
+                # Anything outside the scanned cube is at least ``reach`` away
+                if everything or distances.max() <= reach:
+                    return self._ranked(rows, distances, exclude)[:k]
+            reach *= 2
@@ -5,10 +5,15 @@ Manages AI avatar lifecycle in a simplified, offline-friendly way.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
+
+from backend.embedding.knowledge_store import KnowledgeStore
 
 from .elevenlabs_client import ElevenLabsClient
 
+# Knowledge chunks quoted back per answer
+RESPONSE_CHUNKS = 3
+
 
 @dataclass
 class Avatar:
@@ -16,18 +21,43 @@ class Avatar:
     voice_id: str
     personality: Dict[str, float]
     knowledge_base: Dict[str, object]
+    profile_id: Optional[str] = None
 
 
 class AvatarManager:
-    def __init__(self, client: ElevenLabsClient | None = None) -> None:
+    def __init__(self, client: ElevenLabsClient | None = None, knowledge: KnowledgeStore | None = None) -> None:
         self.client = client or ElevenLabsClient()
-
-    def create_avatar(self, user_name: str, audio_sample: str, personality: Dict[str, float], knowledge_base: Dict[str, object]) -> Avatar:
+        self.knowledge = knowledge
+
+    def create_avatar(
+        self,
+        user_name: str,
+        audio_sample: str,
+        personality: Dict[str, float],
+        knowledge_base: Dict[str, object],
+        profile_id: Optional[str] = None,
+    ) -> Avatar:
         voice_id = self.client.clone_voice(audio_sample)
-        return Avatar(user_name=user_name, voice_id=voice_id, personality=personality, knowledge_base=knowledge_base)
+        return Avatar(
+            user_name=user_name,
+            voice_id=voice_id,
+            personality=personality,
+            knowledge_base=knowledge_base,
+            profile_id=profile_id,
+        )
 
     def respond(self, avatar: Avatar, prompt: str) -> Dict[str, object]:
-        # Echo-style stub that mirrors the prompt with personality context.
+        # Echo-style stub that mirrors the prompt with personality context,
+        # grounded in the avatar's closest knowledge chunks when it has any.
+        hits = []
+        if self.knowledge is not None and avatar.profile_id is not None:
+            hits = self.knowledge.search(prompt, k=RESPONSE_CHUNKS, profile_id=avatar.profile_id)
         text = f"[{avatar.user_name} persona {avatar.personality}] {prompt}"
+        if hits:
+            text += " | " + " ... ".join(hit.text for hit in hits)
         speech = self.client.speak(avatar.voice_id, text)
-        return {"text": text, "speech": speech}
+        return {
+            "text": text,
+            "speech": speech,
+            "sources": [{"chunk": hit.chunk, "score": round(hit.score, 4)} for hit in hits],
+        }
@@ -0,0 +1,60 @@
+"""
+Recall vs. queries/sec of the IVF index against exact search.
+
+Run from the repo root: python -m scripts.bench_ann [n_profiles]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from backend.spatial.ann_index import IVFIndex
+from backend.spatial.knn_clustering import EmbeddingIndex
+
+DIM = 32
+K = 10
+N_QUERIES = 500
+NPROBES = [1, 2, 4, 8, 16, 32, 64]
+
+
+def _clustered(n: int, rng: np.random.Generator, n_topics: int = 200) -> np.ndarray:
+    """Gaussian blobs around random topic vectors, roughly like real profiles."""
+    topics = rng.standard_normal((n_topics, DIM)).astype(np.float32)
+    labels = rng.integers(0, n_topics, size=n)
+    return topics[labels] + 0.6 * rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    data = _clustered(n, rng)
+    queries = _clustered(N_QUERIES, rng)
+    keys = [f"user-{i}" for i in range(n)]
+
+    exact = EmbeddingIndex(dim=DIM)
+    exact.upsert_many(keys, data)
+    start = time.perf_counter()
+    truth = [{key for key, _ in row} for row in (exact.search(q, k=K) for q in queries)]
+    exact_qps = N_QUERIES / (time.perf_counter() - start)
+
+    ivf = IVFIndex(dim=DIM)
+    start = time.perf_counter()
+    ivf.upsert_many(keys, data)
+    ivf.train()
+    print(f"{n} profiles, nlist={ivf.centroids.shape[0]}, train {time.perf_counter() - start:.2f}s")
+    print(f"{'nprobe':>8} {'recall@10':>10} {'q/s':>10} {'speedup':>8}")
+    print(f"{'exact':>8} {1.0:>10.3f} {exact_qps:>10.1f} {1.0:>8.1f}")
+
+    for nprobe in NPROBES:
+        start = time.perf_counter()
+        found = [ivf.search(q, k=K, nprobe=nprobe) for q in queries]
+        qps = N_QUERIES / (time.perf_counter() - start)
+        recall = np.mean([len(truth[i] & {key for key, _ in row}) / K for i, row in enumerate(found)])
+        print(f"{nprobe:>8} {recall:>10.3f} {qps:>10.1f} {qps / exact_qps:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Profiles/sec of per-profile embed_user vs. the vectorized batch_embed.
+
+Run from the repo root: python -m scripts.bench_batch_embed
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import List
+
+from backend.embedding.user_embedder import UserProfile, batch_embed, embed_user
+from backend.profile_extraction.cv_parser import SKILL_KEYWORDS
+from backend.profile_extraction.interest_mapper import TAXONOMY
+
+SIZES = [1_000, 10_000]
+WORDS = (
+    "built shipped led scaled designed platform pipeline team customers latency "
+    "models experiments services mobile infrastructure analytics growth"
+).split()
+
+
+def _profiles(n: int, seed: int = 0) -> List[UserProfile]:
+    rng = random.Random(seed)
+    skills = sorted(SKILL_KEYWORDS)
+    interests = sorted({kw for bucket in TAXONOMY.values() for kw in bucket})
+    profiles = []
+    for i in range(n):
+        lines = [
+            " ".join(rng.choices(WORDS + skills, k=12)) + f" {rng.randint(2005, 2024)}"
+            for _ in range(rng.randint(3, 8))
+        ]
+        profiles.append(
+            UserProfile(
+                name=f"user-{i}",
+                cv_text="\n".join(lines),
+                transcript=" ".join(rng.choices(WORDS, k=10)),
+                interests=rng.sample(interests, k=rng.randint(1, 4)),
+            )
+        )
+    return profiles
+
+
+def main() -> None:
+    print(f"{'profiles':>10} {'embed_user/s':>14} {'batch_embed/s':>14}")
+    for n in SIZES:
+        profiles = _profiles(n)
+        start = time.perf_counter()
+        single = [embed_user(profile) for profile in profiles]
+        single_rate = n / (time.perf_counter() - start)
+        start = time.perf_counter()
+        batched = batch_embed(profiles)
+        batch_rate = n / (time.perf_counter() - start)
+        assert batched == single
+        print(f"{n:>10} {single_rate:>14.0f} {batch_rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
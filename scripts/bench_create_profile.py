@@ -0,0 +1,90 @@
+"""
+Load test for concurrent POST /profiles, with /health probed alongside to
+show how long the event loop is blocked.
+
+Compares the embedding executor with batching disabled (max_batch=1, one
+request per embed call) against the default micro-batching settings.
+Caches are disabled so every request runs the pipeline.
+
+Run from the repo root: python -m scripts.bench_create_profile [requests] [concurrency]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+
+os.environ["GIDI_EMBED_CACHE_PATH"] = ""
+os.environ["GIDI_SNAPSHOT_DIR"] = ""
+os.environ.setdefault("SUPABASE_URL", "")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from backend.api import main as api  # noqa: E402
+from backend.embedding.executor import EmbeddingExecutor  # noqa: E402
+from scripts.bench_batch_embed import _profiles  # noqa: E402
+
+
+def _percentiles(samples):
+    values = np.array(samples) * 1e3
+    return np.percentile(values, 50), np.percentile(values, 99)
+
+
+async def _run(n: int, concurrency: int):
+    transport = httpx.ASGITransport(app=api.app)
+    bodies = [
+        {"name": p.name, "cv_text": p.cv_text, "interests": p.interests, "transcript": p.transcript}
+        for p in _profiles(n)
+    ]
+    latencies, health = [], []
+    gate = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def post(body):
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post("/profiles", json=body)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(post(body) for body in bodies))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return elapsed, latencies, health
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    api.EMBED_CACHE.memory.maxsize = 0
+    print(f"{n} requests, concurrency {concurrency}")
+    for label, max_batch in (("unbatched", 1), ("micro-batched", 64)):
+        api.EMBED_EXECUTOR = EmbeddingExecutor(api._embed_with_coords, workers=2, max_batch=max_batch)
+        elapsed, latencies, health = asyncio.run(_run(n, concurrency))
+        p50, p99 = _percentiles(latencies)
+        h50, h99 = _percentiles(health)
+        stats = api.EMBED_EXECUTOR.stats()
+        print(
+            f"{label:>14}: {n / elapsed:7.0f} req/s  POST p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  "
+            f"/health p50 {h50:5.1f} ms  p99 {h99:5.1f} ms  mean batch {stats['mean_batch']:.1f}"
+        )
+        api.EMBED_EXECUTOR.shutdown()
+
+
+if __name__ == "__main__":
+    main()
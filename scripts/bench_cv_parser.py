@@ -0,0 +1,86 @@
+"""
+Whole-file CV parsing (the old parse_cv) vs. the streaming single-pass
+parser, on a large synthetic LinkedIn JSON export and a long text CV.
+Reports time, peak traced memory and the size of the parsed result that is
+kept with each profile.
+
+Run from the repo root: python -m scripts.bench_cv_parser [n_positions]
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from backend.profile_extraction.cv_parser import SKILL_MATCHER, parse_cv
+
+WORDS = ["built", "led", "shipped", "python", "react", "aws", "team", "platform", "data", "design", "pipelines"]
+
+
+def legacy_parse_cv(path: Path) -> dict:
+    if path.suffix == ".json":
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        raw_text = " ".join(str(v) for v in payload) if isinstance(payload, list) else path.read_text()
+    else:
+        raw_text = path.read_text(encoding="utf-8")
+    experience = []
+    for line in raw_text.splitlines():
+        if re.search(r"\b(20\d{2}|19\d{2})\b", line) or "experience" in line.lower():
+            experience.append(line.strip())
+    summary = raw_text[:280].replace("\n", " ") + ("..." if len(raw_text) > 280 else "")
+    return {
+        "summary": summary,
+        "skills": sorted(SKILL_MATCHER.count_labels(raw_text)),
+        "experience": experience[:5],
+        "raw_text": raw_text,
+    }
+
+
+def _measure(fn, path):
+    start = time.perf_counter()
+    fn(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    kept = sum(len(str(value)) for value in result.values())
+    return elapsed, peak, kept
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / "linkedin.json"
+        positions = [
+            {"title": f"Role {i}", "company": f"Company {i % 997}", "description": " ".join(rng.choices(WORDS, k=20)),
+             "started": rng.randint(1995, 2024)}
+            for i in range(n)
+        ]
+        export.write_text(json.dumps(positions), encoding="utf-8")
+        text_cv = Path(tmp) / "cv.txt"
+        text_cv.write_text("\n".join(" ".join(rng.choices(WORDS, k=15)) + f" {rng.randint(1995, 2024)}" for _ in range(n)))
+        del positions
+
+        for label, path in (("json export", export), ("text cv", text_cv)):
+            size_mb = path.stat().st_size / 1e6
+            print(f"{label} ({size_mb:.1f} MB)")
+            parsers = (
+                ("whole-file", legacy_parse_cv),
+                ("stream, no cap", lambda p: parse_cv(str(p), max_experience=sys.maxsize)),
+                ("stream, cap 5", lambda p: parse_cv(str(p))),
+            )
+            for name, fn in parsers:
+                elapsed, peak, kept = _measure(fn, path)
+                print(f"  {name:>14}: {elapsed * 1e3:9.1f} ms  peak {peak / 1e6:8.1f} MB  kept per profile {kept / 1e3:9.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-keyword substring scan (the old _extract_skills) vs. the token
+Aho-Corasick matcher, with a large synthetic skill vocabulary.
+
+Run from the repo root: python -m scripts.bench_keyword_matcher [vocab_size] [n_texts]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from backend.profile_extraction.cv_parser import SKILL_KEYWORDS
+from backend.profile_extraction.keyword_matcher import KeywordMatcher
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ro", "su", "ta", "vi", "ze", "qu", "ox", "py", "js", "db", "ml"]
+
+
+def _vocabulary(size: int, rng: random.Random) -> list:
+    vocab = set(SKILL_KEYWORDS)
+    while len(vocab) < size:
+        word = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        # About a fifth of terms are two-word phrases
+        vocab.add(word if rng.random() < 0.8 else f"{word} {''.join(rng.choices(SYLLABLES, k=3))}")
+    return sorted(vocab)
+
+
+def _texts(vocab: list, n: int, rng: random.Random) -> list:
+    filler = ["built", "shipped", "team", "systems", "with", "and", "for", "the", "led", "scaled", "html"]
+    return [
+        " ".join(rng.choice(vocab) if rng.random() < 0.1 else rng.choice(filler) for _ in range(400))
+        for _ in range(n)
+    ]
+
+
+def legacy_skills(text: str, vocab: list) -> list:
+    lowered = text.lower()
+    return sorted({skill for skill in vocab if skill in lowered})
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    vocab = _vocabulary(size, rng)
+    texts = _texts(vocab, n, rng)
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher({term: [term] for term in vocab})
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [legacy_skills(text, vocab) for text in texts]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = [sorted(matcher.count_labels(text)) for text in texts]
+    matcher_s = time.perf_counter() - start
+
+    false_hits = sum(len(set(old) - set(new)) for old, new in zip(legacy, matched))
+    print(f"vocabulary {len(vocab)} terms, {n} texts of ~400 words, matcher built in {build * 1e3:.1f} ms")
+    print(f"substring scan:  {legacy_s / n * 1e3:8.3f} ms/text")
+    print(f"aho-corasick:    {matcher_s / n * 1e3:8.3f} ms/text  ({legacy_s / matcher_s:.1f}x)")
+    print(f"substring-only hits (inside other words): {false_hits / n:.1f} per text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of k-NN search: per-candidate loop vs. the normalized embedding matrix.
+
+Run from the repo root: python -m scripts.bench_knn
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backend.spatial.knn_clustering import EmbeddingIndex, cosine_distance
+
+DIM = 32
+SIZES = [1_000, 10_000, 100_000]
+K = 5
+BATCH = 256
+
+
+def _legacy_find_knn(target: np.ndarray, candidates: List[Dict[str, object]], k: int) -> List[Dict[str, object]]:
+    distances = []
+    for candidate in candidates:
+        emb = np.array(candidate["embedding"], dtype=np.float32)
+        distances.append({"name": candidate["name"], "distance": cosine_distance(target, emb)})
+    distances.sort(key=lambda item: item["distance"])
+    return distances[:k]
+
+
+def _qps(fn: Callable[[], object], queries_per_call: int, min_time: float = 0.5) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls * queries_per_call / elapsed
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'profiles':>10} {'legacy q/s':>12} {'index q/s':>12} {'batch q/s':>12}")
+    for size in SIZES:
+        data = rng.standard_normal((size, DIM)).astype(np.float32)
+        queries = rng.standard_normal((BATCH, DIM)).astype(np.float32)
+        keys = [f"user-{i}" for i in range(size)]
+
+        index = EmbeddingIndex(dim=DIM)
+        index.upsert_many(keys, data)
+
+        if size <= 10_000:
+            rows = [{"name": key, "embedding": vec.tolist()} for key, vec in zip(keys, data)]
+            legacy = _qps(lambda: _legacy_find_knn(queries[0], rows, K), 1)
+        else:
+            legacy = float("nan")
+        single = _qps(lambda: index.search(queries[0], k=K), 1)
+        batched = _qps(lambda: index.search_batch(queries, k=K), BATCH)
+        print(f"{size:>10} {legacy:>12.1f} {single:>12.1f} {batched:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Knowledge-chunk store: load, profile-filtered top-k and full-scan top-k.
+
+Chunk texts are 48-word windows drawn from the skill and interest
+vocabularies plus filler. A pool of them is encoded for real (reported
+as chunks/s); the store is then filled with ``chunks`` rows sampled from
+that pool, ``per_profile`` per GiDi, in float32 and float16. Queries are
+encoded questions; latencies include encoding.
+
+Run from the repo root: python -m scripts.bench_knowledge [chunks] [per_profile]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from backend.embedding.knowledge_store import KnowledgeStore
+from backend.embedding.text_encoder import encode_texts
+from backend.profile_extraction.cv_parser import CHUNK_WORDS, SKILL_KEYWORDS
+from backend.profile_extraction.interest_mapper import TAXONOMY
+
+POOL = 20_000
+QUERIES = 200
+K = 5
+FILLER = "built shipped led team years company users platform scale projects remote startup".split()
+
+
+def _texts(rng: np.random.Generator, n: int):
+    vocab = sorted(SKILL_KEYWORDS | {word for words in TAXONOMY.values() for word in words}) + FILLER
+    return [" ".join(rng.choice(vocab, CHUNK_WORDS)) for _ in range(n)]
+
+
+def _percentiles(samples):
+    ms = np.array(samples) * 1e3
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main() -> None:
+    chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    per_profile = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = np.random.default_rng(0)
+    pool = _texts(rng, POOL)
+    start = time.perf_counter()
+    vectors = encode_texts(pool)
+    print(f"encode: {POOL / (time.perf_counter() - start):,.0f} chunks/s")
+
+    profiles = chunks // per_profile
+    questions = _texts(rng, QUERIES)
+    print(f"{chunks:,} chunks over {profiles:,} profiles")
+    print(f"{'dtype':>8} {'load s':>7} {'MB':>7} {'filtered p50':>13} {'p99 ms':>7} {'full p50':>9} {'p99 ms':>7}")
+    for dtype in ("float32", "float16"):
+        store = KnowledgeStore(dtype=dtype)
+        start = time.perf_counter()
+        for p in range(profiles):
+            rows = rng.integers(0, POOL, per_profile)
+            store.put(f"p{p}", [pool[row] for row in rows.tolist()], vectors[rows])
+        load = time.perf_counter() - start
+
+        filtered, full = [], []
+        for question in questions:
+            profile_id = f"p{rng.integers(profiles)}"
+            start = time.perf_counter()
+            store.search(question, k=K, profile_id=profile_id)
+            filtered.append(time.perf_counter() - start)
+        for question in questions[:20]:
+            start = time.perf_counter()
+            store.search(question, k=K)
+            full.append(time.perf_counter() - start)
+        f50, f99 = _percentiles(filtered)
+        s50, s99 = _percentiles(full)
+        mb = store.stats()["bytes"] / 2**20
+        print(f"{dtype:>8} {load:>7.2f} {mb:>7.0f} {f50:>13.3f} {f99:>7.3f} {s50:>9.1f} {s99:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+PCA layout fit and projection vs. per-profile first-3-dims truncation.
+
+Builds ``n`` clustered 32-d embeddings and times:
+
+- fit: running statistics plus eigendecomposition over the whole matrix;
+- project: every GiDi laid out in one vectorized call;
+- truncate: the old per-profile ``map_to_3d_space`` loop;
+- update: folding one arrival into the running statistics;
+- drift: one drift check (a 32 x 32 eigendecomposition).
+
+Then streams another 10% of arrivals from a shifted population through
+``update``/``needs_refit`` and counts how many bulk re-projections fire.
+
+Run from the repo root: python -m scripts.bench_layout [users ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from backend.spatial.layout import LayoutEngine
+from backend.spatial.space_mapper import map_to_3d_space
+
+DIM = 32
+CENTERS = 12
+
+
+def _embeddings(rng: np.random.Generator, n: int, shift: float = 0.0) -> np.ndarray:
+    centers = rng.normal(0, 1, (CENTERS, DIM))
+    centers[:, 0] += shift
+    return (centers[rng.integers(0, CENTERS, n)] + rng.normal(0, 0.3, (n, DIM))).astype(np.float32)
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(
+        f"{'users':>8} {'fit ms':>8} {'project ms':>11} {'truncate ms':>12} "
+        f"{'update us':>10} {'drift us':>9} {'arrivals':>9} {'refits':>7}"
+    )
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        matrix = _embeddings(rng, n)
+        engine = LayoutEngine()
+
+        start = time.perf_counter()
+        engine.fit(matrix)
+        fit = time.perf_counter() - start
+        start = time.perf_counter()
+        engine.project(matrix)
+        project = time.perf_counter() - start
+        start = time.perf_counter()
+        for row in matrix:
+            map_to_3d_space(row)
+        truncate = time.perf_counter() - start
+
+        arrivals = _embeddings(np.random.default_rng(1), n // 10, shift=4.0)
+        refits = 0
+        start = time.perf_counter()
+        for row in arrivals:
+            engine.update(None, row)
+            if engine.needs_refit() and engine.refit():
+                refits += 1
+                engine.project(matrix)
+        stream = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(100):
+            engine.drift()
+        drift = (time.perf_counter() - start) / 100
+
+        print(
+            f"{n:>8} {fit * 1e3:>8.1f} {project * 1e3:>11.1f} {truncate * 1e3:>12.1f} "
+            f"{stream / len(arrivals) * 1e6:>10.1f} {drift * 1e6:>9.1f} {len(arrivals):>9} {refits:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cost of instrumentation: one span, disabled and enabled, and the route
+middleware on a trivial endpoint.
+
+Run from the repo root: python -m scripts.bench_metrics [spans]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from backend.observability import metrics
+
+REQUESTS = 2_000
+
+
+def _per_span(n: int) -> float:
+    stage = metrics.stage
+    start = time.perf_counter()
+    for _ in range(n):
+        with stage("bench"):
+            pass
+    return (time.perf_counter() - start) / n
+
+
+def _empty_loop(n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return (time.perf_counter() - start) / n
+
+
+def _per_request(instrumented: bool) -> float:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/ping/{name}")
+    def ping(name: str):
+        return {"name": name}
+
+    client = TestClient(app)
+    for i in range(100):
+        client.get(f"/ping/{i}")
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        client.get(f"/ping/{i}")
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    baseline = _empty_loop(n)
+    metrics.set_enabled(False)
+    disabled = _per_span(n) - baseline
+    metrics.set_enabled(True)
+    enabled = _per_span(n) - baseline
+    print(f"span disabled: {disabled * 1e9:7.0f} ns")
+    print(f"span enabled:  {enabled * 1e9:7.0f} ns")
+    plain, timed = _per_request(False), _per_request(True)
+    print(f"request (TestClient): {plain * 1e6:.0f} us plain, {timed * 1e6:.0f} us with middleware "
+          f"(+{(timed - plain) * 1e6:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Full-document PDF extraction (the old /extract-pdf loop) vs. budgeted,
+early-stopping extraction, on synthetic multi-hundred-page CVs.
+
+Run from the repo root: python -m scripts.bench_pdf_extract [pages ...]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from backend.profile_extraction.pdf_extractor import PdfExtractionPool, extract_pdf_text
+
+LINE = "Senior engineer building Python ML pipelines, React frontends and cloud infrastructure on AWS."
+
+
+def build_pdf(path: str, n_pages: int, lines_per_page: int = 40) -> None:
+    """Write an uncompressed PDF with ``lines_per_page`` lines of Helvetica text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(n_pages):
+        body = " T* ".join(f"({page}: {LINE}) Tj" for _ in range(lines_per_page))
+        stream = f"BT /F1 9 Tf 11 TL 40 760 Td {body} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def legacy_extract(path: str) -> str:
+    import io
+
+    import PyPDF2
+
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(io.BytesIO(f.read()))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() or ""
+    return " ".join(text.split())[:10000]
+
+
+async def _concurrent(pool: PdfExtractionPool, path: str, jobs: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.extract(path) for _ in range(jobs)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 300, 800]
+    pool = PdfExtractionPool(max_workers=2, max_pending=64, timeout=120.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'pages':>6} {'MB':>6} {'full (s)':>9} {'budgeted (s)':>13} {'pages read':>11} {'8 jobs/pool (s)':>16}")
+        for n_pages in sizes:
+            path = os.path.join(tmp, f"cv-{n_pages}.pdf")
+            build_pdf(path, n_pages)
+
+            start = time.perf_counter()
+            full = legacy_extract(path)
+            full_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = extract_pdf_text(path)
+            budget_s = time.perf_counter() - start
+            # The old loop glued the last word of a page to the first of the next
+            assert len(result["text"]) == len(full) == 10000
+
+            pool_s = asyncio.run(_concurrent(pool, path, 8))
+            size_mb = os.path.getsize(path) / 1e6
+            print(
+                f"{n_pages:>6} {size_mb:>6.1f} {full_s:>9.3f} {budget_s:>13.4f} "
+                f"{result['pages_read']:>11} {pool_s:>16.3f}"
+            )
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
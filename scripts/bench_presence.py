@@ -0,0 +1,144 @@
+"""
+Fan-out of presence deltas to many real WebSocket clients.
+
+Starts the API under uvicorn on a local port (lifespan off, so no demo
+profiles or Supabase) and opens ``sockets`` clients spread over ``rooms``
+rooms. A burst of joined/left events is then published in two ways:
+
+- per-room, per-tick: each socket follows one room and events are
+  coalesced and flushed once per tick (what /ws/presence does);
+- broadcast, per-event: every socket follows every room and each event is
+  flushed on its own, the way a naive "send everything" loop behaves.
+
+Reports frames received, event deliveries, events coalesced away,
+publish-to-receive latency, and slow-consumer queue overflows (every 50th
+client reads with a delay).
+
+Run from the repo root: python -m scripts.bench_presence [sockets] [rooms] [events]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+
+os.environ["GIDI_EMBED_CACHE_PATH"] = ""
+os.environ["GIDI_SNAPSHOT_DIR"] = ""
+os.environ.setdefault("SUPABASE_URL", "")
+
+import numpy as np  # noqa: E402
+import uvicorn  # noqa: E402
+from websockets.asyncio.client import connect  # noqa: E402
+
+from backend.api import main as api  # noqa: E402
+from backend.api.presence import PresenceHub  # noqa: E402
+
+SLOW_EVERY = 50  # every 50th client sleeps between reads
+SLOW_DELAY = 0.05
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _client(url, published, latencies, counters, slow):
+    async with connect(url, max_queue=None) as ws:
+        counters["connected"] += 1
+        try:
+            async for message in ws:
+                now = time.perf_counter()
+                frame = json.loads(message)
+                counters["frames"] += 1
+                for event in frame.get("events", ()):
+                    latencies.append(now - published[event["id"]])
+                    counters["deliveries"] += 1
+                if frame["t"] == "resync":
+                    counters["resyncs"] += 1
+                if slow:
+                    await asyncio.sleep(SLOW_DELAY)
+        except Exception:
+            pass
+
+
+async def _run(port: int, sockets: int, rooms: int, events: int, mode: str):
+    api.PRESENCE = hub = PresenceHub(tick=0.05, max_queue=64)
+    room_names = [f"room-{i + 1}" for i in range(rooms)]
+    published, latencies = {}, []
+    counters = {"connected": 0, "frames": 0, "deliveries": 0, "resyncs": 0}
+    clients = []
+    for i in range(sockets):
+        query = ",".join(room_names) if mode == "broadcast" else room_names[i % rooms]
+        url = f"ws://127.0.0.1:{port}/ws/presence?rooms={query}"
+        clients.append(asyncio.create_task(_client(url, published, latencies, counters, i % SLOW_EVERY == 0)))
+        if i % 100 == 99:
+            await asyncio.sleep(0.05)
+    while counters["connected"] < sockets or hub.stats()["subscribers"] < sockets:
+        await asyncio.sleep(0.05)
+
+    ticker = asyncio.create_task(hub.run_forever()) if mode == "per-room" else None
+    start = time.perf_counter()
+    profiles = max(events // 20, 1)
+    online = set()
+    for i in range(events):
+        # Profiles flap online/offline in their own room; repeats for the same
+        # profile within a tick coalesce
+        n = i % profiles
+        profile_id, room = f"p{n}", room_names[n % rooms]
+        published[profile_id] = time.perf_counter()
+        if profile_id in online:
+            online.discard(profile_id)
+            hub.place(profile_id, room, None)
+        else:
+            online.add(profile_id)
+            hub.place(profile_id, None, room)
+        if mode == "broadcast":
+            hub.flush()
+        if i % 20 == 19:
+            await asyncio.sleep(0.005)  # spread the burst over several ticks
+    await asyncio.sleep(0.5)
+    elapsed = time.perf_counter() - start
+    stats = hub.stats()
+    if ticker is not None:
+        ticker.cancel()
+    for client in clients:
+        client.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+    return elapsed, latencies, counters, stats
+
+
+async def _main(sockets: int, rooms: int, events: int) -> None:
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(api.app, host="127.0.0.1", port=port, lifespan="off", log_level="warning", ws_max_queue=64)
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    print(f"{sockets} sockets, {rooms} rooms, {events} events")
+    print(f"{'mode':>10} {'frames':>9} {'deliveries':>11} {'coalesced':>10} {'p50 ms':>8} {'p99 ms':>8} {'overflows':>10}")
+    for mode in ("per-room", "broadcast"):
+        elapsed, latencies, counters, stats = await _run(port, sockets, rooms, events, mode)
+        ms = np.array(latencies or [0.0]) * 1e3
+        print(
+            f"{mode:>10} {counters['frames']:>9} {counters['deliveries']:>11} {stats['coalesced']:>10} "
+            f"{np.percentile(ms, 50):>8.1f} {np.percentile(ms, 99):>8.1f} {stats['overflows']:>10}"
+        )
+    server.should_exit = True
+    await serving
+
+
+def main() -> None:
+    sockets = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    events = int(sys.argv[3]) if len(sys.argv) > 3 else 2_000
+    asyncio.run(_main(sockets, rooms, events))
+
+
+if __name__ == "__main__":
+    main()
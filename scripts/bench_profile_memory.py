@@ -0,0 +1,109 @@
+"""
+Resident bytes per profile: plain dict rows vs. compact ProfileRecord rows.
+
+Both layouts keep the same k-NN index and id/name lookups; the dict layout
+is what ProfileStore held before records (each row a dict of float lists,
+a dict of ids per name). Rows are cloned from
+a smaller set of embedded profiles so large sizes stay quick to build.
+
+Run from the repo root: python -m scripts.bench_profile_memory [profiles]
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from backend.api.profile_store import ProfileStore
+from backend.embedding.user_embedder import batch_embed
+from backend.spatial.knn_clustering import EmbeddingIndex
+from backend.spatial.space_mapper import map_to_3d_space
+from scripts.bench_batch_embed import _profiles
+
+DISTINCT = 2_000
+
+
+def _blobs(n: int) -> List[str]:
+    """JSON rows shaped like the API's; decoding gives every row its own objects."""
+    templates = []
+    for created in batch_embed(_profiles(min(n, DISTINCT))):
+        created["coords"] = map_to_3d_space(np.array(created["embedding"], dtype=np.float32)).tolist()
+        created.update(
+            avatar_model="/avatars/raiden.vrm",
+            bio=created["cv"]["summary"],
+            interests=["ai", "music"],
+            is_online=False,
+            ai_personality_prompt=None,
+        )
+        templates.append(created)
+    blobs = []
+    for i in range(n):
+        row = dict(templates[i % len(templates)], id=f"profile-{i}", name=f"user-{i}", room=f"room-{i % 50 + 1}")
+        blobs.append(json.dumps(row))
+    return blobs
+
+
+def _measure(build) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {"bytes": current, "seconds": elapsed}
+
+
+def _dict_rows(blobs: List[str]):
+    index = EmbeddingIndex()
+    rows = []
+    slot_by_id: Dict[str, int] = {}
+    ids_by_name: Dict[str, Dict[str, None]] = {}
+    for blob in blobs:
+        row = json.loads(blob)
+        slot_by_id[row["id"]] = len(rows)
+        ids_by_name.setdefault(row["name"], {})[row["id"]] = None
+        index.upsert(row["id"], row["embedding"])
+        rows.append(row)
+    return index, rows, slot_by_id, ids_by_name
+
+
+def _record_rows(blobs: List[str]):
+    store = ProfileStore(index=EmbeddingIndex())
+    for blob in blobs:
+        store.upsert(json.loads(blob))
+    return store
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'profiles':>10} {'dict B/row':>12} {'record B/row':>13} {'ratio':>7} {'get+to_dict us':>15}")
+    for n in sizes:
+        blobs = _blobs(n)
+        plain = _measure(lambda: _dict_rows(blobs))
+        compact = _measure(lambda: _record_rows(blobs))
+
+        store = _record_rows(blobs)
+        ids = [f"profile-{i}" for i in range(0, n, max(1, n // 1000))]
+        start = time.perf_counter()
+        for profile_id in ids:
+            store.get(profile_id).to_dict()
+        per_get = (time.perf_counter() - start) / len(ids) * 1e6
+        assert store.get("profile-0").to_dict()["bio"] == json.loads(blobs[0])["bio"]
+
+        print(
+            f"{n:>10} {plain['bytes'] / n:>12.0f} {compact['bytes'] / n:>13.0f} "
+            f"{plain['bytes'] / compact['bytes']:>6.1f}x {per_get:>15.1f}"
+        )
+        del store, blobs
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency and payload size of GET /profiles polls.
+
+Compares the old handler (a dict per row rendered by the stdlib encoder)
+with the current one: a fresh render after a change, a repeat poll served
+from the render cache, a conditional poll answered with 304, and a
+projected page of 100 rows.
+
+Run from the repo root: python -m scripts.bench_profiles_api [profiles] [polls]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+os.environ["GIDI_EMBED_CACHE_PATH"] = ""
+os.environ["GIDI_SNAPSHOT_DIR"] = ""
+os.environ.setdefault("SUPABASE_URL", "")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend.api import main as api  # noqa: E402
+from scripts.bench_profile_memory import _blobs  # noqa: E402
+
+
+def _legacy_body() -> bytes:
+    payload = {
+        "profiles": [
+            {
+                "id": user.get("id"),
+                "name": user["name"],
+                "coords": user.get("coords", [0, 0, 0]),
+                "room": user.get("room"),
+                "avatar_model": user.get("avatar_model", "/avatars/raiden.vrm"),
+                "bio": user.get("bio"),
+                "interests": user.get("interests", []),
+                "is_online": user.get("is_online", False),
+            }
+            for user in api.USER_EMBEDDINGS
+        ]
+    }
+    return JSONResponse(payload).body
+
+
+def _row(label: str, timings, size: int) -> None:
+    ms = np.array(timings) * 1e3
+    print(f"{label:>24} {np.percentile(ms, 50):9.2f} {np.percentile(ms, 99):9.2f} {size / 1024:10.0f}")
+
+
+async def _bench(polls: int) -> None:
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def timed(url, headers=None, before=None):
+            timings, size = [], 0
+            for _ in range(polls):
+                if before is not None:
+                    before()
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                timings.append(time.perf_counter() - start)
+                size = len(response.content)
+            return timings, size
+
+        timings, size = [], 0
+        for _ in range(polls):
+            start = time.perf_counter()
+            size = len(_legacy_body())
+            timings.append(time.perf_counter() - start)
+        _row("legacy (handler only)", timings, size)
+        _row("fresh render", *await timed("/profiles", before=api.USER_EMBEDDINGS.touch))
+        _row("cached render", *await timed("/profiles"))
+        tag = (await client.get("/profiles")).headers["etag"]
+        _row("If-None-Match -> 304", *await timed("/profiles", headers={"If-None-Match": tag}))
+        _row(
+            "page of 100, 3 fields",
+            *await timed("/profiles?limit=100&fields=id,coords,room", before=api.USER_EMBEDDINGS.touch),
+        )
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for blob in _blobs(n):
+        api.USER_EMBEDDINGS.upsert(json.loads(blob))
+    print(f"{n} profiles, {polls} polls each")
+    print(f"{'':>24} {'p50 ms':>9} {'p99 ms':>9} {'body KiB':>10}")
+    asyncio.run(_bench(polls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Time and quality of the capacity-limited room rebalancer.
+
+Run from the repo root: python -m scripts.bench_rebalance [n_profiles] [capacity]
+"""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+
+from backend.spatial.rebalancer import RoomRebalancer
+from backend.spatial.room_generator import RoomIndex
+
+DIM = 32
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((300, DIM)).astype(np.float32)
+    data = topics[rng.integers(0, 300, size=n)] + 0.6 * rng.standard_normal((n, DIM)).astype(np.float32)
+    ids = [f"user-{i}" for i in range(n)]
+
+    greedy = RoomIndex(threshold=0.6)
+    sample = min(n, 10_000)
+    for member_id, vector in zip(ids[:sample], data[:sample]):
+        greedy.assign(member_id, vector)
+    sizes = sorted((room["count"] for room in greedy.to_payload().values()), reverse=True)
+    print(f"greedy (first {sample}): {len(sizes)} rooms, largest {sizes[0]}, singletons {sizes.count(1)}")
+
+    rooms, report = RoomRebalancer(capacity=capacity, threshold=0.6).run(ids, data)
+    print(
+        f"rebalanced {report.n_profiles} profiles into {report.n_rooms} rooms "
+        f"(largest {report.largest_room}, cap {capacity}) in {report.seconds:.2f}s, "
+        f"inertia {report.inertia:.1f} ({report.inertia / n:.4f}/profile)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Room chat under load: thousands of rooms, busy chatters and history readers.
+
+``chatters`` concurrent tasks post ``messages`` in total to ``rooms`` rooms
+(skewed, so a few rooms are very busy) while every tenth operation reads a
+50-message history page. New rows go through the write-behind queue to a
+fake Supabase with per-request latency, as in production. Reports post and
+history latency, overall messages/s, how many bulk requests persistence
+took (and how many rows the production queue cap dropped), and the memory
+held by the ring buffers.
+
+Run from the repo root: python -m scripts.bench_room_chat [rooms] [chatters] [messages] [latency_ms]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from backend.api.room_chat import ChatHub
+from backend.api.write_behind import WriteBehindQueue
+from tests.support.fake_supabase import FakeSupabase
+
+PAGE = 50
+READ_EVERY = 10
+
+
+def _percentiles(samples):
+    us = np.array(samples) * 1e6
+    return float(np.percentile(us, 50)), float(np.percentile(us, 99))
+
+
+def main() -> None:
+    n_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    chatters = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    n_messages = int(sys.argv[3]) if len(sys.argv) > 3 else 200_000
+    latency = (float(sys.argv[4]) if len(sys.argv) > 4 else 5.0) / 1e3
+
+    client = FakeSupabase(latency=latency)
+    queue = WriteBehindQueue(client, max_batch=500, flush_interval=0.05, max_pending=100_000)
+    hub = ChatHub(capacity=200, persist=lambda row: queue.put("room_messages", row))
+    rng = np.random.default_rng(0)
+    # Cubing a uniform draw skews traffic toward low-numbered rooms
+    rooms = [f"room-{int(n_rooms * u**3) + 1}" for u in rng.random(n_messages).tolist()]
+    posts, reads = [], []
+    max_depth = 0
+
+    async def chatter(worker: int) -> None:
+        nonlocal max_depth
+        for i in range(worker, n_messages, chatters):
+            room = rooms[i]
+            start = time.perf_counter()
+            await hub.post(room, f"user-{i % 10_000}", f"User {i % 10_000}", f"message {i} about {room}")
+            posts.append(time.perf_counter() - start)
+            if i % READ_EVERY == 0:
+                start = time.perf_counter()
+                await hub.history(rooms[-1 - i], limit=PAGE)
+                reads.append(time.perf_counter() - start)
+                max_depth = max(max_depth, len(queue))
+                await asyncio.sleep(0)  # let the other chatters and the flusher run
+
+    async def scenario() -> float:
+        flusher = asyncio.create_task(queue.run_forever())
+        start = time.perf_counter()
+        await asyncio.gather(*(chatter(worker) for worker in range(chatters)))
+        elapsed = time.perf_counter() - start
+        while len(queue):
+            await asyncio.sleep(0.01)
+        flusher.cancel()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+    stats = queue.stats()
+    post_p50, post_p99 = _percentiles(posts)
+    read_p50, read_p99 = _percentiles(reads)
+    buffered = [item for log in hub._rooms.values() for item in log.items]
+    memory = sum(sys.getsizeof(item) for item in buffered) + sum(
+        sys.getsizeof(log.items) for log in hub._rooms.values()
+    )
+    print(f"{n_messages} messages, {len(hub)} rooms, {chatters} chatters, {latency * 1e3:.0f} ms Supabase latency")
+    print(f"throughput:  {n_messages / elapsed:,.0f} messages/s (with {len(reads)} history reads)")
+    print(f"post:        p50 {post_p50:.1f} us  p99 {post_p99:.1f} us")
+    print(f"history:     p50 {read_p50:.1f} us  p99 {read_p99:.1f} us  ({PAGE} messages)")
+    print(
+        f"persistence: {stats['flushed_rows']} rows in {client.requests} requests "
+        f"(avg {stats['flushed_rows'] / max(1, client.requests):.0f}/request), max depth {max_depth}, "
+        f"{stats['overflowed']} dropped by the queue cap"
+    )
+    print(f"ring memory: {memory / 2**20:.1f} MB for {len(buffered)} buffered messages")
+
+    # The fake client scans its rows, so only the round trip is a fair comparison
+    print(f"a fresh room_messages query per history load costs at least the {latency * 1e3:.0f} ms round trip")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Read throughput of the shared-memory profile store as reader processes are
+added, with and without a writer process upserting at full speed, against
+the in-process EmbeddingIndex the API uses per worker.
+
+Read scaling is bounded by the cores available: on a 1-CPU machine the
+totals stay flat and only the per-op cost and the seqlock retry count are
+meaningful.
+
+Run from the repo root: python -m scripts.bench_shared_store [rows] [seconds]
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from backend.api.shared_store import SharedProfileStore
+from backend.spatial.knn_clustering import EmbeddingIndex
+
+DIM = 32
+K = 5
+
+
+def _rows(n: int, seed: int = 0):
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return [
+        {"id": f"p{i}", "name": f"user {i}", "room": f"room-{i % 500}", "coords": [0.0, 0.0, 0.0], "embedding": vector}
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def _reader(name: str, n: int, seconds: float, seed: int, out) -> None:
+    store = SharedProfileStore(name)
+    rng = np.random.default_rng(seed)
+    ids = [f"p{i}" for i in rng.integers(0, n, 4096).tolist()]
+    ops = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        store.nearest_to(ids[ops % len(ids)], K)
+        ops += 1
+    out.put((ops, store.retries))
+    store.close()
+
+
+def _writer(name: str, n: int, stop) -> None:
+    store = SharedProfileStore(name)
+    rows = _rows(1024, seed=1)
+    i = 0
+    while not stop.is_set():
+        row = rows[i % len(rows)]
+        store.upsert({**row, "id": f"p{i % n}"})
+        i += 1
+    store.close()
+
+
+def _run(name: str, n: int, readers: int, seconds: float, with_writer: bool):
+    out = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    writer = multiprocessing.Process(target=_writer, args=(name, n, stop)) if with_writer else None
+    if writer:
+        writer.start()
+    procs = [multiprocessing.Process(target=_reader, args=(name, n, seconds, seed, out)) for seed in range(readers)]
+    for proc in procs:
+        proc.start()
+    results = [out.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    if writer:
+        stop.set()
+        writer.join()
+    ops = sum(r[0] for r in results)
+    return ops / seconds, sum(r[1] for r in results)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    rows = _rows(n)
+    name = f"gidi-bench-{uuid.uuid4().hex[:8]}"
+    store = SharedProfileStore(name, capacity=n)
+    try:
+        start = time.perf_counter()
+        store.upsert_many(rows)
+        print(f"{n} rows, dim {DIM}: bulk load {time.perf_counter() - start:.2f}s")
+
+        index = EmbeddingIndex()
+        index.upsert_many([row["id"] for row in rows], np.array([row["embedding"] for row in rows]))
+        start = time.perf_counter()
+        for i in range(200):
+            index.search(index.vector(f"p{i}"), k=K)
+        local = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        for i in range(200):
+            store.nearest_to(f"p{i}", K)
+        shared = (time.perf_counter() - start) / 200
+        print(f"k-NN in process: EmbeddingIndex {local * 1e3:.2f} ms, shared store {shared * 1e3:.2f} ms")
+
+        cpus = os.cpu_count() or 1
+        counts = sorted({1, 2, max(1, cpus // 2), cpus})
+        print(f"{'readers':>7} {'writer':>6} {'reads/s':>10} {'retries':>8}  ({cpus} cpus)")
+        for with_writer in (False, True):
+            for readers in counts:
+                rate, retries = _run(name, n, readers, seconds, with_writer)
+                print(f"{readers:>7} {'yes' if with_writer else 'no':>6} {rate:>10.0f} {retries:>8}")
+    finally:
+        store.unlink()
+
+
+if __name__ == "__main__":
+    main()
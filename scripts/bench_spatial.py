@@ -0,0 +1,82 @@
+"""
+Spatial grid under continuous avatar movement vs. a brute-force scan.
+
+Avatars are scattered over a lounge of LOUNGE world units per side. Each
+tick moves a tenth of them by a small random step (as clients streaming
+positions would), then runs radius and k-closest queries around random
+avatars. The brute-force columns compute every distance with numpy.
+
+Run from the repo root: python -m scripts.bench_spatial [avatars ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from backend.spatial.spatial_grid import SpatialGrid
+
+LOUNGE = 400.0
+RADIUS = 6.0
+K = 10
+TICKS = 20
+QUERIES = 200
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(
+        f"{'avatars':>9} {'updates/s':>11} {'within us':>10} {'brute us':>9} "
+        f"{'closest us':>11} {'brute us':>9} {'hits':>6}"
+    )
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        keys = [f"avatar-{i}" for i in range(n)]
+        positions = rng.uniform(0, LOUNGE, (n, 3))
+        positions[:, 1] = rng.uniform(0, 2, n)  # mostly on the floor
+        grid = SpatialGrid(cell_size=4.0)
+        grid.upsert_many(keys, positions)
+
+        update_time = within_time = closest_time = brute_within = brute_closest = 0.0
+        hits = 0
+        for _ in range(TICKS):
+            movers = rng.choice(n, size=n // 10, replace=False)
+            positions[movers] += rng.normal(0, 0.5, (len(movers), 3))
+            positions[:, 1].clip(0, 2, out=positions[:, 1])
+            start = time.perf_counter()
+            for row, position in zip(movers.tolist(), positions[movers].tolist()):
+                grid.upsert(keys[row], position)
+            update_time += time.perf_counter() - start
+
+            for row in rng.integers(0, n, QUERIES // TICKS).tolist():
+                center = positions[row]
+                start = time.perf_counter()
+                found = grid.within(center, RADIUS, exclude=keys[row])
+                within_time += time.perf_counter() - start
+                start = time.perf_counter()
+                grid.nearest(center, K, exclude=keys[row])
+                closest_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                distances = np.linalg.norm(positions - center, axis=1)
+                expected = np.flatnonzero(distances <= RADIUS)
+                brute_within += time.perf_counter() - start
+                start = time.perf_counter()
+                distances = np.linalg.norm(positions - center, axis=1)
+                np.argpartition(distances, K)[: K + 1]
+                brute_closest += time.perf_counter() - start
+                assert len(found) == len(expected) - 1
+                hits += len(found)
+
+        updates = TICKS * (n // 10)
+        print(
+            f"{n:>9} {updates / update_time:>11.0f} {within_time / QUERIES * 1e6:>10.1f} "
+            f"{brute_within / QUERIES * 1e6:>9.1f} {closest_time / QUERIES * 1e6:>11.1f} "
+            f"{brute_closest / QUERIES * 1e6:>9.1f} {hits / QUERIES:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
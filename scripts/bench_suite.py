@@ -0,0 +1,280 @@
+"""
+Scale benchmark suite over synthetic populations (1k to 1M profiles).
+
+For each size the population comes from ``scripts.synthetic_profiles``
+(seeded, clustered by interest community) and the suite measures:
+
+- embed_user / batch_embed throughput (profiles/s);
+- assign_room cost while seating everyone (us per profile);
+- find_knn over the whole population and the store's k-NN index (ms);
+- GET /profiles: a fresh 1000-row page, a cached repeat, a 304, and a full
+  cursor walk (rows/s);
+- the API end to end through an in-process ASGI client: concurrent
+  POST /profiles and GET /profiles/{id} (requests/s, p50/p99 ms).
+
+Progress goes to stderr as a table. Results are JSON (stdout, or
+``--output``) with run metadata and the per-stage timings recorded by
+``backend.observability``. Given ``--baseline``, any metric worse than the
+baseline by more than ``--tolerance`` is listed and the exit code is 1.
+
+Run from the repo root: python -m scripts.bench_suite [--sizes 1000 10000 ...]
+    [--seed 0] [--output results.json] [--baseline old.json] [--tolerance 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, List, Optional
+
+os.environ["GIDI_EMBED_CACHE_PATH"] = ""
+os.environ["GIDI_SNAPSHOT_DIR"] = ""
+os.environ.setdefault("SUPABASE_URL", "")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from backend.api import main as api  # noqa: E402
+from backend.api.profile_store import ProfileStore  # noqa: E402
+from backend.embedding.text_encoder import encoder_version  # noqa: E402
+from backend.embedding.user_embedder import batch_embed, embed_user  # noqa: E402
+from backend.observability.metrics import REGISTRY  # noqa: E402
+from backend.spatial.knn_clustering import find_knn  # noqa: E402
+from backend.spatial.room_generator import RoomIndex  # noqa: E402
+from scripts.synthetic_profiles import generate, request_body  # noqa: E402
+
+EMBED_CHUNK = 10_000
+SINGLE_SAMPLE = 2_000
+PAGE = 1_000
+PAGE_REPEATS = 9  # page timings report the median
+API_REQUESTS = 1_000
+API_CONCURRENCY = 32
+K = 5
+
+Result = Dict[str, object]
+
+
+def _log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def _result(results: List[Result], name: str, size: int, value: float, unit: str, higher_is_better: bool) -> None:
+    results.append({"name": name, "size": size, "value": round(float(value), 6), "unit": unit, "higher_is_better": higher_is_better})
+    _log(f"{size:>9} {name:<28} {value:>14.3f} {unit}")
+
+
+def _percentiles(samples: List[float]):
+    ms = np.array(samples) * 1e3
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+
+def _created(embedded: Dict[str, object], index: int, profile) -> Dict[str, object]:
+    embedded["id"] = f"synthetic-{index}"
+    embedded["coords"] = [0.0, 0.0, 0.0]
+    embedded["avatar_model"] = "/avatars/raiden.vrm"
+    embedded["bio"] = profile.cv_text.splitlines()[0]
+    embedded["interests"] = profile.interests
+    embedded["is_online"] = index % 10 == 0
+    return embedded
+
+
+def _bench_embedding_and_rooms(n: int, seed: int, results: List[Result]) -> ProfileStore:
+    sample = list(generate(min(n, SINGLE_SAMPLE), seed))
+    start = time.perf_counter()
+    for profile in sample:
+        embed_user(profile)
+    _result(results, "embed_user", n, len(sample) / (time.perf_counter() - start), "profiles/s", True)
+
+    store = ProfileStore()
+    rooms = RoomIndex(threshold=api.ROOM_THRESHOLD, max_members=api.ROOM_CAPACITY)
+    embed_time = assign_time = 0.0
+    profiles = generate(n, seed)
+    offset = 0
+    while offset < n:
+        chunk = list(islice(profiles, EMBED_CHUNK))
+        start = time.perf_counter()
+        embedded = batch_embed(chunk)
+        embed_time += time.perf_counter() - start
+        for i, (profile, created) in enumerate(zip(chunk, embedded)):
+            created = _created(created, offset + i, profile)
+            start = time.perf_counter()
+            created["room"] = rooms.assign(created["id"], created["embedding"])
+            assign_time += time.perf_counter() - start
+            store.upsert(created)
+        offset += len(chunk)
+    _result(results, "batch_embed", n, n / embed_time, "profiles/s", True)
+    _result(results, "assign_room", n, assign_time / n * 1e6, "us", False)
+    api.ROOMS = rooms
+    # As after a snapshot restore: the layout is fitted on everyone already loaded
+    api.LAYOUT.fit(store.index.matrix)
+    return store
+
+
+def _bench_knn(store: ProfileStore, n: int, seed: int, results: List[Result]) -> None:
+    rng = np.random.default_rng(seed)
+    queries = 50 if n <= 10_000 else 20 if n <= 100_000 else 5
+    keys = store.index.keys
+    targets = [store.get(keys[i]) for i in rng.integers(0, n, queries).tolist()]
+    candidates = list(store)
+    scan, indexed = [], []
+    for target in targets:
+        start = time.perf_counter()
+        find_knn(np.asarray(target["embedding"], dtype=np.float32), candidates, k=K)
+        scan.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        store.nearest(target, k=K)
+        indexed.append(time.perf_counter() - start)
+    for name, samples in (("find_knn", scan), ("index_knn", indexed)):
+        p50, p99 = _percentiles(samples)
+        _result(results, f"{name}_p50", n, p50, "ms", False)
+        _result(results, f"{name}_p99", n, p99, "ms", False)
+
+
+async def _bench_api(store: ProfileStore, n: int, seed: int, results: List[Result]) -> None:
+    api.USER_EMBEDDINGS = store
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def page_ms(fresh: bool, headers: Optional[Dict[str, str]] = None) -> float:
+            samples = []
+            for _ in range(PAGE_REPEATS):
+                if fresh:
+                    store.touch()  # a new version: the render cache misses
+                start = time.perf_counter()
+                response = await client.get("/profiles", params={"limit": PAGE}, headers=headers)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == (304 if headers else 200), response.status_code
+            return _percentiles(samples)[0]
+
+        _result(results, "profiles_page_fresh", n, await page_ms(True), "ms", False)
+        tag = (await client.get("/profiles", params={"limit": PAGE})).headers["etag"]
+        _result(results, "profiles_page_cached", n, await page_ms(False), "ms", False)
+        _result(results, "profiles_page_304", n, await page_ms(False, {"If-None-Match": tag}), "ms", False)
+
+        rows, cursor = 0, None
+        start = time.perf_counter()
+        while True:
+            params = {"limit": PAGE, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/profiles", params=params)).json()
+            rows += len(page["profiles"])
+            cursor = page.get("next_cursor")
+            if not cursor:
+                break
+        _result(results, "profiles_walk", n, rows / (time.perf_counter() - start), "rows/s", True)
+
+        bodies = [request_body(profile) for profile in generate(API_REQUESTS, seed + 1)]
+        gate = asyncio.Semaphore(API_CONCURRENCY)
+        latencies: List[float] = []
+
+        async def post(body):
+            async with gate:
+                began = time.perf_counter()
+                (await client.post("/profiles", json=body)).raise_for_status()
+                latencies.append(time.perf_counter() - began)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(post(body) for body in bodies))
+        _result(results, "api_create", n, len(bodies) / (time.perf_counter() - start), "requests/s", True)
+        _result(results, "api_create_p99", n, _percentiles(latencies)[1], "ms", False)
+
+        keys = store.index.keys
+        ids = [keys[i] for i in np.random.default_rng(seed).integers(0, len(keys), API_REQUESTS).tolist()]
+        latencies = []
+
+        async def get(profile_id):
+            async with gate:
+                began = time.perf_counter()
+                (await client.get(f"/profiles/{profile_id}")).raise_for_status()
+                latencies.append(time.perf_counter() - began)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(get(profile_id) for profile_id in ids))
+        _result(results, "api_get", n, len(ids) / (time.perf_counter() - start), "requests/s", True)
+        _result(results, "api_get_p99", n, _percentiles(latencies)[1], "ms", False)
+
+
+def _meta(args: argparse.Namespace) -> Dict[str, object]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "encoder_version": encoder_version(),
+        "seed": args.seed,
+        "sizes": args.sizes,
+    }
+
+
+def compare(results: List[Result], baseline: List[Result], tolerance: float) -> List[str]:
+    """Metrics in ``results`` worse than ``baseline`` by more than ``tolerance`` (a fraction)."""
+    previous = {(row["name"], row["size"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get((row["name"], row["size"]))
+        if old is None or not old["value"]:
+            continue
+        change = row["value"] / old["value"] - 1.0
+        worse = -change if row["higher_is_better"] else change
+        if worse > tolerance:
+            regressions.append(
+                f"{row['name']} @ {row['size']}: {old['value']:.3f} -> {row['value']:.3f} {row['unit']} ({change:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--skip-api", action="store_true")
+    args = parser.parse_args(argv)
+
+    api.EMBED_CACHE.memory.maxsize = 0  # every request runs the pipeline
+    REGISTRY.reset()
+    results: List[Result] = []
+    _log(f"{'size':>9} {'metric':<28} {'value':>14}")
+    for n in args.sizes:
+        store = _bench_embedding_and_rooms(n, args.seed, results)
+        _bench_knn(store, n, args.seed, results)
+        if not args.skip_api:
+            asyncio.run(_bench_api(store, n, args.seed, results))
+
+    report = {"meta": _meta(args), "results": results, "stages": REGISTRY.summary()}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            _log(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        _log(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
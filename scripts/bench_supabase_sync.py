@@ -0,0 +1,45 @@
+"""
+Throughput of the incremental Supabase profile sync against the in-process fake.
+
+Run from the repo root: python -m scripts.bench_supabase_sync [n_rows] [page_size]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from backend.api.supabase_sync import SupabaseSyncEngine
+from tests.support.fake_supabase import FakeSupabase
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    client = FakeSupabase()
+    client.table("profiles").insert([{"id": f"user-{i:07d}", "username": f"user {i}", "bio": "", "interests": []} for i in range(n)]).execute()
+
+    applied = [0]
+    engine = SupabaseSyncEngine(client, lambda rows: applied.__setitem__(0, applied[0] + len(rows)), page_size=page_size)
+    asyncio.run(engine.sync_once())
+    stats = engine.stats
+    print(f"full sync:        {stats.last_rows} rows, {stats.pages} pages, {stats.last_seconds:.2f}s, {stats.rows_per_sec:,.0f} rows/s")
+
+    changed = max(1, n // 100)
+    for i in range(0, n, n // changed):
+        client.table("profiles").update({"bio": "edited"}).eq("id", f"user-{i:07d}").execute()
+    pages = stats.pages
+    asyncio.run(engine.sync_once())
+    print(
+        f"incremental sync: {stats.last_rows} rows, {stats.pages - pages} pages, {stats.last_seconds:.3f}s, "
+        f"{stats.rows_per_sec:,.0f} rows/s, lag {stats.lag_seconds:.3f}s"
+    )
+
+    start = time.perf_counter()
+    asyncio.run(engine.sync_once())
+    print(f"no-op sync:       {stats.last_rows} rows in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Text encode time per token-hash scheme, with and without the token cache.
+
+Run from the repo root: python -m scripts.bench_text_encoder
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Dict, List
+
+from backend.embedding import text_encoder
+from backend.embedding.lru import LRUCache
+from backend.profile_extraction.cv_parser import SKILL_KEYWORDS
+
+N_CVS = 2_000
+ROLES = ["Senior Software Engineer", "Data Scientist", "Product Manager", "ML Engineer", "Designer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries"]
+VERBS = ["Led", "Built", "Designed", "Shipped", "Scaled", "Migrated", "Owned", "Mentored"]
+OBJECTS = [
+    "the recommendation pipeline", "a real-time analytics platform", "our cloud infrastructure",
+    "customer-facing dashboards", "the search ranking service", "a team of five engineers",
+    "experimentation tooling", "the mobile onboarding flow", "data quality monitoring",
+]
+
+
+def _cv(rng: random.Random) -> Dict[str, object]:
+    lines = []
+    for _ in range(rng.randint(3, 6)):
+        start = rng.randint(2008, 2022)
+        lines.append(f"{rng.choice(ROLES)} at {rng.choice(COMPANIES)} {start}-{start + rng.randint(1, 4)}")
+        for _ in range(rng.randint(2, 4)):
+            lines.append(
+                f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {', '.join(rng.sample(sorted(SKILL_KEYWORDS), 3))} "
+                f"improving latency by {rng.randint(5, 60)}% for {rng.randint(1, 900)}k users"
+            )
+    return {
+        "summary": " ".join(lines[:2]),
+        "skills": rng.sample(sorted(SKILL_KEYWORDS), 5),
+        "experience": lines,
+        "interests": ["ml", "product"],
+    }
+
+
+def _time(corpus: List[Dict[str, object]]) -> float:
+    start = time.perf_counter()
+    for features in corpus:
+        text_encoder.encode_text_features(features)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rng = random.Random(0)
+    corpus = [_cv(rng) for _ in range(N_CVS)]
+    n_tokens = sum(len(text_encoder._tokenize(features)) for features in corpus)
+    print(f"{N_CVS} CVs, {n_tokens} tokens")
+    print(f"{'scheme':>10} {'cache':>6} {'ms total':>10} {'ns/token':>10} {'hit rate':>9}")
+
+    original_cache = text_encoder.TOKEN_CACHE
+    original_scheme = text_encoder.HASH_SCHEME
+    try:
+        for scheme in text_encoder.HASH_SCHEMES:
+            for maxsize in (0, 65536):
+                text_encoder.TOKEN_CACHE = LRUCache(maxsize=maxsize)
+                text_encoder.set_hash_scheme(scheme)
+                elapsed = _time(corpus)
+                hit_rate = text_encoder.TOKEN_CACHE.stats()["hit_rate"]
+                print(
+                    f"{scheme:>10} {'on' if maxsize else 'off':>6} {elapsed * 1e3:>10.1f} "
+                    f"{elapsed * 1e9 / n_tokens:>10.0f} {hit_rate:>9.2%}"
+                )
+    finally:
+        text_encoder.TOKEN_CACHE = original_cache
+        text_encoder.set_hash_scheme(original_scheme)
+
+
+if __name__ == "__main__":
+    main()
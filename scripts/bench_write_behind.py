@@ -0,0 +1,61 @@
+"""
+Inline Supabase writes vs. the write-behind queue, against a fake client with
+per-request latency.
+
+Run from the repo root: python -m scripts.bench_write_behind [n_updates] [latency_ms]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from backend.api.write_behind import WriteBehindQueue
+from tests.support.fake_supabase import FakeSupabase
+
+
+def _updates(n: int):
+    # Presence toggles over a small set of profiles, as when users flap online/offline
+    return [{"profile_id": f"user-{i % 500}", "is_online": i % 2 == 0} for i in range(n)]
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 2.0) / 1e3
+    updates = _updates(n)
+
+    client = FakeSupabase(latency=latency)
+    start = time.perf_counter()
+    for row in updates:
+        client.table("avatar_states").upsert(row, on_conflict="profile_id").execute()
+    inline = time.perf_counter() - start
+    print(f"inline:       {n} updates, {client.requests} requests, loop blocked {inline:.2f}s")
+
+    client = FakeSupabase(latency=latency)
+    queue = WriteBehindQueue(client, max_batch=200, flush_interval=0.05)
+
+    async def scenario() -> float:
+        task = asyncio.create_task(queue.run_forever())
+        blocked = 0.0
+        for row in updates:
+            t0 = time.perf_counter()
+            queue.put("avatar_states", row, on_conflict="profile_id")
+            blocked += time.perf_counter() - t0
+            if queue.enqueued % 100 == 0:
+                await asyncio.sleep(0)
+        while len(queue):
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return blocked
+
+    blocked = asyncio.run(scenario())
+    stats = queue.stats()
+    print(
+        f"write-behind: {n} updates, {client.requests} requests, loop blocked {blocked * 1e3:.1f} ms, "
+        f"{stats['coalesced']} coalesced, flush p50 {stats['flush_p50_ms']:.1f} ms / p99 {stats['flush_p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,8 @@ from pathlib import Path
 
 import numpy as np
 
-from backend.embedding.user_embedder import UserProfile, embed_user
-from backend.spatial.space_mapper import map_to_3d_space
+from backend.embedding.user_embedder import UserProfile, batch_embed
+from backend.spatial.layout import LayoutEngine
 
 DATA_PATH = Path("data/sample_profiles/demo_profiles.json")
 OUTPUT_PATH = Path("data/embeddings/demo_embeddings.json")
@@ -14,20 +14,19 @@ OUTPUT_PATH = Path("data/embeddings/demo_embeddings.json")
 
 def main() -> None:
     profiles = json.loads(DATA_PATH.read_text(encoding="utf-8"))
-    embedded = []
-
-    for profile in profiles:
-        created = embed_user(
-            UserProfile(
-                name=profile["name"],
-                cv_text=profile.get("summary"),
-                transcript=profile.get("transcript"),
-                interests=profile.get("interests", []),
-            )
+    embedded = batch_embed([
+        UserProfile(
+            name=profile["name"],
+            cv_text=profile.get("summary"),
+            transcript=profile.get("transcript"),
+            interests=profile.get("interests", []),
         )
-        coords = map_to_3d_space(np.array(created["embedding"])).tolist()
-        created["coords"] = coords
-        embedded.append(created)
+        for profile in profiles
+    ])
+
+    coords = LayoutEngine().fit(np.array([created["embedding"] for created in embedded], dtype=np.float32))
+    for created, xyz in zip(embedded, coords.tolist()):
+        created["coords"] = xyz
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     OUTPUT_PATH.write_text(json.dumps(embedded, indent=2), encoding="utf-8")
@@ -0,0 +1,89 @@
+"""
+Seeded synthetic GiDi profiles for benchmarks.
+
+Each profile belongs to one or two communities (``TAXONOMY`` buckets), and
+its CV, transcript and interests are drawn mostly from those communities'
+keywords and the ``SKILL_KEYWORDS`` that go with them. This gives the
+embedding, k-NN and room code the clustered population they see in
+practice instead of uniform noise. The same ``(n, seed)`` always yields
+the same profiles, and ``generate`` streams, so 1M profiles never sit in
+memory as text at once.
+
+Usage: for profile in generate(100_000, seed=7): ...
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, Iterator, List
+
+from backend.embedding.user_embedder import UserProfile
+from backend.profile_extraction.cv_parser import SKILL_KEYWORDS
+from backend.profile_extraction.interest_mapper import TAXONOMY
+
+# Skills a community's CVs lean on; everything else in SKILL_KEYWORDS is background
+COMMUNITY_SKILLS: Dict[str, List[str]] = {
+    "ai": ["python", "pytorch", "tensorflow", "ml", "research", "data"],
+    "llm": ["llm", "python", "pytorch", "nlp", "research", "cloud"],
+    "nlp": ["nlp", "python", "research", "data"],
+    "audio": ["python", "pytorch", "research", "webrtc"],
+    "web": ["react", "three.js", "webrtc", "design", "cloud"],
+    "gaming": ["unity", "design", "three.js", "product"],
+    "product": ["product", "design", "manager", "leadership", "data"],
+    "data": ["data", "python", "aws", "gcp", "azure", "cloud"],
+}
+ROLES = [
+    "engineer", "senior engineer", "staff engineer", "research scientist", "product manager",
+    "designer", "data scientist", "tech lead", "founder", "consultant",
+]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay", "Stark Labs", "Wayne Tech", "Tyrell", "Cyberdyne"]
+VERBS = ["built", "shipped", "led", "scaled", "designed", "migrated", "launched", "maintained", "prototyped", "owned"]
+OBJECTS = [
+    "a realtime pipeline", "the mobile app", "an internal platform", "recommendation models", "the search stack",
+    "a design system", "voice features", "analytics dashboards", "a multiplayer backend", "evaluation tooling",
+]
+FILLER = ["with", "for", "across", "using", "on", "and", "into"]
+CHAT = [
+    "honestly", "I think", "lately", "you know", "mostly", "what excites me is", "I keep coming back to",
+    "these days", "on weekends", "at work",
+]
+
+
+def _profile(rng: random.Random, index: int, communities: List[str], skills: List[str]) -> UserProfile:
+    home = rng.sample(communities, k=rng.choice((1, 1, 2)))
+    keywords = [kw for bucket in home for kw in sorted(TAXONOMY[bucket])]
+    leaning = [skill for bucket in home for skill in COMMUNITY_SKILLS[bucket]]
+    lines = [f"{rng.choice(ROLES).title()} with {rng.randint(1, 20)} years of experience in {rng.choice(keywords)}."]
+    year = rng.randint(2004, 2016)
+    for _ in range(rng.randint(2, 6)):
+        used = rng.sample(leaning, k=min(3, len(leaning))) + [rng.choice(skills)]
+        lines.append(
+            f"{year}-{year + rng.randint(1, 4)} {rng.choice(ROLES)} at {rng.choice(COMPANIES)}: "
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(FILLER)} {' '.join(used)}"
+        )
+        year += rng.randint(1, 4)
+    lines.append("Skills: " + ", ".join(sorted(set(rng.sample(leaning, k=min(4, len(leaning))) + [rng.choice(skills)]))))
+    transcript = " ".join(
+        f"{rng.choice(CHAT)} {rng.choice(keywords)}" for _ in range(rng.randint(3, 8))
+    )
+    interests = sorted(set(rng.sample(keywords, k=min(len(keywords), rng.randint(1, 4)))))
+    return UserProfile(name=f"synthetic-{index}", cv_text="\n".join(lines), transcript=transcript, interests=interests)
+
+
+def generate(n: int, seed: int = 0) -> Iterator[UserProfile]:
+    """``n`` reproducible profiles; profile ``i`` depends only on ``seed`` and ``i``."""
+    communities = sorted(TAXONOMY)
+    skills = sorted(SKILL_KEYWORDS)
+    for index in range(n):
+        yield _profile(random.Random(seed * 1_000_003 + index), index, communities, skills)
+
+
+def request_body(profile: UserProfile) -> Dict[str, object]:
+    """JSON body for POST /profiles."""
+    return {
+        "name": profile.name,
+        "cv_text": profile.cv_text,
+        "transcript": profile.transcript,
+        "interests": profile.interests,
+        "bio": profile.cv_text.splitlines()[0],
+    }
@@ -31,11 +31,14 @@ CREATE TABLE IF NOT EXISTS avatar_states (
 -- Room messages (chat history)
 CREATE TABLE IF NOT EXISTS room_messages (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    room_id TEXT,
     profile_id TEXT REFERENCES profiles(id) ON DELETE SET NULL,
     username TEXT NOT NULL,
     content TEXT NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
+-- Databases created before rooms had chat
+ALTER TABLE room_messages ADD COLUMN IF NOT EXISTS room_id TEXT;
 
 -- Knowledge chunks for RAG (vector embeddings)
 CREATE TABLE IF NOT EXISTS knowledge_chunks (
@@ -56,6 +59,7 @@ WITH (lists = 100);
 -- Index for faster profile lookups
 CREATE INDEX IF NOT EXISTS avatar_states_profile_id_idx ON avatar_states(profile_id);
 CREATE INDEX IF NOT EXISTS room_messages_created_at_idx ON room_messages(created_at DESC);
+CREATE INDEX IF NOT EXISTS room_messages_room_id_created_at_idx ON room_messages(room_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS knowledge_chunks_profile_id_idx ON knowledge_chunks(profile_id);
 
 -- Function to update updated_at timestamp
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import importlib
+import sys
+
+import pytest
+
+from backend.observability.metrics import REGISTRY
+
+API_MODULE = "backend.api.main"
+# No snapshot, disk cache or Supabase: every test starts from the demo profiles
+API_ENV = {"GIDI_SNAPSHOT_DIR": "", "GIDI_EMBED_CACHE_PATH": "", "SUPABASE_URL": ""}
+
+
+@pytest.fixture
+def load_api(monkeypatch):
+    """
+    Import a fresh ``backend.api.main`` with ``API_ENV`` plus any overrides.
+    Its settings are read at import, so each call re-imports it and gets new
+    stores, rooms, queues and executors.
+    """
+    collectors = list(REGISTRY._collectors)
+
+    def load(**env: str):
+        for name, value in {**API_ENV, **env}.items():
+            monkeypatch.setenv(name, value)
+        sys.modules.pop(API_MODULE, None)
+        return importlib.import_module(API_MODULE)
+
+    yield load
+    sys.modules.pop(API_MODULE, None)
+    REGISTRY._collectors[:] = collectors  # drop the gauges of the discarded module
+
+
+@pytest.fixture
+def api(load_api):
+    return load_api()
@@ -0,0 +1 @@
+# Test doubles shared by the tests and the benchmark scripts
@@ -0,0 +1,198 @@
+"""
+In-process stand-in for the supabase-py client.
+
+Implements the slice of the PostgREST query builder the backend uses
+(select/eq/gt/gte/lt/in_/order/limit/range, insert/upsert/update/delete)
+over plain lists of dicts, so sync and write paths can be exercised and
+benchmarked offline. Tables with an ``updated_at`` column get it stamped
+on every write, mirroring the trigger in ``supabase/schema.sql``.
+``fail_next`` fails the next requests outright; ``reject(table, row)``
+fails any insert/upsert carrying a matching row, like a constraint
+violation, and writes none of it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+Row = Dict[str, Any]
+
+TIMESTAMPED_TABLES = {"profiles"}
+CONFLICT_KEYS = {"profiles": "id", "avatar_states": "profile_id"}
+
+
+@dataclass
+class FakeResponse:
+    data: List[Row]
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeSupabase:
+    def __init__(self, clock: Callable[[], str] = _utc_now, latency: float = 0.0) -> None:
+        self.tables: Dict[str, List[Row]] = {}
+        # (table, conflict column) -> rows by key, built lazily for upserts
+        self._keyed: Dict[Tuple[str, str], Dict[Any, Row]] = {}
+        self.clock = clock
+        self.latency = latency
+        self.requests = 0
+        self.fail_next = 0
+        self.reject: Optional[Callable[[str, Row], bool]] = None
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> "FakeQuery":
+        return FakeQuery(self, name)
+
+    def rows(self, name: str) -> List[Row]:
+        return self.tables.setdefault(name, [])
+
+    def _by_key(self, name: str, column: str) -> Dict[Any, Row]:
+        keyed = self._keyed.get((name, column))
+        if keyed is None:
+            keyed = {row[column]: row for row in self.rows(name) if column in row}
+            self._keyed[(name, column)] = keyed
+        return keyed
+
+
+class FakeQuery:
+    def __init__(self, client: FakeSupabase, table: str) -> None:
+        self._client = client
+        self._table = table
+        self._filters: List[Callable[[Row], bool]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._op = "select"
+        self._payload: Union[Row, List[Row], None] = None
+        self._on_conflict: Optional[str] = None
+
+    # -- filters ----------------------------------------------------------
+
+    def select(self, *columns: str) -> "FakeQuery":
+        self._op = "select"
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def in_(self, column: str, values: Sequence[Any]) -> "FakeQuery":
+        allowed = set(values)
+        self._filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # -- writes -----------------------------------------------------------
+
+    def insert(self, rows: Union[Row, List[Row]]) -> "FakeQuery":
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows: Union[Row, List[Row]], on_conflict: Optional[str] = None) -> "FakeQuery":
+        self._op, self._payload, self._on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def update(self, values: Row) -> "FakeQuery":
+        self._op, self._payload = "update", values
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self._op = "delete"
+        return self
+
+    # -- execution --------------------------------------------------------
+
+    def execute(self) -> FakeResponse:
+        client = self._client
+        if client.latency:
+            time.sleep(client.latency)
+        with client._lock:
+            client.requests += 1
+            if client.fail_next > 0:
+                client.fail_next -= 1
+                raise ConnectionError("fake supabase: injected failure")
+            table = client.rows(self._table)
+            if self._op == "select":
+                return FakeResponse([dict(row) for row in self._select(table)])
+            if self._op == "delete":
+                kept = [row for row in table if not self._matches(row)]
+                removed = len(table) - len(kept)
+                table[:] = kept
+                for cache_key in [k for k in client._keyed if k[0] == self._table]:
+                    del client._keyed[cache_key]
+                return FakeResponse([{}] * removed)
+            if self._op == "update":
+                changed = []
+                for row in table:
+                    if self._matches(row):
+                        row.update(self._payload)
+                        self._stamp(row)
+                        changed.append(dict(row))
+                return FakeResponse(changed)
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            if client.reject is not None and any(client.reject(self._table, row) for row in rows):
+                raise ValueError(f"fake supabase: {self._table} rejected a row")
+            return FakeResponse([self._write(table, dict(row)) for row in rows])
+
+    def _matches(self, row: Row) -> bool:
+        return all(check(row) for check in self._filters)
+
+    def _select(self, table: List[Row]) -> List[Row]:
+        rows = [row for row in table if self._matches(row)]
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        end = None if self._limit is None else self._offset + self._limit
+        return rows[self._offset : end]
+
+    def _stamp(self, row: Row) -> None:
+        if self._table in TIMESTAMPED_TABLES:
+            row["updated_at"] = self._client.clock()
+
+    def _write(self, table: List[Row], row: Row) -> Row:
+        key = self._on_conflict or CONFLICT_KEYS.get(self._table, "id")
+        keyed = self._client._by_key(self._table, key)
+        existing = keyed.get(row.get(key)) if self._op == "upsert" else None
+        if existing is not None:
+            existing.update(row)
+            self._stamp(existing)
+            return dict(existing)
+        if self._table in TIMESTAMPED_TABLES:
+            row.setdefault("created_at", self._client.clock())
+        self._stamp(row)
+        table.append(row)
+        if key in row:
+            keyed[row[key]] = row
+        for (name, column), other in self._client._keyed.items():
+            if name == self._table and column != key and column in row:
+                other[row[column]] = row
+        return dict(row)
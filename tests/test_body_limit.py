@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from backend.api.body_limit import BodySizeLimit
+
+
+def _client(max_bytes):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimit, max_bytes=max_bytes, paths=("/upload",), detail="too big")
+    read = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        read.append(len(await file.read()))
+        return {"size": read[-1]}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app), read
+
+
+def _multipart(payload: bytes):
+    boundary = "gidi-boundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"cv.pdf\"\r\n"
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"content-type": f"multipart/form-data; boundary={boundary}"}
+
+
+def test_rejects_by_content_length_and_while_streaming_chunked_bodies():
+    client, read = _client(max_bytes=1000)
+    assert client.post("/upload", files={"file": ("cv.pdf", b"x" * 100)}).json() == {"size": 100}
+
+    response = client.post("/upload", files={"file": ("cv.pdf", b"x" * 5000)})
+    assert response.status_code == 413 and response.json() == {"detail": "too big"}
+
+    body, headers = _multipart(b"x" * 5000)
+    def chunks():  # no Content-Length: httpx sends it chunked
+        for start in range(0, len(body), 256):
+            yield body[start : start + 256]
+
+    response = client.post("/upload", content=chunks(), headers=headers)
+    assert response.status_code == 413 and response.json() == {"detail": "too big"}
+    assert read == [100]  # the handler never ran for either oversized upload
+
+    assert client.post("/other", files={"file": ("cv.pdf", b"x" * 5000)}).json() == {"size": 5000}
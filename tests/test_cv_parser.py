@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+
+from backend.profile_extraction import cv_parser
+
+
+def test_text_cv_single_pass_matches_legacy_fields(tmp_path):
+    text = "Jane Doe\nPython and ML engineer\n" + "x" * 300 + "\nExperience\n2019 Acme, React\n"
+    path = tmp_path / "cv.txt"
+    path.write_text(text, encoding="utf-8")
+
+    parsed = cv_parser.parse_cv(str(path))
+
+    assert parsed == cv_parser.parse_cv_text(text)
+    assert parsed["summary"] == text[:280].replace("\n", " ") + "..."
+    assert parsed["skills"] == ["ml", "python", "react"]
+    assert parsed["experience"] == ["Experience", "2019 Acme, React"]
+    assert parsed["chars"] == len(text) and not parsed["truncated"]
+    assert "raw_text" not in parsed and len(parsed["digest"]) == 64
+
+
+def test_large_json_array_is_decoded_incrementally_and_stops_at_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv_parser, "_JSON_CHUNK", 7)  # force many partial reads
+    positions = [{"title": f"Engineer {i}", "year": 2000 + i, "notes": "aws, \"gcp\""} for i in range(50)]
+    path = tmp_path / "linkedin.json"
+    path.write_text(json.dumps(positions, indent=2), encoding="utf-8")
+
+    parsed = cv_parser.parse_cv(str(path))
+
+    assert parsed["experience"] == [str(item) for item in positions[:5]]
+    assert parsed["skills"] == ["aws", "gcp"]
+    assert parsed["truncated"]
+    assert parsed["summary"].startswith(str(positions[0]) + " " + str(positions[1])[:10])
+
+
+def test_json_object_values_and_numbers_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv_parser, "_JSON_CHUNK", 3)
+    path = tmp_path / "profile.json"
+    path.write_text(json.dumps({"headline": "Data lead", "since": 123456789, "skills": ["python"]}), encoding="utf-8")
+
+    parsed = cv_parser.parse_cv(str(path))
+
+    assert parsed["summary"] == "Data lead 123456789 ['python']"
+    assert parsed["skills"] == ["data", "python"]
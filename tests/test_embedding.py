@@ -17,3 +17,69 @@ def test_embed_user_is_deterministic():
 
     assert len(first["embedding"]) == len(second["embedding"]) == 32
     assert np.allclose(first["embedding"], second["embedding"])
+
+
+def test_batch_embed_matches_embed_user():
+    from backend.embedding.user_embedder import batch_embed
+
+    profiles = [
+        UserProfile(name="A", cv_text="Python developer, ML in 2021.\nReact and AWS.", interests=["ml", "Web"]),
+        UserProfile(name="B", transcript="Short hello", interests=[]),
+        UserProfile(name="C", cv_text="design design design product", transcript="hey", interests=["game", "audio"]),
+        UserProfile(name="D"),
+    ]
+
+    assert batch_embed(profiles) == [embed_user(profile) for profile in profiles]
+
+
+def test_lru_cache_evicts_and_counts():
+    from backend.embedding.lru import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5}
+
+
+def test_hash_scheme_is_versioned():
+    from backend.embedding import text_encoder
+    from backend.embedding.embedding_cache import pipeline_fingerprint
+
+    features = {"summary": "python ml", "skills": ["react"]}
+    default = text_encoder.encode_text_features(features)
+    fingerprint = pipeline_fingerprint()
+    try:
+        text_encoder.set_hash_scheme("crc32-v1")
+        assert text_encoder.encoder_version() == "text-crc32-v1-d16"
+        assert not np.allclose(text_encoder.encode_text_features(features), default)
+        assert pipeline_fingerprint() != fingerprint  # cached per encoder setting, not forever
+    finally:
+        text_encoder.set_hash_scheme("md5-v1")
+    assert np.array_equal(text_encoder.encode_text_features(features), default)
+    assert pipeline_fingerprint() == fingerprint
+
+
+def test_embedding_cache_hits_memory_then_disk(tmp_path):
+    from backend.embedding.embedding_cache import EmbeddingCache
+
+    path = str(tmp_path / "cache.sqlite3")
+    profile = UserProfile(name="Ada", cv_text="Python and ML research", interests=["ml"])
+
+    cache = EmbeddingCache(path=path)
+    first = cache.embed(profile)
+    first["coords"] = [0, 0, 0]  # callers mutate results; cached copy must not change
+    renamed = cache.embed(UserProfile(name="Ada L.", cv_text=profile.cv_text, interests=["ml"]))
+    cache.close()
+
+    assert renamed["name"] == "Ada L." and "coords" not in renamed
+    assert renamed["embedding"] == embed_user(profile)["embedding"]
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
+
+    reopened = EmbeddingCache(path=path)
+    assert reopened.embed(profile)["embedding"] == first["embedding"]
+    assert reopened.stats()["disk_hits"] == 1 and reopened.stats()["misses"] == 0
+    reopened.close()
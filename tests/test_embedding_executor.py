@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from backend.embedding.executor import EmbeddingBusy, EmbeddingExecutor
+
+
+def test_concurrent_requests_share_one_batch_off_the_loop():
+    calls = []
+
+    def fn(items):
+        calls.append((list(items), threading.current_thread().name))
+        return [{"value": item * 2} for item in items]
+
+    executor = EmbeddingExecutor(fn, workers=1, max_batch=16, max_delay=0.01)
+
+    async def scenario():
+        return await asyncio.gather(*(executor.embed(i) for i in range(10)))
+
+    try:
+        assert [r["value"] for r in asyncio.run(scenario())] == [i * 2 for i in range(10)]
+    finally:
+        executor.shutdown()
+    assert len(calls) == 1 and calls[0][0] == list(range(10))
+    assert calls[0][1].startswith("embed")
+    assert executor.stats()["mean_batch"] == 10
+
+
+def test_errors_reach_every_caller_and_queue_is_bounded():
+    def fn(items):
+        raise ValueError("boom")
+
+    executor = EmbeddingExecutor(fn, workers=1, max_queue=2, max_delay=0.01)
+
+    async def scenario():
+        return await asyncio.gather(*(executor.embed(i) for i in range(3)), return_exceptions=True)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert [type(r) for r in results] == [ValueError, ValueError, EmbeddingBusy]
+    assert executor.rejected == 1
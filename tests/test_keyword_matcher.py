@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from backend.profile_extraction.cv_parser import count_skills, parse_cv_text
+from backend.profile_extraction.interest_mapper import count_interest_buckets, normalize_interests
+from backend.profile_extraction.keyword_matcher import KeywordMatcher
+
+
+def test_matches_whole_words_only():
+    text = "HTML and CSS, some XML. Built ML models; ml ops with Python3 and python."
+    assert count_skills(text) == {"ml": 2, "python": 1}
+    assert "ml" not in parse_cv_text("Wrote HTML emails for a database vendor")["skills"]
+
+
+def test_phrases_overlapping_suffixes_and_punctuation():
+    matcher = KeywordMatcher({
+        "a": ["machine learning", "learning"],
+        "b": ["learning rate schedule", "rate"],
+        "web": ["three.js", "c++"],
+    })
+    text = "Machine-learning: tuned the learning rate schedule in C++ and Three.js."
+    assert matcher.count_terms(text) == {
+        "machine learning": 1,
+        "learning rate schedule": 1,
+        "c++": 1,
+        "three.js": 1,
+    }
+    assert matcher.count_labels("learning rate, rate") == {"a": 1, "b": 2}
+
+
+def test_taxonomy_buckets():
+    assert count_interest_buckets("A large language model for speech and game audio") == {
+        "llm": 1,
+        "audio": 2,
+        "gaming": 1,
+    }
+    scores = normalize_interests(["Large Language Model", "ML"])
+    assert scores["llm"] > 0 and scores["ai"] > 0 and scores["nlp"] == 0
+    assert normalize_interests(["html"])["ai"] == 0.5  # fallback, not a "ml" hit
+
+
+def test_interest_phrases_map_to_one_bucket():
+    scores = normalize_interests(["Text-to-Speech"])
+    assert scores["audio"] > 0 and scores["nlp"] == 0.0 and scores["ai"] == 0.0
+    scores = normalize_interests(["text mining", "speech"])
+    assert scores["nlp"] > 0 and scores["audio"] > 0
+    assert normalize_interests(["textbooks"])["nlp"] == 0.0  # whole tokens only
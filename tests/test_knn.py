@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.spatial.knn_clustering import EmbeddingIndex, cosine_distance, find_knn
+
+
+def _random_rows(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_index_matches_pairwise_cosine():
+    data = _random_rows(200)
+    keys = [f"u{i}" for i in range(len(data))]
+    index = EmbeddingIndex()
+    index.upsert_many(keys, data)
+
+    query = data[7]
+    expected = sorted(range(len(data)), key=lambda i: cosine_distance(query, data[i]))[:5]
+    results = index.search(query, k=5)
+
+    assert [key for key, _ in results] == [keys[i] for i in expected]
+    assert np.isclose(results[0][1], 0.0, atol=1e-5)
+
+
+def test_index_upsert_remove_and_batch():
+    data = _random_rows(50, seed=1)
+    index = EmbeddingIndex()
+    for i, vec in enumerate(data):
+        index.upsert(f"u{i}", vec)
+
+    assert index.remove("u0")
+    assert not index.remove("u0")
+    index.upsert("u1", data[2])  # replace in place
+    assert len(index) == 49
+
+    batch = index.search_batch(data[:3], k=3)
+    assert len(batch) == 3
+    assert all("u0" not in [key for key, _ in row] for row in batch)
+    assert batch[2][0][1] < 1e-5 and {batch[2][0][0], batch[2][1][0]} == {"u1", "u2"}
+
+
+def test_find_knn_orders_candidates():
+    data = _random_rows(20, seed=2)
+    candidates = [{"name": f"n{i}", "embedding": vec.tolist()} for i, vec in enumerate(data)]
+    results = find_knn(data[3], candidates, k=3)
+    assert results[0]["name"] == "n3"
+    assert [r["distance"] for r in results] == sorted(r["distance"] for r in results)
+
+
+def test_ivf_exhaustive_probe_matches_exact():
+    from backend.spatial.ann_index import IVFIndex
+
+    data = _random_rows(600, seed=3)
+    keys = [f"u{i}" for i in range(len(data))]
+    exact = EmbeddingIndex()
+    exact.upsert_many(keys, data)
+    ivf = IVFIndex(nlist=12, min_train_size=100)
+    ivf.upsert_many(keys, data)
+    assert ivf.is_trained
+
+    for i in range(0, 300, 3):
+        ivf.remove(keys[i])
+        exact.remove(keys[i])
+    replacement = _random_rows(1, seed=4)[0]
+    ivf.upsert(keys[1], replacement)
+    exact.upsert(keys[1], replacement)
+
+    for query in data[:20]:
+        want = [key for key, _ in exact.search(query, k=5)]
+        got = [key for key, _ in ivf.search(query, k=5, nprobe=12)]
+        assert got == want
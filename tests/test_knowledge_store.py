@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.embedding.knowledge_store import TABLE_DIM, KnowledgeStore, chunk_id
+from backend.profile_extraction.cv_parser import chunk_segments
+from backend.voice_cloning.avatar_manager import AvatarManager
+
+
+def test_chunks_overlap_and_rejoin_words_across_segments():
+    words = [f"w{i}" for i in range(10)]
+    assert list(chunk_segments([" ".join(words)], words=4, overlap=1)) == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert list(chunk_segments(["w0 w", "1 w2\n", "w3"], words=3, overlap=1)) == ["w0 w1 w2", "w2 w3"]
+    assert list(chunk_segments(["w0 w1 w2"], words=3, overlap=1)) == ["w0 w1 w2"]
+    assert list(chunk_segments([""])) == []
+
+
+def _cv(rng, topic, n):
+    filler = "worked on projects with teams across several companies".split()
+    return [" ".join(list(rng.choice(filler, 8)) + [topic, f"{topic}{i}"]) for i in range(n)]
+
+
+def test_profile_filtered_search_with_replacement_and_compaction():
+    rng = np.random.default_rng(0)
+    store = KnowledgeStore(dtype="float16", capacity=4)
+    store.put_many([(f"p{i}", _cv(rng, f"topic{i}", 5)) for i in range(50)])
+    assert len(store) == 250
+
+    hits = store.search("topic7 topic70", k=3, profile_id="p7")
+    assert [hit.profile_id for hit in hits] == ["p7"] * 3 and hits[0].text.endswith("topic70")
+    assert store.search("topic7", profile_id="nobody") == []
+    everywhere = store.search("topic9 topic92", k=1)
+    assert (everywhere[0].profile_id, everywhere[0].chunk) == ("p9", 2)
+
+    # Shrink in place, grow into a new span, remove; then churn until compaction
+    assert store.put("p7", _cv(rng, "topic7", 2)) == 5
+    assert store.put("p8", _cv(rng, "topic8", 9)) == 5
+    assert store.remove("p9") and "p9" not in store
+    assert all(hit.profile_id != "p9" for hit in store.search("topic9 topic92", k=5))
+    for round_ in range(30):
+        store.put(f"p{round_}", _cv(rng, f"new{round_}", 40))
+    assert store.stats()["garbage"] < len(store)
+    hit = store.search("new3 new317", k=1)[0]
+    assert (hit.profile_id, hit.chunk, hit.text.split()[-1]) == ("p3", 17, "new317")
+    assert len(store.chunks("p3")) == 40 and len(store.chunks("p40")) == 5
+
+
+def test_sync_rows_and_avatar_answers():
+    store = KnowledgeStore()
+    store.put("ava", ["built recommender systems in python", "leads pytorch research on speech"])
+    rows = store.sync_rows("ava")
+    assert [row["id"] for row in rows] == [chunk_id("ava", 0), chunk_id("ava", 1)]
+    assert len(rows[1]["embedding"]) == TABLE_DIM and rows[1]["metadata"]["chunk"] == 1
+    assert np.isclose(np.linalg.norm(rows[1]["embedding"]), 1.0, atol=1e-3)
+
+    manager = AvatarManager(knowledge=store)
+    avatar = manager.create_avatar("Ava", "sample.wav", {"warmth": 0.9}, {}, profile_id="ava")
+    answer = manager.respond(avatar, "What speech research do you do?")
+    assert answer["sources"][0]["chunk"] == 1 and "pytorch research" in answer["text"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.spatial.layout import LayoutEngine
+from backend.spatial.space_mapper import map_to_3d_space
+
+
+def _clusters(rng, n, dim=32, centers=4):
+    # Cluster centers differ only past the first three dimensions
+    offsets = np.zeros((centers, dim), dtype=np.float32)
+    offsets[:, 3:] = rng.normal(0, 1, (centers, dim - 3))
+    labels = rng.integers(0, centers, n)
+    return offsets[labels] + rng.normal(0, 0.1, (n, dim)).astype(np.float32), labels
+
+
+def test_fit_separates_what_truncation_cannot():
+    rng = np.random.default_rng(0)
+    matrix, labels = _clusters(rng, 2000)
+    coords = LayoutEngine().fit(matrix)
+    truncated = np.array([map_to_3d_space(row) for row in matrix])
+
+    def separation(points):
+        means = np.array([points[labels == c].mean(axis=0) for c in range(4)])
+        spread = np.mean([points[labels == c].std(axis=0).mean() for c in range(4)])
+        gaps = np.linalg.norm(means[:, None] - means[None], axis=2)
+        return gaps[np.triu_indices(4, 1)].min() / spread
+
+    assert coords.shape == (2000, 3) and coords.dtype == np.float32
+    assert separation(coords) > 5 * separation(truncated)
+    assert not np.allclose(np.linalg.norm(coords, axis=1), 1.0)  # no longer pinned to the unit sphere
+
+
+def test_incremental_updates_match_a_full_fit_and_refit_on_drift():
+    rng = np.random.default_rng(1)
+    matrix, _ = _clusters(rng, 600)
+    streamed = LayoutEngine(min_fit=8)
+    assert streamed.project(matrix[:1]).tolist() == [map_to_3d_space(matrix[0]).tolist()]
+    for row in matrix:
+        streamed.update(None, row)
+    assert streamed.needs_refit() and streamed.refit()
+    assert np.allclose(np.abs(streamed.project(matrix)), np.abs(LayoutEngine().fit(matrix)), atol=1e-3)
+
+    # More of the same population barely moves the fit
+    more, _ = _clusters(np.random.default_rng(1), 200)
+    for row in more:
+        streamed.update(None, row)
+    assert streamed.drift() < streamed.drift_threshold
+
+    # A new community in an unrelated direction does, and the refit keeps its orientation
+    newcomers = np.zeros((400, 32), dtype=np.float32)
+    newcomers[:, 0] = 3.0
+    newcomers += rng.normal(0, 0.1, newcomers.shape).astype(np.float32)
+    for i, row in enumerate(newcomers):
+        streamed.update(matrix[i], row)  # existing GiDis re-embedded elsewhere
+    assert len(streamed) == 800
+    assert streamed.drift() > streamed.drift_threshold
+    version, components = streamed.version, streamed._projection[1]
+    streamed.check_every = 0
+    assert streamed.needs_refit() and streamed.refit() and streamed.version == version + 1
+    assert (np.sum(streamed._projection[1] * components, axis=0) >= 0).all()
+
+
+def test_profiles_projected_before_a_refit_are_reprojected_on_upsert(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    embed = api._embed_with_coords
+
+    def embed_then_refit(profiles):
+        embedded = embed(profiles)
+        # A refit lands on the loop while the batch is on its way back
+        monkeypatch.setattr(api.LAYOUT, "project", lambda vectors: np.full((len(vectors), 3), 0.25))
+        api.LAYOUT.version += 1
+        return embedded
+
+    monkeypatch.setattr(api, "_embed_with_coords", embed_then_refit)
+    with TestClient(api.app) as client:
+        created = client.post("/profiles", json={"name": "Late", "bio": "Graph ML"}).json()
+        assert created["coords"] == [0.25, 0.25, 0.25] and "layout_version" not in created
+        assert client.get(f"/profiles/{created['id']}").json()["coords"] == [0.25, 0.25, 0.25]
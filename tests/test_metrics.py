@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.observability import metrics
+from backend.observability.metrics import Histogram, MetricsMiddleware, Registry
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    return registry
+
+
+def test_histogram_quantiles_track_numpy_within_a_bucket():
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(mean=-7, sigma=1.5, size=20_000)
+    histogram = Histogram()
+    for value in samples.tolist():
+        histogram.observe(value)
+    for q in (0.5, 0.95, 0.99):
+        assert histogram.quantile(q) == pytest.approx(np.quantile(samples, q), rel=0.25)
+    assert histogram.count == len(samples) and histogram.max == samples.max()
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_spans_counters_and_prometheus_text(_fresh_registry):
+    with metrics.stage("cv_parse"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.supabase_call("upsert", "profiles"):
+            raise RuntimeError("down")
+    metrics.inc("gidi_cache_hits_total", cache='say "hi"')
+    _fresh_registry.collect("queue", lambda: {"depth": 3, "healthy": True, "last_error": None})
+
+    text = _fresh_registry.render()
+    assert '# TYPE gidi_stage_seconds summary' in text
+    assert 'gidi_stage_seconds_count{stage="cv_parse"} 1' in text
+    assert 'gidi_supabase_seconds_count{op="upsert",table="profiles"} 1' in text
+    assert 'gidi_supabase_errors_total{op="upsert",table="profiles"} 1' in text
+    assert 'gidi_cache_hits_total{cache="say \\"hi\\""} 1' in text
+    assert "gidi_queue_depth 3" in text and "gidi_queue_healthy 1" in text and "last_error" not in text
+    assert set(_fresh_registry.summary()['gidi_stage_seconds{stage="cv_parse"}']) >= {"p50", "p95", "p99"}
+
+    metrics.set_enabled(False)
+    assert metrics.stage("cv_parse") is metrics.span("x") is metrics.supabase_call("select", "profiles")
+    with metrics.stage("cv_parse"):
+        pass
+    metrics.inc("gidi_cache_hits_total")
+    assert _fresh_registry.histograms[("gidi_stage_seconds", (("stage", "cv_parse"),))].count == 1
+    assert len(_fresh_registry.counters) == 2
+
+
+def test_middleware_labels_requests_by_route_template():
+    from fastapi import FastAPI, HTTPException
+    from fastapi.testclient import TestClient
+
+    registry = Registry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        if item_id == "boom":
+            raise HTTPException(status_code=503)
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for item_id in ("a", "b", "boom"):
+        client.get(f"/items/{item_id}")
+    client.get("/nowhere")
+    assert registry.histograms[("gidi_request_seconds", (("method", "GET"), ("route", "/items/{item_id}")))].count == 3
+    assert registry.histograms[("gidi_request_seconds", (("method", "GET"), ("route", "unmatched")))].count == 1
+    assert registry.counters == {("gidi_request_errors_total", (("method", "GET"), ("route", "/items/{item_id}"))): 1.0}
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.profile_extraction.pdf_extractor import PdfExtractionPool, PdfExtractionTimeout, extract_pdf_text
+
+
+def _write_pdf(path, pages):
+    """Minimal PDF with one Helvetica text line per entry in ``pages``."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+    return str(path)
+
+
+def test_stops_reading_pages_once_budget_is_full(tmp_path):
+    path = _write_pdf(tmp_path / "cv.pdf", [f"page {i}   python   engineer" for i in range(50)])
+
+    result = extract_pdf_text(path, char_limit=100)
+
+    assert result["page_count"] == 50
+    assert result["pages_read"] < 10
+    assert result["truncated"] and len(result["text"]) == 100
+    assert result["text"].startswith("page 0 python engineer page 1 ")
+
+
+def test_short_pdf_is_read_in_full(tmp_path):
+    path = _write_pdf(tmp_path / "cv.pdf", ["Ada Lovelace", "Analytical engines"])
+
+    result = extract_pdf_text(path)
+
+    assert result["text"] == "Ada Lovelace Analytical engines"
+    assert not result["truncated"]
+
+
+def test_pool_times_out_and_replaces_workers(tmp_path):
+    small = _write_pdf(tmp_path / "cv.pdf", ["hello world"])
+    large = _write_pdf(tmp_path / "book.pdf", [f"page {i}" for i in range(3000)])
+    pool = PdfExtractionPool(max_workers=1, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(PdfExtractionTimeout):
+            await pool.extract(large, char_limit=10**9)
+        pool.timeout = 30.0
+        return await pool.extract(small)
+
+    try:
+        assert asyncio.run(scenario())["text"] == "hello world"
+        assert pool.timeouts == 1 and pool.completed == 1
+    finally:
+        pool.shutdown()
+
+
+def test_jobs_killed_by_another_jobs_timeout_are_retried(tmp_path):
+    large = _write_pdf(tmp_path / "book.pdf", [f"page {i}" for i in range(3000)])
+    pool = PdfExtractionPool(max_workers=2, timeout=30.0)
+
+    async def scenario():
+        job = asyncio.ensure_future(pool.extract(large, char_limit=50))
+        while pool._executor is None:
+            await asyncio.sleep(0.01)
+        pool._kill_workers(pool._executor)  # what a concurrent job's timeout does
+        return await job
+
+    try:
+        assert asyncio.run(scenario())["text"].startswith("page 0 page 1")
+        assert pool.retried == 1 and pool.completed == 1
+    finally:
+        pool.shutdown()
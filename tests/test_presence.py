@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from backend.api.presence import RESYNC, PresenceHub
+
+
+def _collector():
+    frames = []
+
+    async def send(frame):
+        frames.append(json.loads(frame))
+
+    return frames, send
+
+
+def test_events_are_routed_per_room_and_coalesced_per_tick():
+    hub = PresenceHub()
+    lobby, lobby_send = _collector()
+    other, other_send = _collector()
+    mine, mine_send = _collector()
+
+    async def scenario():
+        subs = [
+            hub.subscribe(lobby_send, rooms=["room-1"]),
+            hub.subscribe(other_send, rooms=["room-2"]),
+            hub.subscribe(mine_send, profile_id="me", profile_room="room-1"),
+        ]
+        pumps = [asyncio.create_task(sub.pump()) for sub in subs]
+        hub.place("a", None, "room-1")
+        hub.place("a", "room-1", None)
+        hub.place("a", None, "room-1")  # same tick: only the last event per profile is sent
+        hub.place("b", None, "room-3")  # nobody listens to room-3
+        hub.neighbor("me", "a", 0.123456)
+        hub.flush()
+        hub.place("me", "room-1", "room-2")  # "me" follows its own seat
+        hub.flush()
+        await asyncio.sleep(0)
+        for pump in pumps:
+            pump.cancel()
+
+    asyncio.run(scenario())
+    joined = {"t": "joined", "id": "a", "room": "room-1"}
+    moved = {"t": "moved", "id": "me", "from": "room-1", "to": "room-2"}
+    assert lobby == [{"t": "batch", "room": "room-1", "events": [joined]}, {"t": "batch", "room": "room-1", "events": [moved]}]
+    assert other == [{"t": "batch", "room": "room-2", "events": [moved]}]
+    assert mine == [
+        {"t": "batch", "room": "room-1", "events": [joined]},
+        {"t": "batch", "room": None, "events": [{"t": "neighbor", "id": "me", "neighbor": "a", "distance": 0.1235}]},
+        {"t": "batch", "room": "room-2", "events": [moved]},
+    ]
+    assert hub.stats()["coalesced"] == 2
+
+
+def test_slow_consumer_backlog_is_bounded():
+    hub = PresenceHub(max_queue=3)
+    sub = hub.subscribe(lambda frame: None, rooms=["room-1"])
+    for i in range(10):
+        hub.place(str(i), None, "room-1")
+        hub.flush()
+    assert sub.backlog <= 3
+    assert sub.overflows == 3
+    assert RESYNC in list(sub._queue)
+
+
+def test_websocket_endpoint_streams_presence(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        profile = client.get("/profiles").json()["profiles"][0]
+        with client.websocket_connect(f"/ws/presence?rooms={profile['room']}") as ws:
+            client.put(f"/profiles/{profile['id']}/online?is_online=true")
+            assert ws.receive_json()["events"] == [{"t": "joined", "id": profile["id"], "room": profile["room"]}]
+            ws.send_json({"unsubscribe": [profile["room"]], "subscribe": ["elsewhere"]})
+            client.put(f"/profiles/{profile['id']}/online?is_online=false")
+        with client.websocket_connect("/ws/presence") as ws:
+            assert ws.receive()["type"] == "websocket.close"
+
+
+def test_fan_out_task_restarts_after_a_failed_tick(api, monkeypatch, capsys):
+    import time
+
+    from fastapi.testclient import TestClient
+
+    flush, calls = api.PRESENCE.flush, []
+
+    def flaky_flush():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("bad frame")
+        return flush()
+
+    monkeypatch.setattr(api.PRESENCE, "flush", flaky_flush)
+    with TestClient(api.app) as client:
+        profile = client.get("/profiles").json()["profiles"][0]
+        with client.websocket_connect(f"/ws/presence?rooms={profile['room']}") as ws:
+            client.put(f"/profiles/{profile['id']}/online?is_online=true")
+            while not calls:
+                time.sleep(0.01)
+            client.put(f"/profiles/{profile['id']}/online?is_online=false")
+            assert ws.receive_json()["events"][0]["t"] == "left"
+    assert "Presence fan-out failed, restarting it: RuntimeError: bad frame" in capsys.readouterr().out
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.api.profile_store import ProfileStore
+from backend.spatial.knn_clustering import EmbeddingIndex
+
+
+def _profile(profile_id: str, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return {
+        "id": profile_id,
+        "name": f"user-{profile_id}",
+        "embedding": [1.0, 0.0, 0.0],
+        "text_embedding": rng.random(4, dtype=np.float32).tolist(),
+        "coords": [0.5, -0.25, 1.0],
+        "interest_scores": {"ai": 1 / 3, "music": 2 / 3},
+        "cv": {"summary": f"engineer {seed} " * 20, "skills": ["python"], "experience": []},
+        "room": "room-1",
+        "interests": ["ai", "music"],
+        "is_online": False,
+    }
+
+
+def test_record_round_trips_and_keeps_vectors_in_columns():
+    store = ProfileStore(index=EmbeddingIndex())
+    profile = _profile("a")
+    store.upsert(dict(profile))
+    record = store.get("a")
+
+    assert record == profile
+    assert list(record) == list(profile)
+    assert record.to_dict() == profile
+    assert record["interest_scores"]["ai"] == 1 / 3
+    assert record.get("bio", "none") == "none"
+    assert "embedding" not in record.__slots__
+    assert store._columns._arrays["text_embedding"].dtype == np.float32
+
+
+def test_record_mutation_and_detach_on_replace():
+    store = ProfileStore(index=EmbeddingIndex())
+    store.upsert(_profile("a"))
+    record = store.get("a")
+
+    record["is_online"] = True
+    record["room"] = "room-2"
+    record["voice"] = {"pitch": "low"}
+    record["coords"] = [1.0, 2.0, 3.0]
+    record["interest_scores"] = {"other": 1}  # new key schema falls back to the cold blob
+    del record["cv"]
+    assert store.get("a").to_dict() == {
+        **{k: v for k, v in _profile("a").items() if k != "cv"},
+        "is_online": True,
+        "room": "room-2",
+        "voice": {"pitch": "low"},
+        "coords": [1.0, 2.0, 3.0],
+        "interest_scores": {"other": 1},
+    }
+
+    previous = store.upsert(_profile("a", seed=1))
+    assert previous["room"] == "room-2"
+    assert record["room"] == "room-2"  # old holders keep their values
+    store.remove("a")
+    store.upsert(_profile("b", seed=2))  # reuses the freed slot
+    assert record["coords"] == [1.0, 2.0, 3.0]
+    assert store.get("b")["coords"] == [0.5, -0.25, 1.0]
+
+
+def test_cold_fields_survive_dictionary_compression():
+    store = ProfileStore(index=EmbeddingIndex())
+    profiles = [_profile(str(i), seed=i) for i in range(200)]
+    for profile in profiles:
+        store.upsert(profile)
+
+    assert store._columns._zdict is not None
+    assert store.get("0")._cold[0] == 0
+    assert store.get("199")._cold[0] == 1
+    assert [row.to_dict() for row in store] == profiles
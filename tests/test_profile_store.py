@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from backend.api.profile_store import ProfileStore
+from backend.spatial.knn_clustering import EmbeddingIndex
+
+
+def _row(profile_id: str, name: str, embedding):
+    return {"id": profile_id, "name": name, "embedding": list(embedding)}
+
+
+def test_upsert_replaces_in_place_and_updates_indexes():
+    store = ProfileStore(index=EmbeddingIndex())
+    store.upsert(_row("a", "Ada", [1.0, 0.0, 0.0]))
+    store.upsert(_row("b", "Bo", [0.0, 1.0, 0.0]))
+
+    previous = store.upsert(_row("a", "Ada L.", [0.0, 0.9, 0.1]))
+
+    assert previous["name"] == "Ada"
+    assert len(store) == 2
+    assert store.get_by_name("Ada") is None
+    assert store.get_by_name("Ada L.")["id"] == "a"
+    assert [row["id"] for row in store] == ["a", "b"]
+    assert [row["id"] for row, _ in store.nearest(store.get("b"), k=2)] == ["b", "a"]
+
+
+def test_remove_frees_slot_and_name():
+    store = ProfileStore(index=EmbeddingIndex())
+    store.upsert(_row("a", "Same", [1.0, 0.0]))
+    store.upsert(_row("b", "Same", [0.0, 1.0]))
+
+    assert store.get_by_name("Same")["id"] == "a"
+    assert store.remove("a")["id"] == "a"
+    assert store.remove("a") is None
+    assert "a" not in store
+    assert store.get_by_name("Same")["id"] == "b"
+
+    store.upsert(_row("c", "Cy", [1.0, 1.0]))
+    assert len(store) == 2
+    assert len(store.index) == 2
+
+
+def test_snapshot_round_trip_into_store(tmp_path):
+    import numpy as np
+
+    from backend.api.snapshot import load_snapshot, write_snapshot
+
+    rows = [
+        {"id": "a", "name": "Ada", "room": "room-1", "embedding": [1.0, 0.0]},
+        {"id": "b", "name": "Bo", "room": "room-2", "embedding": [0.0, 1.0]},
+    ]
+    matrix = np.array([row["embedding"] for row in rows], dtype=np.float32)
+    write_snapshot(str(tmp_path), rows, matrix, created_at="2026-01-01T00:00:00+00:00")
+    write_snapshot(
+        str(tmp_path),
+        rows[:1],
+        matrix[:1],
+        created_at="2026-01-02T00:00:00+00:00",
+        watermark="2026-01-01T12:00:00+00:00",
+        watermark_id="a",
+    )
+
+    snapshot = load_snapshot(str(tmp_path))
+    assert snapshot.created_at == "2026-01-02T00:00:00+00:00"
+    assert (snapshot.watermark, snapshot.watermark_id) == ("2026-01-01T12:00:00+00:00", "a")
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert len(list(tmp_path.glob("embeddings-*.npy"))) == 1
+
+    store = ProfileStore(index=EmbeddingIndex())
+    store.load(snapshot.profiles, snapshot.embeddings)
+    assert store.get("a") == {"id": "a", "name": "Ada", "room": "room-1", "embedding": [1.0, 0.0]}
+    store.upsert(_row("a", "Ada", [0.6, 0.8]))  # copy-on-write: the file is untouched
+    store.upsert(_row("c", "Cy", [0.0, 1.0]))
+    assert [row["id"] for row, _ in store.nearest(store.get("c"), k=2)] == ["c", "a"]
+    assert load_snapshot(str(tmp_path)).profiles[0]["embedding"] == [1.0, 0.0]
+
+
+def test_concurrent_snapshot_writers_never_orphan_the_index(tmp_path):
+    import threading
+
+    import numpy as np
+
+    from backend.api.snapshot import load_snapshot, write_snapshot
+
+    rows = [{"id": "a", "name": "Ada", "room": "room-1", "embedding": [1.0, 0.0]}]
+    matrix = np.array([[1.0, 0.0]], dtype=np.float32)
+    write_snapshot(str(tmp_path), rows, matrix)
+    misses = []
+
+    def writer():
+        for _ in range(200):
+            write_snapshot(str(tmp_path), rows, matrix)
+
+    def reader():
+        for _ in range(400):
+            if load_snapshot(str(tmp_path)) is None:
+                misses.append(1)
+
+    threads = [threading.Thread(target=writer) for _ in range(3)] + [threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert misses == []
+    assert len(list(tmp_path.glob("embeddings-*.npy"))) == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_page_resumes_from_cursor_and_filters():
+    store = ProfileStore(index=EmbeddingIndex())
+    for i in range(5):
+        store.upsert({**_row(str(i), f"user-{i}", [1.0, float(i)]), "is_online": i % 2 == 0})
+    store.remove("1")
+
+    rows, cursor = store.page(limit=2)
+    assert [row["id"] for row in rows] == ["0", "2"]
+    rows, cursor = store.page(cursor, limit=2)
+    assert [row["id"] for row in rows] == ["3", "4"] and cursor is None
+
+    rows, cursor = store.page(where=lambda row: row.get("is_online"))
+    assert [row["id"] for row in rows] == ["0", "2", "4"] and cursor is None
+
+
+def test_workers_sharing_a_segment_write_no_snapshot(tmp_path, load_api):
+    import uuid
+
+    from fastapi.testclient import TestClient
+
+    from backend.api.shared_store import SharedProfileStore
+
+    segment = f"gidi-test-{uuid.uuid4().hex[:12]}"
+    try:
+        api = load_api(GIDI_SHARED_STORE=segment, GIDI_SNAPSHOT_DIR=str(tmp_path))
+        with TestClient(api.app) as client:
+            assert client.get("/profiles").json()["profiles"]
+        assert api.SNAPSHOT_DIR == "" and list(tmp_path.iterdir()) == []
+    finally:
+        SharedProfileStore(segment).unlink()
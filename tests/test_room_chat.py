@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from backend.api.room_chat import ChatHub, RoomLog
+from backend.api.write_behind import WriteBehindQueue
+from tests.support.fake_supabase import FakeSupabase
+
+
+def _seqs(items):
+    return [json.loads(item)["seq"] for item in items]
+
+
+def test_ring_buffer_pages_by_cursor_after_wrapping():
+    log = RoomLog(capacity=5)
+    for seq in range(12):
+        log.append(json.dumps({"seq": seq}).encode())
+    assert len(log) == 5 and log.oldest == 7
+
+    items, cursor = log.before(None, 3)
+    assert _seqs(items) == [9, 10, 11] and cursor == 9
+    items, cursor = log.before(cursor, 3)
+    assert _seqs(items) == [7, 8] and cursor is None
+    assert _seqs(log.before(2, 3)[0]) == []  # evicted: only room_messages has it
+
+    items, cursor = log.after(8, 2)
+    assert _seqs(items) == [9, 10] and cursor == 10
+    assert log.after(11, 5) == ([], 11)
+    items, cursor = log.after(40, 10)  # cursor from an earlier buffer
+    assert _seqs(items) == [7, 8, 9, 10, 11] and cursor == 11
+
+
+def test_messages_persist_in_batches_and_refill_after_restart():
+    client = FakeSupabase()
+    queue = WriteBehindQueue(client)
+
+    def load(room_id, limit):
+        rows = client.table("room_messages").select("*").eq("room_id", room_id).order("created_at", desc=True)
+        return list(reversed(rows.limit(limit).execute().data))
+
+    async def scenario():
+        hub = ChatHub(capacity=3, persist=lambda row: queue.put("room_messages", row))
+        for i in range(4):
+            await hub.post("room-1", "a", "Ada", f"hello {i}")
+        await hub.post("room-2", None, "Bo", "  hi  ")
+        with pytest.raises(ValueError):
+            await hub.post("room-1", "a", "Ada", "   ")
+        assert queue.flush_now() == 5 and client.requests == 1
+
+        restarted = ChatHub(capacity=3, load=load)
+        first, second = await asyncio.gather(restarted.history("room-1"), restarted.history("room-1", limit=2))
+        page = json.loads(first)
+        assert [m["content"] for m in page["messages"]] == ["hello 1", "hello 2", "hello 3"]
+        assert json.loads(second)["next_cursor"] == 1
+        message = await restarted.post("room-1", "a", "Ada", "back")
+        assert message["seq"] == 3 and restarted.stats()["loaded"] == 3
+        assert json.loads(await restarted.history("room-2"))["messages"][0]["content"] == "hi"
+
+    asyncio.run(scenario())
+
+
+def test_malformed_rows_are_skipped_and_failed_loads_retried():
+    calls = []
+
+    def load(room_id, limit):
+        calls.append(room_id)
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        good = {"id": "m1", "room_id": room_id, "username": "Ada", "content": "hi", "created_at": "2026-01-01"}
+        return [{"id": "m0", "room_id": room_id}, good]
+
+    async def scenario():
+        hub = ChatHub(load=load)
+        assert json.loads(await hub.history("room-1"))["messages"] == []
+        page = json.loads(await hub.history("room-1"))  # the failed load is retried
+        assert [m["seq"] for m in page["messages"]] == [0] and page["messages"][0]["id"] == "m1"
+        assert calls == ["room-1", "room-1"] and hub.stats()["load_failures"] == 1
+        assert hub.stats()["bad_rows"] == 1 and hub._loading == {}
+        await hub.history("room-1")
+        assert len(calls) == 2  # loaded once it succeeded
+
+        calls.clear()  # the next load fails again; a post during the outage is still kept
+        await hub.post("room-3", "a", "Ada", "still here")
+        assert [m["content"] for m in json.loads(await hub.history("room-3"))["messages"]] == ["still here"]
+
+        hub.load = lambda room_id, limit: 5  # not even a list of rows
+        with pytest.raises(TypeError):
+            await hub.history("room-2")
+        assert hub._loading == {}
+
+    asyncio.run(scenario())
+
+
+def test_retain_drops_buffers_of_rooms_that_are_gone():
+    async def scenario():
+        hub = ChatHub()
+        for room in ("room-1", "room-2", "room-3"):
+            await hub.post(room, "a", "Ada", f"hi {room}")
+        assert hub.retain({"room-2"}) == 2
+        assert len(hub) == 1 and hub.stats()["dropped_rooms"] == 2
+        assert json.loads(await hub.history("room-1"))["messages"] == []
+
+    asyncio.run(scenario())
+
+
+def test_chat_endpoints_and_websocket_delivery(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        profile = client.get("/profiles").json()["profiles"][0]
+        room = profile["room"]
+        with client.websocket_connect(f"/ws/presence?rooms={room}") as ws:
+            response = client.post(f"/rooms/{room}/messages", json={"profile_id": profile["id"], "content": "hi all"})
+            assert response.status_code == 201
+            sent = response.json()
+            assert sent["username"] == profile["name"] and sent["room_id"] == room
+            assert ws.receive_json()["events"] == [{"t": "message", **sent}]
+
+        page = client.get(f"/rooms/{room}/messages", params={"after": sent["seq"] - 1}).json()
+        assert page == {"messages": [sent], "next_cursor": sent["seq"]}
+        assert client.post("/rooms/nowhere/messages", json={"profile_id": profile["id"], "content": "x"}).status_code == 404
+        assert client.post(f"/rooms/{room}/messages", json={"profile_id": "nobody", "content": "x"}).status_code == 404
+        assert client.post(f"/rooms/{room}/messages", json={"profile_id": profile["id"], "content": " "}).status_code == 400
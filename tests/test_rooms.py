@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.spatial.room_generator import RoomIndex
+
+
+def test_assign_joins_closest_centroid_or_opens_room():
+    rooms = RoomIndex(threshold=0.3)
+    assert rooms.assign("a", [1.0, 0.0, 0.0]) == "room-1"
+    assert rooms.assign("b", [0.9, 0.1, 0.0]) == "room-1"
+    assert rooms.assign("c", [0.0, 0.0, 1.0]) == "room-2"
+
+    payload = rooms.to_payload()
+    assert payload["room-1"]["count"] == 2
+    assert payload["room-1"]["members"] == ["a", "b"]
+    centroid = np.array(payload["room-1"]["centroid"])
+    assert np.isclose(np.linalg.norm(centroid), 1.0, atol=1e-5)
+
+
+def test_reassign_removes_previous_membership():
+    rooms = RoomIndex(threshold=0.3)
+    rooms.assign("a", [1.0, 0.0])
+    rooms.assign("b", [0.0, 1.0])
+
+    assert rooms.assign("a", [0.1, 1.0]) == "room-2"
+    assert rooms.room_of("a") == "room-2"
+    assert "room-1" not in rooms.to_payload()
+    assert len(rooms) == 1
+    assert rooms.remove("a") == "room-2"
+    assert rooms.members("room-2") == ["b"]
+
+
+def test_rebalancer_respects_capacity_and_seats_everyone():
+    from backend.spatial.rebalancer import RoomRebalancer
+
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((1000, 16)).astype(np.float32)
+    ids = [f"u{i}" for i in range(len(data))]
+
+    rooms, report = RoomRebalancer(capacity=40, threshold=0.6).run(ids, data)
+
+    payload = rooms.to_payload()
+    assert sum(room["count"] for room in payload.values()) == 1000
+    assert max(room["count"] for room in payload.values()) <= 40
+    assert report.largest_room <= 40 and report.n_rooms == len(payload)
+    assert all(rooms.room_of(member_id) is not None for member_id in ids)
+    # Incremental assignment afterwards keeps honoring the cap
+    full = [room_id for room_id, room in payload.items() if room["count"] == 40]
+    assert full
+    assert rooms.assign("new", payload[full[0]]["centroid"]) != full[0]
+
+
+def test_failed_rebalance_reports_error_instead_of_result(monkeypatch):
+    from backend.spatial.rebalancer import RoomRebalancer
+
+    rebalancer = RoomRebalancer(capacity=4)
+
+    def broken(*args):
+        raise MemoryError("no room for the centroids")
+
+    monkeypatch.setattr(rebalancer, "run", broken)
+    done, errors = [], []
+    assert rebalancer.start(["a"], np.ones((1, 2)), lambda *result: done.append(result), errors.append)
+    rebalancer._worker.join()
+    assert done == [] and isinstance(errors[0], MemoryError)
+    assert rebalancer.last_error == "MemoryError: no room for the centroids" and not rebalancer.is_running
+
+
+def test_failed_rebalance_endpoint_unblocks_the_next_one(api, monkeypatch):
+    import time
+
+    from fastapi.testclient import TestClient
+
+    original = api.REBALANCER.run
+
+    def broken(*args):
+        raise RuntimeError("k-means blew up")
+
+    with TestClient(api.app) as client:
+        monkeypatch.setattr(api.REBALANCER, "run", broken)
+        assert client.post("/rooms/rebalance").json() == {"status": "started"}
+        for _ in range(100):
+            status = client.get("/rooms/rebalance").json()
+            if not status["running"]:
+                break
+            time.sleep(0.01)
+        assert status["running"] is False and status["error"] == "RuntimeError: k-means blew up"
+
+        monkeypatch.setattr(api.REBALANCER, "run", original)
+        assert client.post("/rooms/rebalance").json() == {"status": "started"}
+
+
+def test_rebalanced_rooms_keep_the_name_of_their_largest_old_group():
+    from backend.spatial.rebalancer import RoomRebalancer
+    from backend.spatial.room_generator import match_room_names
+
+    labels = np.array([0, 0, 0, 1, 1, 2, 2, 2])
+    previous = ["room-3", "room-3", "room-7", "room-7", "room-7", "room-3", None, None]
+    # Room 1 takes room-7 (2 members), room 0 room-3 (2); room 2 loses room-3 to it
+    assert match_room_names(labels, previous, next_number=12) == ["room-3", "room-7", "room-12"]
+    assert match_room_names(labels, previous)[2] == "room-8"
+
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((300, 8)).astype(np.float32)
+    ids = [f"u{i}" for i in range(300)]
+    rebalancer = RoomRebalancer(capacity=30, threshold=0.6)
+    first, _ = rebalancer.run(ids, data)
+    # Pretend the same groups were called room-21.. before: the rerun keeps those names
+    before = {i: f"room-{int(first.room_of(i).split('-')[1]) + 20}" for i in ids}
+    second, _ = rebalancer.run(ids, data, [before[i] for i in ids], next_number=50)
+    assert all(second.room_of(i) == before[i] for i in ids)
+    assert second.next_number == 50
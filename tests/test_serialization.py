@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pytest
+from starlette.requests import Request
+
+from backend.api.serialization import FastJSONResponse, RenderCache, etag, not_modified, parse_fields, project
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/profiles", "headers": headers})
+
+
+def test_parse_fields_and_project_with_defaults():
+    assert parse_fields(None) is None
+    assert parse_fields(" id, name ,id,") == ("id", "name")
+    with pytest.raises(ValueError):
+        parse_fields(" , ")
+    row = {"id": "a", "name": "Ada", "embedding": [1.0]}
+    assert project(row, ("id", "coords", "bio")) == {"id": "a", "coords": [0, 0, 0], "bio": None}
+
+
+def test_etag_matches_weakly_and_only_for_the_same_version():
+    tag = etag(7)
+    assert not_modified(_request(), tag) is None
+    assert not_modified(_request(etag(8)), tag) is None
+    assert not_modified(_request(tag), tag).status_code == 304
+    assert not_modified(_request('"x", ' + tag[2:]), tag).headers["etag"] == tag
+    assert not_modified(_request("*"), tag) is not None
+
+
+def test_render_cache_drops_bodies_from_older_versions():
+    cache = RenderCache(max_entries=2)
+    assert cache.get(1, "") is None
+    cache.put(1, "", b"v1")
+    assert cache.get(1, "") == b"v1"
+    assert cache.get(2, "") is None
+    cache.put(1, "", b"stale")  # rendered before the version moved on
+    assert cache.get(2, "") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 3}
+
+
+def test_render_cache_survives_version_switches_from_other_threads():
+    cache = RenderCache(max_entries=4)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(5000):
+                version = (i + offset) // 50
+                key = str(i % 8)
+                body = cache.get(version, key)
+                assert body is None or body == f"{version}:{key}".encode()
+                cache.put(version, key, f"{version}:{key}".encode())
+        except Exception as e:  # KeyError/AssertionError from an unguarded cache
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_fast_response_renders_numpy_and_prerendered_bytes():
+    assert FastJSONResponse({"v": np.float32(0.5)}).body == b'{"v":0.5}'
+    assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import multiprocessing
+import uuid
+
+import numpy as np
+import pytest
+
+from backend.api.shared_store import SharedProfileStore, SharedStoreFull, server_run_id
+
+
+@pytest.fixture
+def segment():
+    name = f"gidi-test-{uuid.uuid4().hex[:12]}"
+    yield name
+    SharedProfileStore(name).unlink()
+
+
+def _row(profile_id: str, name: str, embedding, room: str = "room-1"):
+    return {"id": profile_id, "name": name, "embedding": list(embedding), "room": room, "coords": [1.0, 2.0, 3.0]}
+
+
+def test_second_handle_sees_writes_and_removal_keeps_rows_dense(segment):
+    writer = SharedProfileStore(segment, capacity=8)
+    reader = SharedProfileStore(segment)
+    assert reader.get("a") is None and len(reader) == 0
+
+    writer.upsert_many([_row("a", "Ada", [1, 0, 0]), _row("b", "Bo", [0, 1, 0]), _row("c", "Cy", [0, 0, 1])])
+    writer.upsert({**_row("a", "Ada L.", [1, 0.1, 0]), "is_online": True})
+
+    assert len(reader) == 3
+    assert reader.get("a") == {
+        "id": "a",
+        "name": "Ada L.",
+        "room": "room-1",
+        "coords": [1.0, 2.0, 3.0],
+        "is_online": True,
+        "avatar_model": None,
+        "bio": None,
+        "interests": [],
+    }
+    assert reader.get_by_name("Bo")["id"] == "b" and reader.get_by_name("Ada") is None
+    assert [row["id"] for row, _ in reader.nearest_to("a", k=2)] == ["a", "b"]
+
+    assert writer.remove("a") and not writer.remove("a")
+    assert "a" not in reader and len(reader) == 2
+    assert {row["id"] for row, _ in reader.nearest([0, 0, 1], k=5)} == {"b", "c"}
+    assert reader.get("c")["name"] == "Cy"  # moved into row 0, still found through the hash table
+    assert reader.version == writer.version >= 3
+
+
+def test_hash_table_survives_churn(segment):
+    store = SharedProfileStore(segment, capacity=64)
+    rng = np.random.default_rng(0)
+    live = {}
+    for step in range(2_000):
+        key = f"p{int(rng.integers(0, 100))}"
+        if key in live and rng.random() < 0.5:
+            assert store.remove(key)
+            del live[key]
+        elif key in live or len(live) < 64:
+            live[key] = f"n{step}"
+            store.upsert(_row(key, live[key], rng.normal(size=4)))
+    assert len(store) == len(live)
+    assert all(store.get(key)["name"] == name for key, name in live.items())
+
+
+def test_pages_filters_and_online_flags_set_by_another_worker(segment):
+    owner = SharedProfileStore(segment, capacity=8)
+    other = SharedProfileStore(segment)
+    owner.upsert_many([
+        {**_row("a", "Ada", [1, 0], room="room-1"), "bio": "é" * 400, "interests": ["x" * 60, "y" * 60, "z"]},
+        _row("b", "Bo", [0, 1], room="room-2"),
+        _row("c", "Cy", [1, 1], room="room-1"),
+    ])
+    rows, cursor = other.page(limit=1, room="room-1")
+    assert [row["id"] for row in rows] == ["a"] and cursor == 2
+    assert [row["id"] for row in other.page(cursor, limit=1, room="room-1")[0]] == ["c"]
+    assert len(rows[0]["bio"]) == 160 and rows[0]["interests"] == ["x" * 60, "y" * 60]
+
+    assert other.set_online("b", True) and not other.set_online("nobody", True)
+    owner.upsert_many([_row("b", "Bo B.", [0, 1], room="room-2")], keep_online=True)  # stale copy of b
+    assert [row["id"] for row in other.page(online=True)[0]] == ["b"]
+    owner.upsert(_row("b", "Bo B.", [0, 1], room="room-2"))
+    assert other.page(online=True) == ([], None)
+
+
+def test_capacity_and_stale_owner(segment):
+    store = SharedProfileStore(segment, capacity=2, owner=1)
+    store.upsert_many([_row("a", "Ada", [1, 0]), _row("b", "Bo", [0, 1])])
+    with pytest.raises(SharedStoreFull):
+        store.upsert(_row("c", "Cy", [1, 1]))
+    with pytest.raises(ValueError):
+        store.upsert(_row("a", "Ada", [1, 0, 0]))
+
+    same_run = SharedProfileStore(segment, owner=1)
+    same_run.upsert(_row("a", "Ada", [1, 0]))
+    assert len(same_run) == 2
+    next_run = SharedProfileStore(segment, owner=2)
+    next_run.upsert(_row("c", "Cy", [1, 1]))
+    assert len(next_run) == 1 and store.get("a") is None
+
+
+def test_run_id_is_shared_by_workers_and_new_per_start(monkeypatch):
+    monkeypatch.delenv("GIDI_RUN_ID", raising=False)
+    # Run alone, this process is the run; spawned workers report their parent's id
+    ours = server_run_id()
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        assert pool.map(_run_id, range(2)) == [ours, ours]
+    monkeypatch.setenv("GIDI_RUN_ID", "deploy-1")
+    first = server_run_id()
+    monkeypatch.setenv("GIDI_RUN_ID", "deploy-2")
+    assert server_run_id() != first and first != ours
+
+
+def _run_id(_):
+    return server_run_id()
+
+def _write_rows(name: str, start: int, count: int) -> None:
+    store = SharedProfileStore(name)
+    for i in range(start, start + count):
+        # Every field encodes i, so a torn read would show a mismatch
+        store.upsert({"id": "hot", "name": f"n{i}", "room": f"room-{i}", "embedding": [float(i), 1.0], "coords": [i, i, i]})
+    store.close()
+
+
+def test_readers_never_see_a_torn_row_while_another_process_writes(segment):
+    SharedProfileStore(segment, capacity=4).upsert({**_row("hot", "n0", [0.0, 1.0], room="room-0"), "coords": [0, 0, 0]})
+    writer = multiprocessing.get_context("spawn").Process(target=_write_rows, args=(segment, 1, 3_000))
+    writer.start()
+    reader = SharedProfileStore(segment)
+    reads = 0
+    while writer.is_alive() or reads == 0:
+        row = reader.get("hot")
+        i = int(row["name"][1:])
+        assert row["room"] == f"room-{i}" and row["coords"] == [float(i)] * 3
+        reads += 1
+    writer.join()
+    assert writer.exitcode == 0
+    assert reader.get("hot")["name"] == "n3000"
+
+
+def test_every_worker_lists_and_updates_profiles_of_the_others(segment, load_api):
+    from fastapi.testclient import TestClient
+
+    api = load_api(GIDI_SHARED_STORE=segment, GIDI_RUN_ID="test-run")
+    with TestClient(api.app) as client:
+        demo = client.get("/profiles").json()["profiles"][0]
+        dim = len(client.get(f"/profiles/{demo['id']}", params={"fields": "embedding"}).json()["embedding"])
+        # A profile created on another worker of the same run
+        worker_2 = SharedProfileStore(segment, owner=server_run_id())
+        worker_2.upsert({**_row("w2", "Wen", [1.0] * dim, room=demo["room"]), "bio": "Speech", "interests": ["audio"]})
+
+        listed = client.get("/profiles", params={"room": demo["room"]})
+        assert "w2" in [row["id"] for row in listed.json()["profiles"]]
+        assert listed.headers["etag"] == api.etag(api.SHARED.version, f"{api.SHARED.owner:x}")
+        single = client.get("/profiles/w2")
+        assert single.json()["bio"] == "Speech" and single.json()["interests"] == ["audio"]
+        assert client.get("/profiles/w2", headers={"If-None-Match": single.headers["etag"]}).status_code == 304
+
+        assert client.put("/profiles/w2/online", params={"is_online": "true"}).status_code == 200
+        assert [row["id"] for row in client.get("/profiles", params={"online": "true"}).json()["profiles"]] == ["w2"]
+        assert worker_2.get("w2")["is_online"]
+        assert client.put("/profiles/w2/position", json={"x": 1, "z": 2}).status_code == 200
+        assert client.put("/profiles/nobody/online").status_code == 404
+        worker_2.close()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.spatial.space_mapper import to_world
+from backend.spatial.spatial_grid import SpatialGrid
+
+
+def test_queries_match_brute_force_after_moves_and_removals():
+    rng = np.random.default_rng(0)
+    grid = SpatialGrid(cell_size=1.5)
+    positions = {}
+    for i in range(600):
+        positions[str(i)] = rng.uniform(-20, 20, 3)
+        grid.upsert(str(i), positions[str(i)])
+    for i in range(0, 600, 3):
+        assert grid.remove(str(i))
+        del positions[str(i)]
+    for i in range(1, 600, 5):  # moves, most of them across cells
+        positions[str(i)] = rng.uniform(-20, 20, 3)
+        grid.upsert(str(i), positions[str(i)])
+    assert not grid.remove("0") and len(grid) == len(positions)
+
+    keys = list(positions)
+    matrix = np.array([positions[key] for key in keys])
+    for _ in range(50):
+        center, radius, k = rng.uniform(-25, 25, 3), rng.uniform(0, 8), int(rng.integers(1, 20))
+        distances = np.linalg.norm(matrix - center, axis=1)
+        inside = sorted((distances[i], keys[i]) for i in np.flatnonzero(distances <= radius))
+        assert [key for key, _ in grid.within(center, radius)] == [key for _, key in inside]
+        nearest = grid.nearest(center, k)
+        assert np.allclose([d for _, d in nearest], np.sort(distances)[:k])
+
+
+def test_exclude_and_world_mapping():
+    grid = SpatialGrid(cell_size=4)
+    grid.upsert("me", to_world([0.5, 0.9, -0.25]))
+    grid.upsert("near", (10.0, 0.0, -4.0))
+    grid.upsert("far", (-100.0, 0.0, 0.0))
+    assert grid.position("me") == (10.0, 0.0, -5.0)
+    assert grid.within(grid.position("me"), 2, exclude="me") == [("near", 1.0)]
+    assert [key for key, _ in grid.nearest(grid.position("me"), k=2, exclude="me")] == ["near", "far"]
+
+
+def test_non_finite_positions_are_rejected_with_422(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        profile_id = client.get("/profiles").json()["profiles"][0]["id"]
+        for body in ('{"x": Infinity, "z": 0}', '{"x": 0, "y": NaN, "z": 0}', '{"x": 0, "z": -Infinity}'):
+            response = client.put(
+                f"/profiles/{profile_id}/position", content=body, headers={"Content-Type": "application/json"}
+            )
+            assert response.status_code == 422 and response.json()["detail"][0]["type"] == "finite_number"
+        assert client.get("/space/within", params={"radius": "inf", "x": 0, "z": 0}).status_code == 422
+        assert client.get("/space/closest", params={"x": "nan", "z": 0}).status_code == 422
+        assert client.put(f"/profiles/{profile_id}/position", json={"x": 1.0, "z": 2.0}).status_code == 200
+        assert client.get("/space/closest", params={"x": 1.0, "z": 2.0, "k": 1}).json()["avatars"][0]["id"] == profile_id
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+
+from backend.api.supabase_sync import SupabaseSyncEngine
+from tests.support.fake_supabase import FakeSupabase
+
+
+def test_pages_through_rows_sharing_a_timestamp():
+    # Every row gets the same updated_at, so only the id tiebreak makes progress
+    client = FakeSupabase(clock=lambda: "2026-01-01T00:00:00+00:00")
+    client.table("profiles").insert([{"id": f"p{i:03d}", "username": f"u{i}"} for i in range(25)]).execute()
+    seen = []
+    engine = SupabaseSyncEngine(client, lambda rows: seen.extend(row["id"] for row in rows), page_size=4)
+
+    assert asyncio.run(engine.sync_once()) == 25
+    assert seen == sorted(seen) and len(set(seen)) == 25
+    assert asyncio.run(engine.sync_once()) == 0
+
+
+def test_second_run_applies_only_changed_rows():
+    ticks = itertools.count()
+    client = FakeSupabase(clock=lambda: f"2026-01-01T00:00:{next(ticks):02d}+00:00")
+    client.table("profiles").insert([{"id": f"p{i}", "username": f"u{i}"} for i in range(10)]).execute()
+    batches = []
+    engine = SupabaseSyncEngine(client, lambda rows: batches.append([row["id"] for row in rows]), page_size=3)
+    asyncio.run(engine.sync_once())
+    assert sum(len(batch) for batch in batches) == 10
+
+    batches.clear()
+    client.table("profiles").update({"bio": "new"}).eq("id", "p2").execute()
+    client.table("profiles").insert({"id": "p10", "username": "u10"}).execute()
+    assert asyncio.run(engine.sync_once()) == 2
+    assert [row for batch in batches for row in batch] == ["p2", "p10"]
+    assert engine.stats.runs == 2 and engine.stats.rows_applied == 12
+    assert engine.stats.watermark == client.rows("profiles")[-1]["updated_at"]
+
+
+def test_failed_fetch_keeps_watermark():
+    client = FakeSupabase()
+    client.table("profiles").insert({"id": "p0", "username": "u0"}).execute()
+    engine = SupabaseSyncEngine(client, lambda rows: None)
+    client.fail_next = 1
+    try:
+        asyncio.run(engine.sync_once())
+    except ConnectionError:
+        pass
+    assert engine.watermark is None and engine.stats.last_error
+    assert asyncio.run(engine.sync_once()) == 1
+
+
+def test_resumes_from_a_saved_watermark_and_id():
+    # A restart hands the snapshot's (watermark, watermark_id) to a new engine
+    client = FakeSupabase(clock=lambda: "2026-01-01T00:00:00+00:00")
+    client.table("profiles").insert([{"id": f"p{i}", "username": f"u{i}"} for i in range(5)]).execute()
+    first = SupabaseSyncEngine(client, lambda rows: None)
+    asyncio.run(first.sync_once())
+
+    client.table("profiles").insert({"id": "p5", "username": "u5"}).execute()  # same updated_at
+    seen = []
+    resumed = SupabaseSyncEngine(
+        client, lambda rows: seen.extend(row["id"] for row in rows), watermark=first.watermark, watermark_id=first.watermark_id
+    )
+    assert asyncio.run(resumed.sync_once()) == 1 and seen == ["p5"]
+
+
+def test_awaits_a_coroutine_apply_before_moving_the_watermark():
+    client = FakeSupabase()
+    client.table("profiles").insert([{"id": f"p{i}", "username": f"u{i}"} for i in range(3)]).execute()
+    seen = []
+
+    async def apply(rows):
+        await asyncio.sleep(0)
+        seen.extend(row["id"] for row in rows)
+
+    engine = SupabaseSyncEngine(client, apply, page_size=2)
+    assert asyncio.run(engine.sync_once()) == 3 and seen == ["p0", "p1", "p2"]
+
+
+def test_synced_rows_are_embedded_and_seated(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    remote = FakeSupabase()
+    remote.table("profiles").insert(
+        {"id": "remote-1", "username": "Rae", "bio": "Speech recognition researcher", "interests": ["audio"]}
+    ).execute()
+    with TestClient(api.app) as client:
+        monkeypatch.setattr(api.SYNC_ENGINE, "client", remote)
+        monkeypatch.setattr(api.SYNC_ENGINE, "watermark", None)
+        assert client.portal.call(api.SYNC_ENGINE.sync_once) == 1
+        synced = client.get("/profiles/remote-1").json()
+        assert synced["name"] == "Rae" and synced["room"] in api.ROOMS
+        assert len(synced["coords"]) == 3
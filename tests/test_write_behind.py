@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+
+from backend.api.write_behind import WriteBehindQueue
+from tests.support.fake_supabase import FakeSupabase
+
+
+def test_coalesces_updates_per_key_into_one_bulk_upsert():
+    client = FakeSupabase()
+    queue = WriteBehindQueue(client)
+    queue.put("profiles", {"id": "a", "username": "Ada"})
+    queue.put("avatar_states", {"profile_id": "a", "is_online": False}, on_conflict="profile_id")
+    queue.put("avatar_states", {"profile_id": "a", "is_online": True}, on_conflict="profile_id")
+    queue.put("profiles", {"id": "b", "username": "Bo"})
+    assert len(queue) == 3
+
+    assert queue.flush_now() == 3
+    assert client.requests == 2
+    assert client.rows("avatar_states") == [{"profile_id": "a", "is_online": True}]
+    stats = queue.stats()
+    assert stats["depth"] == 0 and stats["coalesced"] == 1 and stats["flushed_rows"] == 3
+
+
+def test_failed_flush_is_retried_under_newer_writes():
+    client = FakeSupabase()
+    queue = WriteBehindQueue(client, base_backoff=0.0)
+    queue.put("profiles", {"id": "a", "username": "Ada", "bio": "old"})
+    client.fail_next = 1
+    assert queue.flush_now() == 0
+    assert len(queue) == 1 and queue.failures == 1
+
+    queue.put("profiles", {"id": "a", "bio": "new"})
+    assert queue.flush_now() == 1
+    assert client.rows("profiles")[0]["username"] == "Ada"
+    assert client.rows("profiles")[0]["bio"] == "new"
+
+
+def test_rows_are_dropped_after_max_attempts():
+    client = FakeSupabase()
+    queue = WriteBehindQueue(client, base_backoff=0.0, max_attempts=2)
+    queue.put("profiles", {"id": "a", "username": "Ada"})
+    client.fail_next = 2
+    queue.flush_now()
+    queue.flush_now()
+    assert len(queue) == 0 and queue.dropped == 1
+
+
+def test_background_task_flushes_when_batch_is_full():
+    client = FakeSupabase()
+    queue = WriteBehindQueue(client, max_batch=10, flush_interval=60.0)
+
+    async def scenario():
+        task = asyncio.create_task(queue.run_forever())
+        await asyncio.sleep(0)
+        for i in range(10):
+            queue.put("profiles", {"id": f"p{i}", "username": f"u{i}"})
+        for _ in range(100):
+            if queue.flushed_rows == 10:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert len(client.rows("profiles")) == 10
+
+
+def test_repeated_failure_isolates_the_bad_row():
+    client = FakeSupabase()
+    client.reject = lambda table, row: row["id"] == "p3"
+    queue = WriteBehindQueue(client, base_backoff=0.0, max_attempts=3)
+    for i in range(8):
+        queue.put("profiles", {"id": f"p{i}", "username": f"u{i}"})
+
+    assert queue.flush_now() == 0  # could be a blip: the batch is retried whole
+    assert queue.flush_now() == 7  # failed again: bisected, the rest went through
+    assert sorted(row["id"] for row in client.rows("profiles")) == [f"p{i}" for i in range(8) if i != 3]
+    assert len(queue) == 1 and queue.isolated == 1
+    queue.flush_now()
+    assert len(queue) == 0 and queue.dropped == 1
+
+
+def test_untried_tables_wait_without_using_attempts():
+    client = FakeSupabase()
+    client.reject = lambda table, row: table == "profiles"
+    queue = WriteBehindQueue(client, base_backoff=0.0, max_attempts=2)
+    queue.put("profiles", {"id": "a", "username": "Ada"})
+    queue.put("avatar_states", {"profile_id": "a", "is_online": True}, on_conflict="profile_id")
+
+    queue.flush_now()
+    queue.flush_now()
+    assert queue.dropped == 1 and len(queue) == 1  # only the profile row used up its attempts
+    assert queue.flush_now() == 1
+    assert client.rows("avatar_states") == [{"profile_id": "a", "is_online": True}]
+
+
+def test_parents_flush_first_whatever_was_written_first():
+    client = FakeSupabase()
+    # Like the profiles(id) foreign key: a child row needs its parent
+    client.reject = lambda table, row: table != "profiles" and row["profile_id"] not in {
+        parent["id"] for parent in client.rows("profiles")
+    }
+    queue = WriteBehindQueue(client, table_order=("profiles", "avatar_states"))
+    queue.put("room_messages", {"id": "m1", "profile_id": "a"})
+    queue.put("avatar_states", {"profile_id": "a", "is_online": True}, on_conflict="profile_id")
+    queue.put("profiles", {"id": "a", "username": "Ada"})
+    assert queue.flush_now() == 3 and queue.failures == 0
+
+
+def test_demo_senders_are_persisted_without_a_profile_id(api, monkeypatch):
+    client = FakeSupabase()
+    monkeypatch.setattr(api.WRITE_QUEUE, "client", client)
+    api._persist_message({"id": "m1", "room_id": "room-1", "profile_id": "demo-ada", "username": "Ada"})
+    api._persist_message({"id": "m2", "room_id": "room-1", "profile_id": "p1", "username": "Bo"})
+    api.WRITE_QUEUE.flush_now()
+    assert [row["profile_id"] for row in client.rows("room_messages")] == [None, "p1"]
+
+
+def test_full_queue_drops_the_oldest_row():
+    queue = WriteBehindQueue(FakeSupabase(), max_pending=3)
+    for i in range(5):
+        queue.put("room_messages", {"id": f"m{i}", "content": str(i)})
+    queue.put("room_messages", {"id": "m4", "content": "edited"})  # coalesces, nothing dropped
+    assert len(queue) == 3 and queue.stats()["overflowed"] == 2
+    assert queue.flush_now() == 3
+    assert [row["id"] for row in queue.client.rows("room_messages")] == ["m2", "m3", "m4"]
+
+
+def test_outage_gives_up_bisecting_after_a_few_probes():
+    client = FakeSupabase()
+    queue = WriteBehindQueue(client, base_backoff=0.0)
+    for i in range(64):
+        queue.put("profiles", {"id": f"p{i}", "username": f"u{i}"})
+    client.fail_next = 1000
+    queue.flush_now()
+    queue.flush_now()
+    assert client.requests <= 2 + 2 * (64).bit_length()
+    assert len(queue) == 64 and queue.isolated == 0